@@ -0,0 +1,159 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the compression codecs of .ts2 archives.
+
+The members of each simulation file are written again in memory with each
+codec and level that can be chosen in the settings, and read back. The size
+of the archive and the writing and reading times are reported.
+
+By default, the simulations bundled in ``data/`` and ``simulations/`` and the
+ones downloaded in the simulations directory of the user are used. A
+synthetic simulation is used in addition with ``--stations``.
+
+Usage::
+
+    python3 benchmarks/compression_benchmark.py [--stations N] [FILE ...]
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+import zipfile
+
+import simplejson as json
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtWidgets  # noqa: E402
+from ts2 import snapshot  # noqa: E402
+from ts2.utils import settings  # noqa: E402
+
+
+def codecs():
+    """
+    :return: the (codec name, level) to benchmark
+    :rtype: list
+    """
+    result = []
+    for codec in settings.COMPRESSION_CODECS:
+        if codec in settings.COMPRESSION_LEVELS:
+            low, high = settings.COMPRESSION_LEVELS[codec]
+            result.extend((codec, level)
+                          for level in sorted({max(low, 1), 6, high}))
+        else:
+            result.append((codec, None))
+    return result
+
+
+def bundledFiles():
+    """
+    :return: the paths of the bundled and downloaded simulation files
+    :rtype: list
+    """
+    files = []
+    for directory in (os.path.join(synthetic.ROOT, "data"),
+                      os.path.join(synthetic.ROOT, "simulations"),
+                      settings.simulationsDir):
+        files.extend(glob.glob(os.path.join(directory, "**", "*.ts2"),
+                               recursive=True))
+    return sorted(set(files))
+
+
+def readMembers(fileName):
+    """
+    :return: the (name, data) of the members of the archive fileName
+    :rtype: list
+    """
+    with zipfile.ZipFile(fileName) as zipArchive:
+        return [(name, zipArchive.read(name))
+                for name in zipArchive.namelist()]
+
+
+def measure(members, codec, level, repeat):
+    """
+    :return: the size of the archive holding members compressed with codec
+             at level, and its best writing and reading times in seconds.
+    """
+    compression = settings.COMPRESSION_CODECS[codec]
+    writeTime = readTime = None
+    for i in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        with zipfile.ZipFile(buffer, "w") as zipArchive:
+            for name, data in members:
+                zipArchive.writestr(name, data, compress_type=compression,
+                                    compresslevel=level)
+        duration = time.perf_counter() - start
+        writeTime = duration if writeTime is None else min(writeTime,
+                                                           duration)
+        start = time.perf_counter()
+        with zipfile.ZipFile(buffer) as zipArchive:
+            for name in zipArchive.namelist():
+                zipArchive.read(name)
+        duration = time.perf_counter() - start
+        readTime = duration if readTime is None else min(readTime, duration)
+    return len(buffer.getvalue()), writeTime, readTime
+
+
+def report(title, members, repeat):
+    """Prints the results of each codec for members."""
+    rawSize = sum(len(data) for name, data in members)
+    print("%s (%.1f kB uncompressed)" % (title, rawSize / 1024))
+    print("  %-8s %6s %12s %8s %12s %12s" %
+          ("codec", "level", "size (kB)", "ratio", "write (ms)",
+           "read (ms)"))
+    for codec, level in codecs():
+        size, writeTime, readTime = measure(members, codec, level, repeat)
+        print("  %-8s %6s %12.1f %8.3f %12.1f %12.1f" %
+              (codec, "-" if level is None else level, size / 1024,
+               size / rawSize, writeTime * 1000, readTime * 1000))
+
+
+def Main():
+    parser = argparse.ArgumentParser("compression_benchmark")
+    parser.add_argument("--stations", type=int, default=0,
+                        help="Add a synthetic simulation of this size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("files", nargs="*", help="Simulation files")
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    for fileName in args.files or bundledFiles():
+        report(fileName, readMembers(fileName), args.repeat)
+    if args.stations:
+        layout = synthetic.SyntheticLayout(args.stations, args.stations // 10)
+        sim = synthetic.loadHeadless(layout)
+        document = snapshot.toPlain(sim)
+        members = [
+            ("simulation.json",
+             json.dumps(document, separators=(',', ':')).encode()),
+            (snapshot.FILE_NAME, snapshot.dumps(document))
+        ]
+        report("synthetic, %i stations" % args.stations, members,
+               args.repeat)
+    del app
+
+
+if __name__ == "__main__":
+    Main()
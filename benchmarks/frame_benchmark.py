@@ -0,0 +1,133 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the frames of the game at several time factors.
+
+A synthetic simulation is loaded with a scene (but without window) and
+run for a number of frames of the GUI timer:
+
+- in one physics step per frame, as before, the step growing with the
+  time factor,
+- in physics steps of at most ``Simulation.PHYSICS_STEP`` seconds, the
+  trains being drawn once per frame.
+
+The time per frame, the number of drawings of line items per frame and the
+deviation of the trains from a reference run with steps of 0.1 s are
+reported: the number of trains on another track item and the mean
+difference of their speeds.
+
+Usage::
+
+    python3 benchmarks/frame_benchmark.py [--stations N] [--trains N]
+                                          [--frames N]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtWidgets  # noqa: E402
+
+
+def load(text):
+    """Loads the simulation of the JSON text with a scene."""
+    from ts2 import headless, simulation
+    random.seed(1)
+    window = headless.HeadlessWindow(None)
+    sim = simulation.load(window, io.StringIO(text))
+    window.simulation = sim
+    sim.pause()
+    return sim
+
+
+def run(text, timeFactor, frames, maxStep):
+    """Runs frames frames of the simulation at timeFactor, with physics
+    steps of at most maxStep seconds (one step per frame if None).
+
+    :return: the time per frame, the drawings per frame and the trains
+    """
+    from ts2.scenery import lineitem
+    sim = load(text)
+    drawings = [0]
+    drawTrain = lineitem.LineItem.drawTrain
+
+    def countedDrawTrain(self):
+        drawings[0] += 1
+        drawTrain(self)
+
+    lineitem.LineItem.drawTrain = countedDrawTrain
+    secs = sim.FRAME_INTERVAL * timeFactor / 1000
+    start = time.perf_counter()
+    for i in range(frames):
+        sim.advance(secs, maxStep)
+    duration = time.perf_counter() - start
+    lineitem.LineItem.drawTrain = drawTrain
+    return duration / frames, drawings[0] / frames, sim.trains
+
+
+def deviation(trains, reference):
+    """
+    :return: the number of trains on another item than in reference and
+             the mean absolute difference of the speeds
+    """
+    elsewhere = sum(1 for train, ref in zip(trains, reference)
+                    if train.trainHead.trackItem != ref.trainHead.trackItem)
+    speed = sum(abs(train.speed - ref.speed)
+                for train, ref in zip(trains, reference)) / len(trains)
+    return elsewhere, speed
+
+
+def Main():
+    parser = argparse.ArgumentParser("frame_benchmark")
+    parser.add_argument("--stations", type=int, default=30)
+    parser.add_argument("--trains", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=120)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    from ts2 import simulation
+    text = synthetic.SyntheticLayout(args.stations, args.trains,
+                                     headway=120).dumps()
+    print("Stations: %i, trains: %i, frames: %i of %i ms" %
+          (args.stations, args.trains, args.frames,
+           simulation.Simulation.FRAME_INTERVAL))
+    print("%-6s %-10s %12s %16s %12s %14s" %
+          ("factor", "", "frame (ms)", "drawings/frame", "elsewhere",
+           "speed (m/s)"))
+    for timeFactor in (1, 5, 10):
+        reference = run(text, timeFactor, args.frames, 0.1)[2]
+        for name, maxStep in (("one step", None),
+                              ("sub-steps", simulation.Simulation.PHYSICS_STEP)):
+            frameTime, drawings, trains = run(text, timeFactor, args.frames,
+                                              maxStep)
+            elsewhere, speed = deviation(trains, reference)
+            print("%-6i %-10s %12.2f %16.1f %12i %14.3f" %
+                  (timeFactor, name, frameTime * 1000, drawings, elsewhere,
+                   speed))
+    del app
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,203 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Micro-benchmark of the Position arithmetic done by a train at each step.
+
+For each step, a train moves its head and needs its tail in drawTrain,
+executeActions and TrackItem.updateTrainHeadAndTail. The benchmark compares:
+
+- the former implementation, where Position has a __dict__, ``+=`` rebinds
+  to a new object and ``+``/``-`` allocate one Position per item crossed, and
+  the tail is computed again by each caller,
+- the current implementation, where the head is moved in place and the tail
+  is moved in place once per step.
+
+Usage::
+
+    python3 benchmarks/position_benchmark.py [--steps N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtWidgets  # noqa: E402
+from ts2.routing import position  # noqa: E402
+
+
+class DictPosition:
+    """Copy of the former Position implementation, for comparison."""
+
+    created = 0
+
+    def __init__(self, trackItem, previousTI, positionOnTI):
+        DictPosition.created += 1
+        self._trackItem = trackItem
+        self._previousTI = previousTI
+        self._positionOnTI = positionOnTI
+
+    def next(self):
+        return DictPosition(
+            self._trackItem.getFollowingItem(self._previousTI),
+            self._trackItem, 0
+        )
+
+    def previous(self):
+        return DictPosition(
+            self._previousTI,
+            self._previousTI.getFollowingItem(self._trackItem),
+            self._previousTI.realLength
+        )
+
+    def __add__(self, length):
+        if self._positionOnTI + length < self._trackItem.realLength:
+            return DictPosition(self._trackItem, self._previousTI,
+                                self._positionOnTI + length)
+        else:
+            return self.next() + (length + self._positionOnTI -
+                                  self._trackItem.realLength)
+
+    def __sub__(self, length):
+        if self._positionOnTI - length > 0:
+            return DictPosition(self._trackItem, self._previousTI,
+                                self._positionOnTI - length)
+        else:
+            return self.previous() - (length - self._positionOnTI)
+
+
+class CountedPosition(position.Position):
+    """Position counting its instances."""
+
+    __slots__ = ()
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        CountedPosition.created += 1
+        super().__init__(*args, **kwargs)
+
+    def copy(self):
+        return CountedPosition(self._trackItem, self._previousTI,
+                               self._positionOnTI)
+
+
+def runFormer(head, trainLength, stepLength, steps):
+    """Moves the head like the former Train.advance did: drawTrain,
+    executeActions and TrackItem.updateTrainHeadAndTail each compute the
+    tail again."""
+    for i in range(steps):
+        head = head + stepLength
+        for caller in range(3):
+            tail = head - trainLength
+        tail - stepLength
+        tail - stepLength
+        head - stepLength
+    return head
+
+
+def runCurrent(head, trainLength, stepLength, steps):
+    """Moves the head like Train.advance does now, the tail being shared by
+    the callers."""
+    tail = head - trainLength
+    for i in range(steps):
+        head.advance(stepLength)
+        tail.setTo(head)
+        tail.retreat(trainLength)
+        tail - stepLength
+        tail - stepLength
+        head - stepLength
+    return head
+
+
+def measure(function, head, trainLength, stepLength, steps):
+    """Runs function and returns its duration and peak memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(head, trainLength, stepLength, steps)
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak
+
+
+def instanceSize(cls, count=10000):
+    """
+    :return: the memory used by one instance of cls, in bytes
+    """
+    tracemalloc.start()
+    instances = [cls(None, None, 0.0) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return size / count
+
+
+def Main():
+    parser = argparse.ArgumentParser("position_benchmark")
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--stations", type=int, default=50)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    layout = synthetic.SyntheticLayout(args.stations, 0)
+    sim = synthetic.loadHeadless(layout)
+    entryLine, start = layout.entry
+    entryItem = sim.trackItem(entryLine)
+    startItem = sim.trackItem(start)
+    trainLength = 100.0
+    # A step of 0.5 s at 40 m/s, starting far enough to have a tail
+    stepLength = 20.0
+    steps = min(args.steps,
+                int(sum(ti.realLength for ti in sim.trackItems.values()) /
+                    (2 * stepLength)))
+
+    formerHead = DictPosition(entryItem, startItem, 150.0)
+    formerTime, formerPeak = measure(runFormer, formerHead, trainLength,
+                                     stepLength, steps)
+    DictPosition.created = 0
+    runFormer(formerHead, trainLength, stepLength, steps)
+    formerCreated = DictPosition.created
+
+    currentHead = CountedPosition(entryItem, startItem, 150.0)
+    currentTime, currentPeak = measure(runCurrent, currentHead, trainLength,
+                                       stepLength, steps)
+    currentHead = CountedPosition(entryItem, startItem, 150.0)
+    CountedPosition.created = 0
+    runCurrent(currentHead, trainLength, stepLength, steps)
+    currentCreated = CountedPosition.created
+
+    print("Steps: %i of %.1f m, train length %.1f m" %
+          (steps, stepLength, trainLength))
+    print("%-10s %12s %14s %12s %14s" %
+          ("", "time (ms)", "objects/step", "peak (kB)", "object (B)"))
+    print("%-10s %12.1f %14.2f %12.1f %14.1f" %
+          ("former", formerTime * 1000, formerCreated / steps,
+           formerPeak / 1024, instanceSize(DictPosition)))
+    print("%-10s %12.1f %14.2f %12.1f %14.1f" %
+          ("current", currentTime * 1000, currentCreated / steps,
+           currentPeak / 1024, instanceSize(position.Position)))
+    del app
+
+
+if __name__ == "__main__":
+    Main()
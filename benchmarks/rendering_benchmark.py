@@ -0,0 +1,137 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the rendering of the scene at several zoom levels.
+
+A synthetic simulation is loaded with a scene, run for a while so that its
+trains are spread over the line, and shown in a view of 1600x1000 pixels
+which is rendered at zoom levels from 100% to 10%:
+
+- as before, with all the details and without cache,
+- with the levels of detail of :mod:`ts2.scenery.helper` and the track
+  items cached in device coordinates.
+
+The time of the first rendering at each zoom level (filling the caches) and
+the mean time of the next renderings, each after a frame of the game, are
+reported, followed by the mean time to desactivate a route, or activate it
+again, and repaint the view.
+
+Usage::
+
+    python3 benchmarks/rendering_benchmark.py [--stations N] [--trains N]
+                                              [--frames N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtCore, QtGui, QtWidgets, Qt  # noqa: E402
+
+
+def render(sim, view, zoom, frames):
+    """Renders view at zoom, then after each of frames frames.
+
+    :return: the time of the first rendering and the mean time of the next
+             ones
+    """
+    view.setTransform(QtGui.QTransform.fromScale(zoom / 100, zoom / 100))
+    view.centerOn(sim.scene.itemsBoundingRect().center())
+    start = time.perf_counter()
+    view.grab()
+    first = time.perf_counter() - start
+    duration = 0
+    for i in range(frames):
+        sim.timerOut()
+        start = time.perf_counter()
+        view.grab()
+        duration += time.perf_counter() - start
+    return first, duration / frames
+
+
+def Main():
+    parser = argparse.ArgumentParser("rendering_benchmark")
+    parser.add_argument("--stations", type=int, default=200)
+    parser.add_argument("--trains", type=int, default=40)
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--routes", type=int, default=20)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    from ts2 import headless, simulation
+    from ts2.scenery import abstract, helper
+    layout = synthetic.SyntheticLayout(args.stations, args.trains, headway=60)
+    window = headless.HeadlessWindow(None)
+    sim = simulation.load(window, io.StringIO(layout.dumps()))
+    window.simulation = sim
+    sim.pause()
+    for i in range(300):
+        sim.timerOut()
+    view = QtWidgets.QGraphicsView(sim.scene)
+    view.setRenderHint(QtGui.QPainter.Antialiasing, False)
+    view.setPalette(QtGui.QPalette(Qt.black))
+    view.resize(1600, 1000)
+    view.show()
+    graphicsItems = [gi for gi in sim.scene.items()
+                     if isinstance(gi, helper.TrackGraphicsItem)]
+    levelOfDetail = helper.levelOfDetail
+    print("Stations: %i, trains: %i, track graphics items: %i" %
+          (args.stations, args.trains, len(graphicsItems)))
+    print("%-6s %-8s %12s %12s" % ("zoom", "", "first (ms)", "frame (ms)"))
+    for zoom in (100, 50, 30, 20, 10):
+        for name, detailed in (("former", True), ("current", False)):
+            if detailed:
+                helper.levelOfDetail = lambda painter: 1.0
+                cacheMode = QtWidgets.QGraphicsItem.NoCache
+            else:
+                helper.levelOfDetail = levelOfDetail
+                cacheMode = QtWidgets.QGraphicsItem.DeviceCoordinateCache
+            for gi in graphicsItems:
+                gi.setCacheMode(cacheMode)
+            first, frame = render(sim, view, zoom, args.frames)
+            print("%-6s %-8s %12.1f %12.1f" %
+                  ("%i%%" % zoom, name, first * 1000, frame * 1000))
+    helper.levelOfDetail = levelOfDetail
+
+    routes = [rte for rte in sim.routes.values()
+              if rte.beginSignal.nextActiveRoute is rte][:args.routes]
+    view.setTransform(QtGui.QTransform())
+    duration = 0
+    for rte in routes:
+        view.centerOn(rte.beginSignal.origin)
+        app.processEvents()
+        for action in (rte.desactivate, rte.activate):
+            start = time.perf_counter()
+            action()
+            # Repaints the invalidated parts of the view
+            app.processEvents()
+            duration += time.perf_counter() - start
+    if routes:
+        print("Route changes: %i, %.1f ms per change" %
+              (2 * len(routes), duration * 1000 / len(routes) / 2))
+    del view, app
+
+
+if __name__ == "__main__":
+    Main()
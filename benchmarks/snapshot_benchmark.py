@@ -0,0 +1,118 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of saving and loading .ts2 files with and without the binary
+snapshot.
+
+A synthetic simulation (10000 track items by default) is run for a
+while so that its trains are spread over the line, then saved:
+
+- with the ``simulation.json`` member only, as before,
+- with the binary snapshot alongside.
+
+Both files are then loaded. The reading time (creation of the objects from
+the file) and the total loading time (including the initialization of the
+simulation) are reported.
+
+Usage::
+
+    python3 benchmarks/snapshot_benchmark.py [--stations N] [--trains N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtWidgets  # noqa: E402
+from ts2 import headless, loader, snapshot  # noqa: E402
+
+
+def timed(function, *args, repeat=3):
+    """
+    :return: the result of function(*args) and its best duration over
+             repeat runs, in seconds.
+    """
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return result, best
+
+
+def readArchive(fileName):
+    """Creates the objects of the simulation stored in fileName."""
+    with zipfile.ZipFile(fileName) as zipArchive:
+        return loader.SimulationLoader().readArchive(zipArchive,
+                                                     headless.json_hook)
+
+
+def Main():
+    parser = argparse.ArgumentParser("snapshot_benchmark")
+    parser.add_argument("--stations", type=int, default=667)
+    parser.add_argument("--trains", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    layout = synthetic.SyntheticLayout(args.stations, args.trains,
+                                       headway=120)
+    sim = synthetic.loadHeadless(layout)
+    sim.run(sim.currentTime.addSecs(900))
+    print("Track items: %i, routes: %i, trains: %i" %
+          (len(sim.trackItems), len(sim.routes), len(sim.trains)))
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        results = []
+        for label, withSnapshot in (("json", False), ("json+snapshot", True)):
+            fileName = os.path.join(tmpDir, "%s.ts2" % label)
+            dummy, saveTime = timed(snapshot.writeArchive, fileName, sim,
+                                    withSnapshot, repeat=args.repeat)
+            dummy, readTime = timed(readArchive, fileName,
+                                    repeat=args.repeat)
+            dummy, loadTime = timed(headless.loadFile, fileName,
+                                    repeat=args.repeat)
+            results.append((label, saveTime, readTime, loadTime,
+                            os.path.getsize(fileName)))
+        document = snapshot.toPlain(sim)
+        dummy, encodeTime = timed(snapshot.dumps, document,
+                                  repeat=args.repeat)
+        data = snapshot.dumps(document)
+        dummy, decodeTime = timed(snapshot.loads, data, headless.json_hook,
+                                  repeat=args.repeat)
+
+    print("%-15s %10s %10s %10s %10s" %
+          ("", "save (s)", "read (s)", "load (s)", "size (kB)"))
+    for label, saveTime, readTime, loadTime, size in results:
+        print("%-15s %10.3f %10.3f %10.3f %10.1f" %
+              (label, saveTime, readTime, loadTime, size / 1024))
+    print("Snapshot alone: %.1f kB, encoded in %.3f s, decoded in %.3f s" %
+          (len(data) / 1024, encodeTime, decodeTime))
+    del app
+
+
+if __name__ == "__main__":
+    Main()
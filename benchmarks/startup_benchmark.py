@@ -0,0 +1,108 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the startup of TS2.
+
+The modules imported at startup are profiled in a fresh interpreter with
+``python -X importtime``. The total import time and the modules taking the
+most time (including their own imports) are reported, followed by the time
+to create the signal library on first use and to get it from the cache.
+
+Usage::
+
+    python3 benchmarks/startup_benchmark.py [--module ts2.application]
+                                            [--top N] [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+
+
+def importTimes(module):
+    """Imports module in a fresh interpreter with ``-X importtime``.
+
+    :return: the wall time of the import in seconds, and the (module, self
+             time, cumulative time) of the imported modules in microseconds.
+    :rtype: tuple
+    """
+    code = ("import time; start = time.perf_counter(); import %s; "
+            "print(time.perf_counter() - start)" % module)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=synthetic.ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True,
+        env=dict(os.environ, PYTHONPATH=synthetic.ROOT)
+    )
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        selfTime, cumulative, name = line[len("import time:"):].split("|")
+        if selfTime.strip().isdigit():
+            modules.append((name.strip(), int(selfTime), int(cumulative)))
+    return float(process.stdout.split()[-1]), modules
+
+
+def Main():
+    parser = argparse.ArgumentParser("startup_benchmark")
+    parser.add_argument("--module", default="ts2.application",
+                        help="Module imported at startup")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [importTimes(args.module) for i in range(args.repeat)]
+    wallTime, modules = min(results, key=lambda result: result[0])
+    print("Import of %s: %.1f ms (best of %i)" %
+          (args.module, wallTime * 1000, args.repeat))
+    print("  %-50s %12s %12s" % ("module", "self (ms)", "total (ms)"))
+    for name, selfTime, cumulative in sorted(modules, key=lambda m: -m[2])[
+            :args.top]:
+        print("  %-50s %12.1f %12.1f" %
+              (name, selfTime / 1000, cumulative / 1000))
+    ts2Modules = [m for m in modules if m[0].startswith("ts2")]
+    print("ts2 modules imported: %i, own time %.1f ms" %
+          (len(ts2Modules), sum(m[1] for m in ts2Modules) / 1000))
+
+    from Qt import QtWidgets
+    app = QtWidgets.QApplication(sys.argv)
+    os.chdir(synthetic.ROOT)
+    from ts2.scenery.signals import signalitem
+    start = time.perf_counter()
+    signalitem.getSignalLibrary()
+    firstTime = time.perf_counter() - start
+    start = time.perf_counter()
+    signalitem.getSignalLibrary()
+    cachedTime = time.perf_counter() - start
+    print("Signal library (%i tsl files): created in %.1f ms, from the "
+          "cache in %.2f ms" % (len(signalitem.SignalLibrary.tslFiles()),
+                                firstTime * 1000, cachedTime * 1000))
+    del app
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,274 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Generator of synthetic simulations for the benchmarks.
+
+The layout is a single line running from west to east through a number of
+stations. Each station has a main track and a loop, with points at both ends
+and a signal at the end of each track. Block sections with two signals
+separate the stations. Trains run from west to east, calling at every other
+station.
+
+This module can also be run as a script to write a simulation file::
+
+    python3 benchmarks/synthetic.py --stations 10 --trains 40 sim.json
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import simplejson as json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def hms(secs):
+    """
+    :return: secs after midnight formatted as hh:mm:ss
+    :rtype: str
+    """
+    return "%02i:%02i:%02i" % (secs // 3600 % 24, secs // 60 % 60, secs % 60)
+
+
+class SyntheticLayout:
+    """Builds the JSON data of a synthetic simulation."""
+
+    def __init__(self, stations=5, trains=4, headway=300, trainMaxSpeed=44.0):
+        """
+        :param int stations: number of stations of the line
+        :param int trains: number of trains
+        :param int headway: seconds between two trains
+        :param float trainMaxSpeed: maximum speed of the trains in m/s
+        """
+        self.trackItems = {}
+        self.routes = {}
+        self.places = []
+        self._nextId = 1
+        self._buildLine(stations)
+        self.services = {}
+        self.trains = []
+        self._buildTrains(trains, headway)
+        self.trainMaxSpeed = trainMaxSpeed
+
+    def _add(self, tiType, **params):
+        """Adds a track item of type tiType and returns its tiId."""
+        tiId = self._nextId
+        self._nextId += 1
+        item = {"__type__": tiType, "tiId": tiId, "name": str(tiId),
+                "maxSpeed": 0.0, "conflictTiId": None,
+                "previousTiId": None, "nextTiId": None}
+        item.update(params)
+        self.trackItems[tiId] = item
+        return tiId
+
+    def _line(self, x1, y1, x2, y2, length, placeCode=None, trackCode=""):
+        """Adds a LineItem and returns its tiId."""
+        return self._add("LineItem", x=x1, y=y1, xf=x2, yf=y2,
+                         realLength=length, placeCode=placeCode,
+                         trackCode=trackCode)
+
+    def _signal(self, x, y):
+        """Adds a SignalItem facing east and returns its tiId."""
+        return self._add("SignalItem", x=x, y=y, xn=x - 40, yn=y + 5,
+                         reverse=0, signalType="UK_3_ASPECTS",
+                         routesSetParams="{}", trainNotPresentParams="{}",
+                         trainPresentParams="{}")
+
+    def _link(self, first, second):
+        """Links the next end of first to the previous end of second."""
+        self.trackItems[first]["nextTiId"] = second
+        self.trackItems[second]["previousTiId"] = first
+
+    def _addRoute(self, beginSignal, endSignal, directions):
+        """Adds a route between the two signals."""
+        routeNum = len(self.routes) + 1
+        self.routes[routeNum] = {
+            "__type__": "Route", "routeNum": routeNum,
+            "beginSignal": beginSignal, "endSignal": endSignal,
+            "directions": directions,
+            "initialState": 0 if any(directions.values()) else 2
+        }
+
+    def _buildLine(self, stations):
+        """Builds the track items and the routes of the line."""
+        items = self.trackItems
+        x = 0.0
+        start = self._add("EndItem", x=x, y=0)
+        previous = start
+        exitSignals = []
+        for station in range(stations):
+            # Block section
+            blockLine = self._line(x, 0, x + 100, 0, 1000.0)
+            if previous == start:
+                items[start]["previousTiId"] = blockLine
+                items[blockLine]["previousTiId"] = start
+            else:
+                self._link(previous, blockLine)
+            blockSignal = self._signal(x + 100, 0)
+            self._link(blockLine, blockSignal)
+            approachLine = self._line(x + 110, 0, x + 200, 0, 1000.0)
+            self._link(blockSignal, approachLine)
+            homeSignal = self._signal(x + 200, 0)
+            self._link(approachLine, homeSignal)
+            for exitSignal, exitPoints, direction in exitSignals:
+                self._addRoute(exitSignal, blockSignal,
+                               {exitPoints: direction})
+            self._addRoute(blockSignal, homeSignal, {})
+            x += 210
+            # Station
+            placeCode = "S%i" % station
+            self._add("Place", x=x + 40, y=-40, placeCode=placeCode)
+            self.places.append(placeCode)
+            entryPoints = self._add("PointsItem", x=x + 5, y=0, xf=-5, yf=0,
+                                    xn=5, yn=0, xr=5, yr=-5, reverseTiId=None)
+            self._link(homeSignal, entryPoints)
+            mainLine = self._line(x + 10, 0, x + 100, 0, 300.0, placeCode, "1")
+            self._link(entryPoints, mainLine)
+            mainSignal = self._signal(x + 100, 0)
+            self._link(mainLine, mainSignal)
+            mainExit = self._line(x + 110, 0, x + 120, 0, 50.0)
+            items[mainExit]["maxSpeed"] = 15.0
+            self._link(mainSignal, mainExit)
+            loopEntry = self._line(x + 10, -5, x + 20, -20, 50.0)
+            items[loopEntry]["maxSpeed"] = 8.0
+            items[entryPoints]["reverseTiId"] = loopEntry
+            items[loopEntry]["previousTiId"] = entryPoints
+            loopLine = self._line(x + 20, -20, x + 100, -20, 300.0,
+                                  placeCode, "2")
+            self._link(loopEntry, loopLine)
+            loopSignal = self._signal(x + 100, -20)
+            self._link(loopLine, loopSignal)
+            loopExit = self._line(x + 110, -20, x + 120, -5, 50.0)
+            self._link(loopSignal, loopExit)
+            exitPoints = self._add("PointsItem", x=x + 125, y=0, xf=5, yf=0,
+                                   xn=-5, yn=0, xr=-5, yr=-5,
+                                   reverseTiId=loopExit)
+            items[exitPoints]["nextTiId"] = mainExit
+            items[mainExit]["nextTiId"] = exitPoints
+            items[loopExit]["nextTiId"] = exitPoints
+            self._addRoute(homeSignal, mainSignal, {entryPoints: 0})
+            self._addRoute(homeSignal, loopSignal, {entryPoints: 1})
+            exitSignals = [(mainSignal, exitPoints, 0),
+                           (loopSignal, exitPoints, 1)]
+            x += 130
+            exitLine = self._line(x, 0, x + 100, 0, 500.0)
+            items[exitPoints]["previousTiId"] = exitLine
+            items[exitLine]["previousTiId"] = exitPoints
+            previous = exitLine
+            x += 100
+        end = self._add("EndItem", x=x, y=0)
+        self._link(previous, end)
+        self.entry = (items[start]["previousTiId"], start)
+
+    def _buildTrains(self, trains, headway):
+        """Builds one service and one train per train."""
+        entryLine, entryItem = self.entry
+        for number in range(trains):
+            serviceCode = "T%03i" % number
+            base = 6 * 3600 + number * headway
+            lines = []
+            for index, placeCode in enumerate(self.places):
+                arrival = base + 120 + index * 240
+                lines.append({
+                    "__type__": "ServiceLine", "placeCode": placeCode,
+                    "scheduledArrivalTime": hms(arrival),
+                    "scheduledDepartureTime": hms(arrival + 30),
+                    "trackCode": "1" if number % 2 == 0 else "2",
+                    "mustStop": index % 2 == 0
+                })
+            self.services[serviceCode] = {
+                "__type__": "Service", "serviceCode": serviceCode,
+                "description": "Service %s" % serviceCode,
+                "nextServiceCode": "", "autoReverse": 0,
+                "plannedTrainType": "UNIT", "lines": lines
+            }
+            self.trains.append({
+                "__type__": "Train", "serviceCode": serviceCode,
+                "trainTypeCode": "UNIT", "status": 0,
+                "speed": 20.0, "initialSpeed": 20.0,
+                "trainHead": {"__type__": "Position", "trackItem": entryLine,
+                              "previousTI": entryItem, "positionOnTI": 200.0},
+                "appearTime": hms(base - base % 60),
+                "initialDelay": 0, "nextPlaceIndex": None, "stoppedTime": 0
+            })
+
+    def for_json(self):
+        """Dumps the layout as a simulation to JSON."""
+        return {
+            "__type__": "Simulation",
+            "options": {"title": "Synthetic line (%i stations)" %
+                                 len(self.places),
+                        "description": "Synthetic layout for benchmarks",
+                        "currentTime": "06:00:00", "timeFactor": 5,
+                        "defaultMinimumStopTime": 30,
+                        "defaultDelayAtEntry": 0},
+            "trackItems": {str(k): v for k, v in self.trackItems.items()},
+            "routes": {str(k): v for k, v in self.routes.items()},
+            "trainTypes": {"UNIT": {
+                "__type__": "TrainType", "code": "UNIT",
+                "description": "Unit", "maxSpeed": self.trainMaxSpeed,
+                "stdAccel": 0.5, "stdBraking": 0.5, "emergBraking": 1.5,
+                "length": 100.0, "elements": []
+            }},
+            "services": self.services,
+            "trains": self.trains,
+            "messageLogger": {"__type__": "MessageLogger", "messages": []},
+        }
+
+    def dumps(self):
+        """
+        :return: the simulation as a JSON string
+        :rtype: str
+        """
+        return json.dumps(self, for_json=True)
+
+
+def loadHeadless(layout):
+    """Loads layout as a :class:`~ts2.headless.HeadlessSimulation`. A
+    QApplication must exist.
+
+    :param layout: a :class:`SyntheticLayout`
+    """
+    from ts2 import headless
+    return headless.load(io.StringIO(layout.dumps()))
+
+
+def Main():
+    parser = argparse.ArgumentParser("synthetic")
+    parser.add_argument("--stations", type=int, default=5)
+    parser.add_argument("--trains", type=int, default=4)
+    parser.add_argument("--headway", type=int, default=300,
+                        help="Seconds between two trains")
+    parser.add_argument("--max-speed", dest="maxSpeed", type=float,
+                        default=44.0, help="Maximum train speed in m/s")
+    parser.add_argument("file", help="JSON file to write")
+    args = parser.parse_args()
+    layout = SyntheticLayout(args.stations, args.trains, args.headway,
+                             args.maxSpeed)
+    with open(args.file, "w") as file:
+        file.write(layout.dumps())
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,108 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the creation of the track items of a synthetic layout.
+
+The track items are created from the JSON document, as when a simulation is
+loaded, and the time and memory taken are reported. For comparison, the
+property lists of the editor are then created for each item, as they were
+before being shared by all the items of the same class.
+
+Usage::
+
+    python3 benchmarks/trackitem_benchmark.py [--stations N]
+"""
+
+import argparse
+import collections
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+import simplejson as json  # noqa: E402
+from Qt import QtWidgets  # noqa: E402
+
+
+def measure(function, *args):
+    """Runs function twice: once to time it, once to trace the memory it
+    allocates, which slows it down.
+
+    :return: the result of function, its duration and the memory allocated
+    """
+    start = time.perf_counter()
+    function(*args)
+    duration = time.perf_counter() - start
+    tracemalloc.start()
+    result = function(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, duration, size
+
+
+def createItems(text):
+    """Creates the simulation of the JSON text, without initializing it."""
+    from ts2 import headless
+    return json.loads(text, object_hook=headless.json_hook)
+
+
+def createPropertyLists(trackItems):
+    """Creates the property lists of each item, as each item did when it
+    was created."""
+    return [(ti.getProperties(), ti.getMultiProperties())
+            for ti in trackItems]
+
+
+def Main():
+    parser = argparse.ArgumentParser("trackitem_benchmark")
+    parser.add_argument("--stations", type=int, default=667)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    os.chdir(synthetic.ROOT)
+    from ts2.scenery.signals import signalitem
+    signalitem.getSignalLibrary()
+    text = synthetic.SyntheticLayout(args.stations, 0).dumps()
+    # Parsing only, to be subtracted
+    document, parseTime, parseSize = measure(json.loads, text)
+    del document
+
+    sim, duration, size = measure(createItems, text)
+    trackItems = list(sim.trackItems.values())
+    count = len(trackItems)
+    print("Track items: %i (%s)" % (count, ", ".join(
+        "%i %s" % (number, name) for name, number in collections.Counter(
+            type(ti).__name__ for ti in trackItems).most_common())))
+    print("JSON parsing only:  %8.1f ms %10.1f kB" %
+          (parseTime * 1000, parseSize / 1024))
+    print("Creation:           %8.1f ms %10.1f kB  (%.1f B/item)" %
+          (duration * 1000, size / 1024, (size - parseSize) / count))
+    lists, listTime, listSize = measure(createPropertyLists, trackItems)
+    print("Per item properties:%8.1f ms %10.1f kB  (%.1f B/item, former)" %
+          (listTime * 1000, listSize / 1024, listSize / count))
+    shared = {id(ti.properties) for ti in trackItems}
+    print("Shared property lists: %i" % len(shared))
+    del lists, sim, app
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,170 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the drawing of the trains on the line items.
+
+A synthetic simulation is loaded with a scene (but without window) and run
+for a number of steps of the GUI timer:
+
+- with the former drawing, where each update of a line item by a train
+  draws its trains at once with a new pen, and where the line items of the
+  trains leaving a line are hidden but left on the scene,
+- with the current drawing, where the line items are drawn once per step
+  by the :class:`~ts2.scenery.traingraphics.TrainGraphicsQueue`, only if
+  their trains have moved, with line items from a shared pool.
+
+The time per step, the number of train drawings and the number of items
+left on the scene are reported.
+
+Usage::
+
+    python3 benchmarks/traindrawing_benchmark.py [--stations N] [--trains N]
+                                                  [--steps N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtCore, QtGui, QtWidgets, Qt  # noqa: E402
+
+
+def formerDrawTrain(self):
+    """Copy of the former LineItem.drawTrain, for comparison."""
+    tlines = []
+    if self.trainPresent():
+        for i in range(len(self._trainHeads)):
+            tlines.append(QtCore.QLineF(
+                self.sceneLine.pointAt(self._trainHeads[i] /
+                                       self._realLength),
+                self.sceneLine.pointAt(self._trainTails[i] /
+                                       self._realLength)
+            ))
+            if tlines[i].length() < 5.0 and self._trainTails[i] != 0:
+                tlines[i].setLength(
+                    min(5.0, (1 - self._trainTails[i] / self._realLength) *
+                        self.sceneLine.length()))
+    if tlines:
+        p = QtGui.QPen()
+        p.setWidth(3)
+        p.setJoinStyle(Qt.RoundJoin)
+        p.setCapStyle(Qt.RoundCap)
+        p.setColor(Qt.red)
+        for i in range(len(tlines)):
+            try:
+                self._tli[i].setLine(tlines[i])
+            except IndexError:
+                newTli = QtWidgets.QGraphicsLineItem()
+                newTli.setCursor(Qt.ArrowCursor)
+                newTli.setPen(p)
+                newTli.setZValue(10)
+                newTli.setLine(tlines[i])
+                self.simulation.registerGraphicsItem(newTli)
+                self._tli.append(newTli)
+                newTli.show()
+            self._tli[i].update()
+    for i in range(len(tlines), len(self._tli)):
+        self._tli[i].hide()
+        self._tli[i].update()
+        del self._tli[i]
+
+
+def formerUpdateTrain(self):
+    """Copy of the former LineItem.updateTrain, for comparison."""
+    self.drawTrain()
+    self.graphicsItem.update()
+
+
+def run(layout, steps, former):
+    """Loads layout with a scene and runs it for steps steps.
+
+    :return: the time per step, the number of drawings per step and the
+             number of items on the scene.
+    """
+    from ts2 import headless, simulation
+    from ts2.scenery import lineitem
+    drawings = [0]
+    drawTrain = formerDrawTrain if former else lineitem.LineItem.drawTrain
+
+    def countedDrawTrain(self):
+        drawings[0] += 1
+        drawTrain(self)
+
+    lineitem.LineItem.drawTrain = countedDrawTrain
+    if former:
+        lineitem.LineItem.updateTrain = formerUpdateTrain
+    window = headless.HeadlessWindow(None)
+    sim = simulation.load(window, io.StringIO(layout.dumps()))
+    window.simulation = sim
+    step = sim._timer.interval() * float(sim.option("timeFactor")) / 1000
+    # Spread the trains over the line first
+    for i in range(steps):
+        sim.advance(step)
+    drawings[0] = 0
+    start = time.perf_counter()
+    for i in range(steps):
+        sim.advance(step)
+    duration = time.perf_counter() - start
+    return duration / steps, drawings[0] / steps, len(sim.scene.items())
+
+
+def Main():
+    parser = argparse.ArgumentParser("traindrawing_benchmark")
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--trains", type=int, default=40)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--former", action="store_true", default=False,
+                        help="Run the former drawing only (internal)")
+    args = parser.parse_args()
+    layout = synthetic.SyntheticLayout(args.stations, args.trains,
+                                       headway=60)
+    if args.former:
+        app = QtWidgets.QApplication(sys.argv)
+        print(*run(layout, args.steps, True))
+        del app
+        return
+    # The former drawing patches the classes: it is run in a subprocess
+    import subprocess
+    output = subprocess.run(
+        [sys.executable, __file__, "--former", "--stations",
+         str(args.stations), "--trains", str(args.trains), "--steps",
+         str(args.steps)],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True
+    ).stdout.split()
+    former = [float(value) for value in output[-3:]]
+    app = QtWidgets.QApplication(sys.argv)
+    current = run(layout, args.steps, False)
+    print("Stations: %i, trains: %i, steps: %i" %
+          (args.stations, args.trains, args.steps))
+    print("%-10s %14s %16s %14s" %
+          ("", "step (ms)", "drawings/step", "scene items"))
+    for name, result in (("former", former), ("current", current)):
+        print("%-10s %14.2f %16.1f %14i" %
+              (name, result[0] * 1000, result[1], result[2]))
+    del app
+
+
+if __name__ == "__main__":
+    Main()
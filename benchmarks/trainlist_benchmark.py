@@ -0,0 +1,119 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Benchmark of the train list of the game.
+
+A synthetic simulation is loaded with a scene and its trains are shown in a
+:class:`~ts2.gui.trainlistview.TrainListView` of 1600x1000 pixels, sorted
+by status. At each frame of the game, the time to repaint the list and to
+sort it by another column is measured:
+
+- as before, the values being computed from the trains at each call of
+  ``TrainListModel.data()``,
+- with the values cached by the model, updated when the status of a train
+  changes.
+
+The number of ``dataChanged`` signals emitted by the model per frame is
+also reported.
+
+Usage::
+
+    python3 benchmarks/trainlist_benchmark.py [--stations N] [--trains N]
+                                              [--frames N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import synthetic  # noqa: E402 (sets sys.path)
+from Qt import QtWidgets, Qt  # noqa: E402
+
+
+def measure(view, column):
+    """Repaints view and sorts it by column.
+
+    :return: the time of the repaint and of the sort in seconds
+    """
+    start = time.perf_counter()
+    view.grab()
+    paint = time.perf_counter() - start
+    start = time.perf_counter()
+    view.sortByColumn(column, Qt.AscendingOrder)
+    sort = time.perf_counter() - start
+    return paint, sort
+
+
+def Main():
+    parser = argparse.ArgumentParser("trainlist_benchmark")
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--trains", type=int, default=400)
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication(sys.argv)
+    from ts2 import headless, simulation
+    from ts2.gui import trainlistview
+    layout = synthetic.SyntheticLayout(args.stations, args.trains, headway=30)
+    window = headless.HeadlessWindow(None)
+    sim = simulation.load(window, io.StringIO(layout.dumps()))
+    window.simulation = sim
+    sim.pause()
+    view = trainlistview.TrainListView(None)
+    view.setupTrainList(sim)
+    view.resize(1600, 1000)
+    view.show()
+    model = sim.trainListModel
+    changes = [0]
+    model.dataChanged.connect(lambda *args: changes.__setitem__(
+        0, changes[0] + 1
+    ))
+    cachedValues = model.rowValues
+
+    def formerValues(row):
+        return model.trainValues(sim.trains[row])
+
+    results = {"former": [0, 0], "current": [0, 0]}
+    for frame in range(args.frames):
+        sim.timerOut()
+        app.processEvents()
+        for name in ("former", "current"):
+            model.rowValues = formerValues if name == "former" \
+                else cachedValues
+            view.sortByColumn(1, Qt.AscendingOrder)
+            paint, sort = measure(view, 4 + frame % 4)
+            results[name][0] += paint
+            results[name][1] += sort
+    print("Stations: %i, trains: %i, time: %s" %
+          (args.stations, args.trains, sim.currentTime.toString()))
+    print("dataChanged per frame: %.1f" % (changes[0] / args.frames))
+    print("%-8s %12s %12s" % ("", "paint (ms)", "sort (ms)"))
+    for name in ("former", "current"):
+        paint, sort = results[name]
+        print("%-8s %12.2f %12.2f" % (name, paint * 1000 / args.frames,
+                                      sort * 1000 / args.frames))
+    del view, app
+
+
+if __name__ == "__main__":
+    Main()
@@ -37,6 +37,11 @@ setup(
     install_requires=[
         "simplejson >= 3.2"
     ],
+    entry_points={
+        "console_scripts": [
+            "ts2-validate = ts2.validate:Main"
+        ]
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: End Users/Desktop",
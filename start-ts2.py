@@ -34,6 +34,15 @@ if __name__ == '__main__':
                         default=False)
     parser.add_argument("-e", "--edit", dest="edit", help="Open sim in editor",
                         action="store_true", default=False)
+    parser.add_argument("--headless", dest="headless",
+                        help="Run the simulation without GUI as fast as "
+                             "possible and print the score and messages",
+                        action="store_true", default=False)
+    parser.add_argument("--until", dest="until", type=str, default="23:59",
+                        help="Simulation time (HH:MM) at which to stop in "
+                             "headless mode")
+    parser.add_argument("--step", dest="step", type=float, default=None,
+                        help="Simulated seconds per step in headless mode")
     parser.add_argument("file", help=".ts2 file to open/edit", type=str,
                         nargs='?')
     args = parser.parse_args()
@@ -41,5 +50,11 @@ if __name__ == '__main__':
     if args.edit and args.file is None:
         sys.exit("ERROR: Need a file with -e option")
 
+    if args.headless:
+        if args.file is None:
+            sys.exit("ERROR: Need a file with --headless option")
+        import ts2.headless
+        sys.exit(ts2.headless.Main(args=args))
+
     import ts2.application
     ts2.application.Main(args=args)
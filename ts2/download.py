@@ -0,0 +1,383 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Download of simulation packs.
+
+A simulation pack is a zip archive, typically the archive of a GitHub
+repository, holding simulations (``.ts2`` or ``.json`` files) and signal
+libraries (``.tsl`` files).
+"""
+
+import hashlib
+import http.client
+import io
+import os
+import struct
+import zipfile
+import zlib
+from urllib import error, request
+
+import simplejson as json
+from Qt import QtCore
+
+from ts2 import loader, snapshot, utils
+
+CHUNK_SIZE = 1 << 16
+
+LOCAL_HEADER = b"PK\x03\x04"
+CENTRAL_HEADER = b"PK\x01\x02"
+END_OF_CENTRAL_DIRECTORY = b"PK\x05\x06"
+DATA_DESCRIPTOR = b"PK\x07\x08"
+LOCAL_HEADER_STRUCT = struct.Struct("<4s5H3L2H")
+FLAG_DATA_DESCRIPTOR = 0x08
+# Errors raised by a damaged archive (bad CRC, corrupt or truncated data,
+# unsupported compression method)
+EXTRACTION_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError,
+                     NotImplementedError)
+
+
+class ZipStreamExtractor:
+    """A ``ZipStreamExtractor`` extracts the members of a zip archive while
+    the archive is being received, by reading the local header of each
+    member.
+
+    Members that cannot be read this way (encrypted or zip64 members, unknown
+    compression methods, stored members of unknown size) stop the
+    extraction: ``complete`` remains False and the remaining members must be
+    read from the whole archive once received.
+    """
+
+    def __init__(self):
+        """Constructor for the ZipStreamExtractor class."""
+        self._buffer = bytearray()
+        self._member = None
+        self.complete = False
+        self.failed = False
+
+    def feed(self, data):
+        """Adds data received from the archive.
+
+        :param bytes data: the next bytes of the archive
+        :return: the (name, content) of the members completed by data
+        :rtype: list
+        """
+        if self.complete or self.failed:
+            return []
+        self._buffer += data
+        members = []
+        while True:
+            if self._member is None and not self._readHeader():
+                return members
+            member = self._readMember()
+            if member is None:
+                return members
+            if not member[0].endswith("/"):
+                members.append(member)
+
+    def _readHeader(self):
+        """Reads the local header of the next member, if received.
+
+        :return: True if a member is started
+        :rtype: bool
+        """
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature in (CENTRAL_HEADER, END_OF_CENTRAL_DIRECTORY):
+            self.complete = True
+            return False
+        if signature != LOCAL_HEADER:
+            self.failed = True
+            return False
+        if len(self._buffer) < LOCAL_HEADER_STRUCT.size:
+            return False
+        (signature, version, flags, method, time, date, crc, compressedSize,
+         size, nameLength, extraLength) = \
+            LOCAL_HEADER_STRUCT.unpack_from(self._buffer)
+        headerSize = LOCAL_HEADER_STRUCT.size + nameLength + extraLength
+        if len(self._buffer) < headerSize:
+            return False
+        streamed = bool(flags & FLAG_DATA_DESCRIPTOR)
+        if flags & 0x01 or method not in (zipfile.ZIP_STORED,
+                                          zipfile.ZIP_DEFLATED) or \
+                0xFFFFFFFF in (compressedSize, size) or \
+                (streamed and method == zipfile.ZIP_STORED):
+            self.failed = True
+            return False
+        nameData = bytes(self._buffer[LOCAL_HEADER_STRUCT.size:
+                                      LOCAL_HEADER_STRUCT.size + nameLength])
+        name = nameData.decode("utf-8" if flags & 0x800 else "cp437")
+        del self._buffer[:headerSize]
+        self._member = {
+            "name": name,
+            "method": method,
+            "streamed": streamed,
+            "crc": crc,
+            "compressedSize": compressedSize,
+            "decompressor": zlib.decompressobj(-15),
+            "content": []
+        }
+        return True
+
+    def _readMember(self):
+        """Reads the data of the current member.
+
+        :return: the (name, content) of the member, or None if it is not
+                 completely received.
+        :rtype: tuple
+        """
+        member = self._member
+        if member["streamed"]:
+            # The size is unknown: the data is read until the end of the
+            # deflate stream, followed by the data descriptor.
+            decompressor = member["decompressor"]
+            if not decompressor.eof:
+                member["content"].append(
+                    decompressor.decompress(bytes(self._buffer))
+                )
+                self._buffer = bytearray(decompressor.unused_data)
+                if not decompressor.eof:
+                    return None
+            hasSignature = self._buffer[:4] == DATA_DESCRIPTOR
+            descriptorSize = 16 if hasSignature else 12
+            if len(self._buffer) < descriptorSize:
+                return None
+            member["crc"] = struct.unpack_from(
+                "<L", self._buffer, 4 if hasSignature else 0
+            )[0]
+            del self._buffer[:descriptorSize]
+        else:
+            size = member["compressedSize"]
+            if len(self._buffer) < size:
+                return None
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            if member["method"] == zipfile.ZIP_DEFLATED:
+                data = member["decompressor"].decompress(data)
+            member["content"].append(data)
+        self._member = None
+        content = b"".join(member["content"])
+        if zlib.crc32(content) != member["crc"]:
+            raise zipfile.BadZipFile("Bad CRC for %s" % member["name"])
+        return member["name"], content
+
+
+class SimulationsDownloader(QtCore.QThread):
+    """Thread downloading a simulation pack and installing its files.
+
+    The archive is streamed to a partial file in the download directory, and
+    its members are installed as they are received. A cancelled or failed
+    download is resumed by the next download of the same URL, if the server
+    supports range requests and the archive has not changed. Files which
+    are already installed and up to date are not written again.
+
+    Any URL supported by ``urllib`` can be used, including ``file://`` URLs.
+    """
+
+    def __init__(self, url, simulationsDir, userDataDir, downloadDir,
+                 compression=zipfile.ZIP_BZIP2, compressLevel=None,
+                 parent=None):
+        """
+        :param str url: the URL of the simulation pack
+        :param str simulationsDir: where to install simulations
+        :param str userDataDir: where to install signal libraries
+        :param str downloadDir: where to keep the partial downloads and the
+                                hashes of the installed files
+        :param int compression: the compression of the .ts2 files created
+                                from the .json files of the pack
+        :param int compressLevel: the compression level
+        """
+        super().__init__(parent)
+        self.url = url
+        self.simulationsDir = simulationsDir
+        self.userDataDir = userDataDir
+        self.downloadDir = downloadDir
+        self.compression = compression
+        self.compressLevel = compressLevel
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        self.partFileName = os.path.join(downloadDir, key + ".part")
+        self.stateFileName = os.path.join(downloadDir, key + ".json")
+        self.hashesFileName = os.path.join(downloadDir, "installed.json")
+        self._installed = set()
+        self._hashes = {}
+
+    progressChanged = QtCore.pyqtSignal(int, int)
+    fileInstalled = QtCore.pyqtSignal(str)
+    fileSkipped = QtCore.pyqtSignal(str)
+    downloadFinished = QtCore.pyqtSignal(bool, str)
+
+    def run(self):
+        """Downloads and installs the pack, then emits ``downloadFinished``
+        with True on success, or False and the reason otherwise."""
+        os.makedirs(self.downloadDir, exist_ok=True)
+        self._hashes = self._readJson(self.hashesFileName)
+        try:
+            completed = self._download()
+        except EXTRACTION_ERRORS as err:
+            # The partial file is damaged: resuming the download would replay
+            # it and fail again.
+            self._removeDownload()
+            self._writeJson(self.hashesFileName, self._hashes)
+            self.downloadFinished.emit(False, str(err))
+            return
+        except (error.URLError, http.client.HTTPException, OSError,
+                ValueError) as err:
+            # The partial file is kept to resume the download
+            self._writeJson(self.hashesFileName, self._hashes)
+            self.downloadFinished.emit(False, str(err))
+            return
+        self._writeJson(self.hashesFileName, self._hashes)
+        if completed:
+            self._removeDownload()
+            self.downloadFinished.emit(True, "")
+        else:
+            self.downloadFinished.emit(False, self.tr("Download cancelled"))
+
+    def _download(self):
+        """Streams the archive to the partial file.
+
+        :return: False if the download has been interrupted
+        :rtype: bool
+        """
+        extractor = ZipStreamExtractor()
+        state = self._readJson(self.stateFileName)
+        offset = 0
+        if state.get("url") == self.url and state.get("validator") and \
+                os.path.exists(self.partFileName):
+            offset = os.path.getsize(self.partFileName)
+        req = request.Request(self.url)
+        if offset:
+            req.add_header("Range", "bytes=%i-" % offset)
+            req.add_header("If-Range", state["validator"])
+        with request.urlopen(req, timeout=30) as response:
+            if offset and getattr(response, "status", None) == 206:
+                # Resuming: the members already received are installed again
+                # if they are not up to date.
+                with open(self.partFileName, "rb") as partFile:
+                    for data in iter(lambda: partFile.read(CHUNK_SIZE), b""):
+                        self._installMembers(extractor.feed(data))
+                mode = "ab"
+            else:
+                offset = 0
+                mode = "wb"
+            length = response.headers.get("Content-Length")
+            total = offset + int(length) if length else 0
+            validator = response.headers.get("ETag") or \
+                response.headers.get("Last-Modified")
+            self._writeJson(self.stateFileName,
+                            {"url": self.url, "validator": validator})
+            received = offset
+            self.progressChanged.emit(received, total)
+            with open(self.partFileName, mode) as partFile:
+                while True:
+                    if self.isInterruptionRequested():
+                        return False
+                    data = response.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    partFile.write(data)
+                    received += len(data)
+                    self._installMembers(extractor.feed(data))
+                    self.progressChanged.emit(received, total)
+        if received < total:
+            # The connection has been closed early: the partial file is kept
+            # to resume the download.
+            raise OSError(self.tr("Connection closed after %i of %i bytes")
+                          % (received, total))
+        if not extractor.complete:
+            with zipfile.ZipFile(self.partFileName) as zipArchive:
+                for name in zipArchive.namelist():
+                    if name not in self._installed and \
+                            not name.endswith("/"):
+                        self._installMember(name, zipArchive.read(name))
+        return True
+
+    def _installMembers(self, members):
+        """Installs each (name, content) of members."""
+        for name, content in members:
+            self._installMember(name, content)
+
+    def _installMember(self, name, content):
+        """Installs the member name of the archive, unless the installed file
+        is up to date."""
+        self._installed.add(name)
+        parts = name.split('/', 1)
+        fileName = parts[1] if len(parts) > 1 else parts[0]
+        if name.endswith(".ts2"):
+            target = os.path.join(self.simulationsDir, fileName)
+        elif name.endswith(".tsl"):
+            target = os.path.join(self.userDataDir, os.path.basename(name))
+        elif name.endswith(".json"):
+            target = os.path.join(self.simulationsDir,
+                                  fileName[:-len(".json")] + ".ts2")
+        else:
+            return
+        digest = hashlib.sha256(content).hexdigest()
+        if os.path.exists(target) and self._hashes.get(target) == digest:
+            self.fileSkipped.emit(target)
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmpFileName = target + ".tmp"
+        if name.endswith(".json"):
+            self._writeSimulation(tmpFileName, content)
+        else:
+            with open(tmpFileName, "wb") as file:
+                file.write(content)
+        os.replace(tmpFileName, target)
+        self._hashes[target] = digest
+        self.fileInstalled.emit(target)
+
+    def _writeSimulation(self, fileName, content):
+        """Writes the JSON simulation content to the .ts2 file fileName."""
+        try:
+            options = loader.readOptions(io.BytesIO(content))
+        except utils.FormatException:
+            options = {}
+        with zipfile.ZipFile(fileName, "w") as ts2Zip:
+            snapshot.writeMetaData(ts2Zip, options)
+            ts2Zip.writestr("simulation.json", content,
+                            compress_type=self.compression,
+                            compresslevel=self.compressLevel)
+
+    def _removeDownload(self):
+        """Removes the partial file and its state."""
+        for fileName in (self.partFileName, self.stateFileName):
+            try:
+                os.remove(fileName)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _readJson(fileName):
+        """
+        :return: the dict stored in the JSON file fileName, or an empty dict
+        """
+        try:
+            with open(fileName, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def _writeJson(fileName, data):
+        """Writes data to the JSON file fileName."""
+        with open(fileName, "w", encoding="utf-8") as file:
+            json.dump(data, file)
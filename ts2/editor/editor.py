@@ -19,13 +19,12 @@
 #
 
 import copy
-import zipfile
 
 import simplejson as json
 from Qt import QtCore, QtWidgets, Qt
 
 from ts2 import __FILE_FORMAT__
-from ts2 import simulation
+from ts2 import loader, simulation, snapshot
 from ts2 import utils, trains
 from ts2.routing import position, route
 from ts2.scenery import abstract, placeitem, lineitem, platformitem, \
@@ -53,19 +52,21 @@ def load(editorWindow, jsonStream):
     """Loads the simulation from jsonStream and returns it as an Editor.
 
     The logic of loading is the following:
-    1. We create the graph of objects from json.load(). When initialized,
-    each object stores its JSON data.
+    1. We create the graph of objects from the JSON stream with a
+    SimulationLoader. When initialized, each object stores its JSON data.
     2. When all the objects are created, we call the initialize() method of the
     simulation which calls in turn the initialize() method of each object.
     This method will create all the missing links between the object and the
     simulation (and other objects)."""
-    editor = json.load(jsonStream, object_hook=json_hook, encoding='utf-8')
-    if not isinstance(editor, Editor):
-        raise utils.FormatException(
-            translate("simulation.load", "Loaded file is not a TS2 simulation")
-        )
-    editor.initialize(editorWindow)
-    return editor
+    simLoader = loader.SimulationLoader()
+    return simLoader.load(jsonStream, json_hook, Editor, editorWindow)
+
+
+def loadArchive(editorWindow, zipArchive):
+    """Loads the simulation from a .ts2 archive and returns it as an Editor,
+    from the binary snapshot of the archive if there is one."""
+    simLoader = loader.SimulationLoader()
+    return simLoader.loadArchive(zipArchive, json_hook, Editor, editorWindow)
 
 
 class WhiteLineItem(QtWidgets.QGraphicsLineItem):
@@ -259,6 +260,7 @@ class Editor(simulation.Simulation):
         if self.validateScenery():
             for rte in self.routes.values():
                 rte.initialize(self)
+            self.updateRouteIndex()
             try:
                 self._nextRouteId = max(self._routes.keys()) + 1
             except ValueError:
@@ -398,11 +400,12 @@ class Editor(simulation.Simulation):
         self.setOption("version", __FILE_FORMAT__)
 
         if self.fileName.endswith(".ts2"):
-            with zipfile.ZipFile(self.fileName, "w") as zipArchive:
-                zipArchive.writestr("simulation.json",
-                                    json.dumps(self, separators=(',', ':'),
-                                               for_json=True, encoding='utf-8'),
-                                    compress_type=zipfile.ZIP_BZIP2)
+            compression, compressLevel = utils.settings.compression(
+                utils.settings.COMPRESSION.files
+            )
+            snapshot.writeArchive(self.fileName, self,
+                                  compression=compression,
+                                  compressLevel=compressLevel)
         else:
             with open(self.fileName, 'w') as f:
                 json.dump(self, f, separators=(', ', ': '), indent=4,
@@ -684,10 +687,13 @@ class Editor(simulation.Simulation):
         .. todo:: Maybe this should return Error string or None
         """
         if self.context == utils.Context.EDITOR_ROUTES:
-            if (self._preparedRoute is not None) and \
-               (self._preparedRoute not in self._routes.values()):
-                routeNum = self._preparedRoute.routeNum
-                self._routes[routeNum] = self._preparedRoute
+            preparedRoute = self._preparedRoute
+            if (preparedRoute is not None) and \
+               (preparedRoute.routeNum not in self._routes) and \
+               (self.findRoute(preparedRoute.beginSignal,
+                               preparedRoute.endSignal) is None):
+                self._routes[preparedRoute.routeNum] = preparedRoute
+                self.indexRoute(preparedRoute)
                 self.deselectRoute()
                 return True
         self.deselectRoute()
@@ -697,6 +703,7 @@ class Editor(simulation.Simulation):
         """Deletes the route defined by routeNum"""
         if self.context == utils.Context.EDITOR_ROUTES:
             self.deselectRoute()
+            self.unIndexRoute(self._routes[routeNum])
             del self._routes[routeNum]
 
     @QtCore.pyqtSlot(int)
@@ -651,8 +651,7 @@ class EditorWindow(QtWidgets.QMainWindow):
             try:
                 if zipfile.is_zipfile(fileName):
                     with zipfile.ZipFile(fileName) as zipArchive:
-                        with zipArchive.open("simulation.json") as file:
-                            self.editor = editor.load(self, file)
+                        self.editor = editor.loadArchive(self, zipArchive)
                 else:
                     with open(fileName) as file:
                         self.editor = editor.load(self, file)
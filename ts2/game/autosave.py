@@ -0,0 +1,222 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+import datetime
+import glob
+import os
+import re
+
+from Qt import QtCore
+
+from ts2 import snapshot, utils
+
+# Date suffixes "-%Y%m%d-%H%M%S" of the autosave file names
+DATE_SUFFIX = re.compile(r"(-[0-9]{8}-[0-9]{6})+$")
+
+
+class StateCapture:
+    """A ``StateCapture`` gives the plain JSON document of a running game, as
+    :meth:`~ts2.simulation.Simulation.saveGame` writes it, without holding
+    any reference to the objects of the simulation.
+
+    In a game, the scenery, the train types and the services do not change:
+    their plain form is computed at the first capture and shared by the
+    following ones. Only the dynamic state (time and score in the options,
+    route states, trains and messages) is dumped at each capture.
+    """
+
+    STATIC_SECTIONS = snapshot.SCENERY_SECTIONS
+
+    def __init__(self, simulation):
+        """
+        :param simulation: The :class:`~ts2.simulation.Simulation`, in the
+                           game context.
+        """
+        self.simulation = simulation
+        self._static = {}
+
+    def capture(self):
+        """
+        :return: the plain JSON document of the simulation. The static
+                 sections are shared between captures and must not be
+                 modified.
+        :rtype: dict
+        """
+        document = {}
+        for key, value in self.simulation.for_json().items():
+            if key in self.STATIC_SECTIONS:
+                if key not in self._static:
+                    self._static[key] = snapshot.toPlain(value)
+                document[key] = self._static[key]
+            else:
+                document[key] = snapshot.toPlain(value)
+        return document
+
+
+class AutoSaveWorker(QtCore.QThread):
+    """Thread encoding, compressing and writing a captured game to a file,
+    then removing the oldest autosaves."""
+
+    def __init__(self, document, fileName, pattern, keep, compression,
+                 compressLevel, parent=None):
+        """
+        :param dict document: the captured game
+        :param str fileName: the file to write
+        :param str pattern: glob pattern of the autosaves of this game
+        :param int keep: the number of autosaves to keep
+        :param int compression: the ``zipfile`` compression
+        :param int compressLevel: the compression level
+        """
+        super().__init__(parent)
+        self.document = document
+        self.fileName = fileName
+        self.pattern = pattern
+        self.keep = keep
+        self.compression = compression
+        self.compressLevel = compressLevel
+
+    saved = QtCore.pyqtSignal(str)
+    failed = QtCore.pyqtSignal(str)
+
+    def run(self):
+        """Writes the file to a temporary file which is then renamed, so that
+        an autosave is never left half written."""
+        tmpFileName = self.fileName + ".tmp"
+        try:
+            snapshot.writeDocument(tmpFileName, self.document,
+                                   compression=self.compression,
+                                   compressLevel=self.compressLevel)
+            os.replace(tmpFileName, self.fileName)
+            for fileName in sorted(glob.glob(self.pattern))[:-self.keep]:
+                os.remove(fileName)
+        except Exception as err:
+            # Any error, e.g. a value which cannot be serialized, must be
+            # reported since it would otherwise be lost with the thread.
+            try:
+                os.remove(tmpFileName)
+            except OSError:
+                pass
+            self.failed.emit(str(err))
+        else:
+            self.saved.emit(self.fileName)
+
+
+class AutoSaver(QtCore.QObject):
+    """An ``AutoSaver`` saves a game periodically without stopping it.
+
+    The state of the game is captured on the thread of the simulation with a
+    :class:`~ts2.game.autosave.StateCapture`, then an
+    :class:`~ts2.game.autosave.AutoSaveWorker` thread writes it. The interval
+    between autosaves, the number of autosaves kept and the compression are
+    read from the settings when the autosaver is started.
+    """
+
+    def __init__(self, simulation, name, directory=None, parent=None):
+        """
+        :param simulation: The :class:`~ts2.simulation.Simulation`
+        :param str name: the name of the game, used in the file names. The
+                         date suffix of an autosave is removed, so that a
+                         game loaded from its autosave keeps the same name.
+        :param str directory: where to write the autosaves, the autosave
+                              directory of the settings if None.
+        """
+        super().__init__(parent)
+        self.simulation = simulation
+        self.name = DATE_SUFFIX.sub("", name)
+        self.directory = directory or utils.settings.autosaveDir
+        self._capture = StateCapture(simulation)
+        self._worker = None
+        self._keep = 3
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.autosave)
+
+    saved = QtCore.pyqtSignal(str)
+    failed = QtCore.pyqtSignal(str)
+
+    @property
+    def pattern(self):
+        """
+        :return: the glob pattern of the autosaves of this game
+        :rtype: str
+        """
+        return os.path.join(glob.escape(self.directory),
+                            glob.escape(self.name) + "-%s-%s.ts2" %
+                            ("[0-9]" * 8, "[0-9]" * 6))
+
+    @property
+    def isSaving(self):
+        """
+        :return: True if an autosave is being written
+        :rtype: bool
+        """
+        return self._worker is not None and self._worker.isRunning()
+
+    def start(self):
+        """Starts autosaving with the interval of the settings, or stops if
+        autosave is disabled."""
+        settings = utils.settings
+        interval = settings.i(settings.AUTOSAVE_INTERVAL, 5)
+        self._keep = max(settings.i(settings.AUTOSAVE_KEEP, 3), 1)
+        if interval > 0:
+            self._timer.start(interval * 60 * 1000)
+        else:
+            self._timer.stop()
+
+    def stop(self):
+        """Stops autosaving, waiting for the autosave in progress if any."""
+        self._timer.stop()
+        if self._worker is not None:
+            self._worker.wait()
+
+    @QtCore.pyqtSlot()
+    def autosave(self):
+        """Captures the game and writes it in the background. Does nothing
+        if the previous autosave is still being written.
+
+        :return: the worker thread, or None if no autosave was started
+        :rtype: :class:`~ts2.game.autosave.AutoSaveWorker`
+        """
+        if self.isSaving:
+            return None
+        document = self._capture.capture()
+        os.makedirs(self.directory, exist_ok=True)
+        fileName = os.path.join(
+            self.directory, "%s-%s.ts2" %
+            (self.name, datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+        )
+        compression, compressLevel = utils.settings.compression(
+            utils.settings.COMPRESSION.game
+        )
+        self._worker = AutoSaveWorker(document, fileName, self.pattern,
+                                      self._keep, compression, compressLevel,
+                                      self)
+        self._worker.saved.connect(self.saved)
+        self._worker.failed.connect(self.failed)
+        self._worker.finished.connect(self._workerFinished)
+        self._worker.start()
+        return self._worker
+
+    @QtCore.pyqtSlot()
+    def _workerFinished(self):
+        """Deletes the worker of the last autosave once it is finished."""
+        worker = self.sender()
+        if worker is self._worker:
+            self._worker = None
+        worker.deleteLater()
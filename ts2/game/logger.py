@@ -79,6 +79,20 @@ class MessageLogger(QtCore.QAbstractTableModel):
             "messages": messages
         }
 
+    @property
+    def messages(self):
+        """Returns the list of messages of the logger, without the trailing
+        blank line used by the views."""
+        return self._messages[:-1]
+
+    def setMessages(self, messages):
+        """Replaces the messages of the logger by messages."""
+        self.beginResetModel()
+        self._messages = list(messages) + [Message(
+            {'msgType': Message.SIMULATION_MSG, 'msgText': " "}
+        )]
+        self.endResetModel()
+
     def addMessage(self, msgText, msgType=Message.SIMULATION_MSG):
         """Adds a message to the logger."""
         row = len(self._messages) - 1
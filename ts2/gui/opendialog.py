@@ -1,16 +1,13 @@
 
 import os
-import tempfile
-import zipfile
 import fnmatch
-from urllib import request
 
 from Qt import QtCore, QtWidgets, Qt
-import json
 
 import ts2
+from ts2 import download
 from ts2.utils import settings
-from ts2.gui import widgets
+from ts2.gui import simindex, widgets
 
 translate = QtWidgets.qApp.translate
 
@@ -42,6 +39,11 @@ class OpenDialog(QtWidgets.QDialog):
         self.setMinimumWidth(800)
         self.setMinimumHeight(800)
 
+        self.simIndex = simindex.SimulationIndex()
+        self.metaDataReader = None
+        self.downloader = None
+        self._simItems = {}
+
         m = 5
         containerLayout = QtWidgets.QHBoxLayout()
         containerLayout.setContentsMargins(m, m, m, m)
@@ -141,53 +143,66 @@ class OpenDialog(QtWidgets.QDialog):
         self.buttGroup.button(tab).setChecked(True)
 
     def onDownload(self):
-        """Downloads zip when Download button clicked"""
-        QtWidgets.qApp.setOverrideCursor(Qt.WaitCursor)
+        """Downloads the simulations in the background when Download button
+        clicked, or cancels the download in progress."""
+        if self.downloader is not None:
+            self.downloader.requestInterruption()
+            return
 
         if settings.debug:
             url = "http://localhost/~ts2/ts2-data-master.zip"
         else:
             url = "%s/archive/master.zip" % self.txtUrl.text().strip('/')
 
-        self.statusBar.showBusy(True)
+        compression, compressLevel = settings.compression(
+            settings.COMPRESSION.files
+        )
+        self.downloader = download.SimulationsDownloader(
+            url, settings.simulationsDir, settings.userDataDir,
+            settings.downloadDir, compression, compressLevel, self
+        )
+        self.downloader.progressChanged.connect(self.onDownloadProgress)
+        self.downloader.downloadFinished.connect(self.onDownloadFinished)
+        self.downloader.finished.connect(self.downloader.deleteLater)
+
+        self.statusBar.showBusy(False)
+        self.statusBar.showProgress(0, 0)
         self.statusBar.showMessage("Requesting %s" % url)
-        self.buttDownload.setDisabled(True)
-
-        response = request.urlopen(url)
-
-        with tempfile.TemporaryFile() as tmpFile:
-            tmpFile.write(response.read())
-            with zipfile.ZipFile(tmpFile) as zipArchive:
-                for fileName in zipArchive.namelist():
-                    fs = fileName.split('/', 1)
-                    fn = fs[1] if len(fs) > 1 else fs[0]
-                    if fileName.endswith(".ts2"):
-                        fName = os.path.join(settings.simulationsDir, fn)
-                        os.makedirs(os.path.dirname(fName), exist_ok=True)
-                        with open(fName, 'wb') as f:
-                            f.write(zipArchive.read(fileName))
-
-                    elif fileName.endswith(".tsl"):
-                        fName = os.path.join(settings.userDataDir,
-                                             os.path.basename(fileName))
-                        with open(fName, 'wb') as f:
-                            f.write(zipArchive.read(fileName))
-
-                    elif fileName.endswith(".json"):
-                        fName = os.path.join(settings.simulationsDir,
-                                             fn.replace(".json", ".ts2"))
-                        os.makedirs(os.path.dirname(fName), exist_ok=True)
-                        with zipfile.ZipFile(fName, "w") as ts2Zip:
-                            ts2Zip.writestr("simulation.json",
-                                            zipArchive.read(fileName),
-                                            compress_type=zipfile.ZIP_BZIP2)
-
-        QtWidgets.qApp.restoreOverrideCursor()
+        self.buttDownload.setText("Cancel")
+        self.downloader.start()
+
+    @QtCore.pyqtSlot(int, int)
+    def onDownloadProgress(self, received, total):
+        """Shows the progress of the download."""
+        self.statusBar.showProgress(received, total)
+        if total:
+            self.statusBar.showMessage("Downloading: %i / %i kB" %
+                                       (received // 1024, total // 1024))
+        else:
+            self.statusBar.showMessage("Downloading: %i kB" %
+                                       (received // 1024))
 
+    @QtCore.pyqtSlot(bool, str)
+    def onDownloadFinished(self, ok, message):
+        """Shows the result of the download and reloads the simulations."""
+        self.downloader = None
         self.statusBar.showBusy(False)
-        self.statusBar.showMessage("Download done", timeout=2)
-        self.buttDownload.setDisabled(False)
+        self.buttDownload.setText("Download")
         self.onRefreshSims()
+        if ok:
+            self.statusBar.showMessage("Download done", timeout=2)
+        else:
+            self.statusBar.showMessage("Download failed: %s" % message,
+                                       warn=True)
+
+    def stopDownload(self):
+        """Interrupts the download, if running. It is resumed by the next
+        download."""
+        if self.downloader is not None:
+            self.downloader.downloadFinished.disconnect()
+            self.downloader.requestInterruption()
+            self.downloader.wait()
+            self.downloader = None
 
     def onNavButtClicked(self, butt):
 
@@ -202,9 +217,12 @@ class OpenDialog(QtWidgets.QDialog):
         self.stackWidget.setCurrentIndex(idx)
 
     def onRefreshSims(self):
-        """Reloads the simulations dir"""
+        """Reloads the simulations dir. The metadata of the files which are
+        not in the simulations index is read in the background."""
+        self.stopMetaDataReader()
         self.statusBar.showMessage("Loading")
         self.treeSims.clear()
+        self._simItems = {}
 
         ts2_files = {}
         for root, dirnames, filenames in os.walk(settings.simulationsDir):
@@ -214,29 +232,75 @@ class OpenDialog(QtWidgets.QDialog):
                     ts2_files[d] = []
                 ts2_files[d].append(os.path.join(root, filename))
 
+        missing = []
         for folder in sorted(ts2_files.keys()):
             pitem = QtWidgets.QTreeWidgetItem()
             pitem.setText(C.name, folder)
             pitem.setFirstColumnSpanned(True)
             self.treeSims.addTopLevelItem(pitem)
             for file_path in ts2_files[folder]:
-                with zipfile.ZipFile(file_path, "r") as zippy:
-
-                    # wtf, confused why bytes returned
-                    bytesData = zippy.read("simulation.json")
-                    data = json.loads(bytesData.decode())
-                    nfo = data['options']
-
-                    item = QtWidgets.QTreeWidgetItem(pitem)
-                    item.setText(C.name, nfo['title'])
-                    item.setText(C.description, nfo['description'])
-                    item.setText(C.file_name, os.path.basename(file_path))
-                    item.setText(C.file_path, file_path)
+                item = QtWidgets.QTreeWidgetItem(pitem)
+                item.setText(C.file_name, os.path.basename(file_path))
+                item.setText(C.file_path, file_path)
+                self._simItems[file_path] = item
+                nfo = self.simIndex.metaData(file_path)
+                if nfo is None:
+                    item.setText(C.name, os.path.basename(file_path))
+                    missing.append(file_path)
+                else:
+                    self.setSimItemInfo(item, nfo)
             pitem.setExpanded(True)
+        self.simIndex.prune(self._simItems.keys())
 
+        self.treeSims.resizeColumnToContents(C.name)
+        if missing:
+            self.metaDataReader = simindex.MetaDataReader(missing, self)
+            self.metaDataReader.metaDataRead.connect(self.onMetaDataRead)
+            self.metaDataReader.finished.connect(self.onMetaDataReaderFinished)
+            self.metaDataReader.start()
+        else:
+            self.simIndex.save()
+            self.statusBar.showMessage("")
+
+    @staticmethod
+    def setSimItemInfo(item, nfo):
+        """Shows the title and the description of the simulation file of
+        item."""
+        item.setText(C.name, nfo.get('title') or item.text(C.file_name))
+        item.setText(C.description, nfo.get('description', ""))
+
+    @QtCore.pyqtSlot(str, object, object)
+    def onMetaDataRead(self, file_path, key, nfo):
+        """Updates the simulations index and tree with the metadata of
+        file_path."""
+        if key is not None:
+            self.simIndex.setMetaData(file_path, key, nfo)
+        item = self._simItems.get(file_path)
+        if item is not None:
+            self.setSimItemInfo(item, nfo)
+
+    @QtCore.pyqtSlot()
+    def onMetaDataReaderFinished(self):
+        self.simIndex.save()
         self.treeSims.resizeColumnToContents(C.name)
         self.statusBar.showMessage("")
 
+    def stopMetaDataReader(self):
+        """Interrupts the reading of the metadata, if running."""
+        if self.metaDataReader is not None:
+            self.metaDataReader.metaDataRead.disconnect()
+            self.metaDataReader.finished.disconnect()
+            self.metaDataReader.requestInterruption()
+            self.metaDataReader.wait()
+            self.metaDataReader = None
+        self.simIndex.save()
+
+    def done(self, result):
+        """Stops the download and the reading of metadata before closing."""
+        self.stopDownload()
+        self.stopMetaDataReader()
+        super().done(result)
+
     def onRefreshRecent(self):
         """Reloads the recent items"""
         self.treeRecent.clear()
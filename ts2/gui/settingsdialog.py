@@ -103,6 +103,67 @@ class SettingsDialog(QtWidgets.QDialog):
         grid.setColumnStretch(1, 10)
         grid.setColumnStretch(2, 0)
 
+        # ======================
+        # Autosave Options
+        grp = QtWidgets.QGroupBox()
+        grp.setTitle(self.tr("Autosave"))
+        grp.setFlat(True)
+        middleLayout.addWidget(grp)
+
+        grid = QtWidgets.QGridLayout()
+        grp.setLayout(grid)
+
+        row = 0
+        grid.addWidget(QtWidgets.QLabel(self.tr("Interval")), row, 0, 1, 1,
+                       Qt.AlignRight)
+        self.spinAutosaveInterval = QtWidgets.QSpinBox()
+        self.spinAutosaveInterval.setRange(0, 120)
+        self.spinAutosaveInterval.setSuffix(self.tr(" min"))
+        self.spinAutosaveInterval.setSpecialValueText(self.tr("Disabled"))
+        grid.addWidget(self.spinAutosaveInterval, row, 1, 1, 1)
+
+        row += 1
+        grid.addWidget(QtWidgets.QLabel(self.tr("Autosaves kept")), row, 0,
+                       1, 1, Qt.AlignRight)
+        self.spinAutosaveKeep = QtWidgets.QSpinBox()
+        self.spinAutosaveKeep.setRange(1, 100)
+        grid.addWidget(self.spinAutosaveKeep, row, 1, 1, 1)
+
+        grid.setColumnStretch(0, 0)
+        grid.setColumnStretch(1, 10)
+
+        # ======================
+        # Compression Options
+        grp = QtWidgets.QGroupBox()
+        grp.setTitle(self.tr("Compression"))
+        grp.setFlat(True)
+        middleLayout.addWidget(grp)
+
+        grid = QtWidgets.QGridLayout()
+        grp.setLayout(grid)
+
+        self.cmbCodec = {}
+        self.spinLevel = {}
+        usages = [
+            (settings.COMPRESSION.game, self.tr("Saved games")),
+            (settings.COMPRESSION.files, self.tr("Simulation files"))
+        ]
+        for row, (usage, label) in enumerate(usages):
+            grid.addWidget(QtWidgets.QLabel(label), row, 0, 1, 1,
+                           Qt.AlignRight)
+            cmbCodec = QtWidgets.QComboBox()
+            cmbCodec.addItems(list(settings.COMPRESSION_CODECS.keys()))
+            grid.addWidget(cmbCodec, row, 1, 1, 1)
+            spinLevel = QtWidgets.QSpinBox()
+            spinLevel.setPrefix(self.tr("Level "))
+            grid.addWidget(spinLevel, row, 2, 1, 1)
+            self.cmbCodec[usage] = cmbCodec
+            self.spinLevel[usage] = spinLevel
+
+        grid.setColumnStretch(0, 0)
+        grid.setColumnStretch(1, 10)
+        grid.setColumnStretch(2, 0)
+
         # ======
         containerLayout.addStretch(20)
 
@@ -115,11 +176,62 @@ class SettingsDialog(QtWidgets.QDialog):
         self.txtDataDir.setText(settings.userDataDir)
         self.txtSimsDir.setText(settings.simulationsDir)
 
+        self.spinAutosaveInterval.setValue(
+            settings.i(settings.AUTOSAVE_INTERVAL, 5)
+        )
+        self.spinAutosaveKeep.setValue(settings.i(settings.AUTOSAVE_KEEP, 3))
+        self.spinAutosaveInterval.valueChanged.connect(self.onAutosaveChanged)
+        self.spinAutosaveKeep.valueChanged.connect(self.onAutosaveChanged)
+
+        for usage, cmbCodec in self.cmbCodec.items():
+            cmbCodec.setCurrentText(settings.compressionCodec(usage))
+            self.updateLevel(usage)
+            cmbCodec.currentIndexChanged.connect(
+                lambda index, usage=usage: self.onCompressionChanged(usage)
+            )
+            self.spinLevel[usage].valueChanged.connect(
+                lambda value, usage=usage: self.onCompressionChanged(usage)
+            )
+
     def onLoadLast(self):
         v = 1 if self.chkLoadLast.isChecked() else 0
         settings.setValue(settings.LOAD_LAST, v)
         settings.sync()
 
+    def onAutosaveChanged(self):
+        settings.setValue(settings.AUTOSAVE_INTERVAL,
+                          self.spinAutosaveInterval.value())
+        settings.setValue(settings.AUTOSAVE_KEEP,
+                          self.spinAutosaveKeep.value())
+        settings.sync()
+
+    def updateLevel(self, usage):
+        """Sets the range and value of the level spin box of usage, which is
+        disabled if its codec has no levels."""
+        spinLevel = self.spinLevel[usage]
+        codec = self.cmbCodec[usage].currentText()
+        spinLevel.blockSignals(True)
+        if codec in settings.COMPRESSION_LEVELS:
+            spinLevel.setEnabled(True)
+            spinLevel.setRange(*settings.COMPRESSION_LEVELS[codec])
+            if codec == settings.compressionCodec(usage):
+                spinLevel.setValue(settings.compressionLevel(usage))
+            else:
+                spinLevel.setValue(spinLevel.maximum())
+        else:
+            spinLevel.setEnabled(False)
+            spinLevel.setRange(0, 0)
+        spinLevel.blockSignals(False)
+
+    def onCompressionChanged(self, usage):
+        codec = self.cmbCodec[usage].currentText()
+        if codec != settings.compressionCodec(usage):
+            self.updateLevel(usage)
+        spinLevel = self.spinLevel[usage]
+        level = spinLevel.value() if spinLevel.isEnabled() else None
+        settings.setCompression(usage, codec, level)
+        settings.sync()
+
     def closeEvent(self, ev):
         settings.setValue(settings.INITIAL_SETUP, "1")
         settings.sync()
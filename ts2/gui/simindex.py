@@ -0,0 +1,138 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+import os
+import zipfile
+
+import simplejson as json
+from Qt import QtCore
+
+from ts2 import loader, utils
+
+
+class SimulationIndex:
+    """A ``SimulationIndex`` is the on-disk cache of the metadata (title,
+    description...) of simulation files. An entry is valid as long as the
+    modification time and the size of its file are unchanged.
+    """
+
+    def __init__(self, fileName=None):
+        """
+        :param str fileName: the file of the index, the one of the settings
+                             if None.
+        """
+        self.fileName = fileName or utils.settings.simulationsIndexFile
+        self._entries = {}
+        self._modified = False
+        self.load()
+
+    def load(self):
+        """Reads the index from its file. An unreadable index is ignored."""
+        try:
+            with open(self.fileName, encoding="utf-8") as file:
+                self._entries = json.load(file)
+        except (OSError, ValueError):
+            self._entries = {}
+        if not isinstance(self._entries, dict):
+            self._entries = {}
+        self._modified = False
+
+    def save(self):
+        """Writes the index to its file if it has been modified."""
+        if not self._modified:
+            return
+        tmpFileName = self.fileName + ".tmp"
+        try:
+            with open(tmpFileName, "w", encoding="utf-8") as file:
+                json.dump(self._entries, file)
+            os.replace(tmpFileName, self.fileName)
+        except OSError as err:
+            QtCore.qWarning("Cannot write the simulations index: %s" % err)
+        else:
+            self._modified = False
+
+    @staticmethod
+    def fileKey(path):
+        """
+        :return: the modification time and the size of the file path, or None
+                 if it cannot be read.
+        :rtype: list
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_mtime, stat.st_size]
+
+    def metaData(self, path):
+        """
+        :return: the cached metadata of the file path, or None if there is
+                 none or if the file has changed.
+        :rtype: dict
+        """
+        entry = self._entries.get(path)
+        if entry is None or entry.get("key") != self.fileKey(path):
+            return None
+        return entry["meta"]
+
+    def setMetaData(self, path, key, metaData):
+        """Stores the metadata of the file path, read when it had the given
+        key."""
+        self._entries[path] = {"key": key, "meta": metaData}
+        self._modified = True
+
+    def prune(self, paths):
+        """Removes the entries of the files which are not in paths."""
+        paths = set(paths)
+        for path in list(self._entries.keys()):
+            if path not in paths:
+                del self._entries[path]
+                self._modified = True
+
+
+class MetaDataReader(QtCore.QThread):
+    """Thread reading the metadata of simulation files, emitting
+    ``metaDataRead`` for each of them."""
+
+    def __init__(self, paths, parent=None):
+        """
+        :param list paths: the files to read
+        """
+        super().__init__(parent)
+        self.paths = list(paths)
+
+    metaDataRead = QtCore.pyqtSignal(str, object, object)
+
+    def run(self):
+        """Reads the files until done or interrupted. Unreadable files get
+        empty metadata."""
+        for path in self.paths:
+            if self.isInterruptionRequested():
+                return
+            key = SimulationIndex.fileKey(path)
+            try:
+                with zipfile.ZipFile(path) as zipArchive:
+                    metaData = loader.readMetaData(zipArchive)
+            except Exception as err:
+                # Any error, e.g. of a corrupt member or an unsupported
+                # compression, must not stop reading the other files.
+                QtCore.qWarning("Cannot read %s: %s" % (path, err))
+                metaData = {}
+            self.metaDataRead.emit(path, key, metaData)
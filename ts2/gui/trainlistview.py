@@ -18,17 +18,25 @@
 #   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
 #
 
-from Qt import QtCore, QtWidgets
+from Qt import QtCore, QtWidgets, Qt
 
 from ts2 import simulation
 
 
 class TrainListView(QtWidgets.QTreeView):
-    """ TODO Document TrainListView class"""
+    """View of the trains of the simulation during the game.
+
+    The :class:`~ts2.trains.train.TrainListModel` of the simulation is shown
+    through a ``QSortFilterProxyModel``, which sorts and filters the trains
+    on the values cached by the model."""
 
     def __init__(self, parent):
         super().__init__(parent)
         self.simulation = None
+        self.proxyModel = QtCore.QSortFilterProxyModel(self)
+        self.proxyModel.setFilterKeyColumn(-1)
+        self.proxyModel.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.proxyModel.setDynamicSortFilter(True)
         self.setItemsExpandable(False)
         self.setRootIsDecorated(False)
         self.setHeaderHidden(False)
@@ -38,29 +46,38 @@ class TrainListView(QtWidgets.QTreeView):
 
     @QtCore.pyqtSlot(int)
     def updateTrainSelection(self, trainId):
-        index = self.model().index(trainId, 0)
+        sourceModel = self.proxyModel.sourceModel()
+        index = self.proxyModel.mapFromSource(sourceModel.index(trainId, 0))
         self.selectionModel().select(index,
                                      QtCore.QItemSelectionModel.Rows |
                                      QtCore.QItemSelectionModel.ClearAndSelect)
 
+    @QtCore.pyqtSlot(str)
+    def setFilterText(self, text):
+        """Shows only the trains with text in any of their columns."""
+        self.proxyModel.setFilterFixedString(text)
+
     @QtCore.pyqtSlot(simulation.Simulation)
     def setupTrainList(self, sim):
         self.simulation = sim
-        # if self.model() is None:
-        # trainsSortedModel = QSortFilterProxyModel()
-        # trainsSortedModel.setSourceModel()
-        self.setModel(self.simulation.trainListModel)
+        self.proxyModel.setSourceModel(self.simulation.trainListModel)
+        # Trains are shown in the order of the simulation until sorted
+        self.header().setSortIndicator(-1, Qt.AscendingOrder)
+        self.setModel(self.proxyModel)
         self.header().setStretchLastSection(False)
         self.header().setSortIndicatorShown(False)
         self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-        self.simulation.trainStatusChanged.connect(self.model().update)
+        self.simulation.trainStatusChanged.connect(
+            self.simulation.trainListModel.update
+        )
         # self.simulation.timeChanged.connect(self.model().update)
         # self.trainSelected.connect(self.simulation.selectedTrainModel.setTrainByServiceCode)
 
     def contextMenuEvent(self, event):
         index = self.selectionModel().selection().indexes()[0]
         if index.isValid():
-            train = self.simulation.trains[index.row()]
+            trainId = self.proxyModel.mapToSource(index).row()
+            train = self.simulation.trains[trainId]
             train.showTrainActionsMenu(self, event.globalPos())
 
     @QtCore.pyqtSlot(QtCore.QItemSelection, QtCore.QItemSelection)
@@ -69,4 +86,6 @@ class TrainListView(QtWidgets.QTreeView):
         if len(selected.indexes()) > 0:
             index = selected.indexes()[0]
             if index.isValid():
-                self.trainSelected.emit(index.row())
+                self.trainSelected.emit(
+                    self.proxyModel.mapToSource(index).row()
+                )
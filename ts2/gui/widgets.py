@@ -160,6 +160,14 @@ class StatusBar(QtWidgets.QStatusBar):
             self.progressTimer.stop()
         self.progressBar.setVisible(is_busy)
 
+    def showProgress(self, value, total):
+        """Shows the progress bar at value out of total, or busy if total is
+        unknown (0)"""
+        self.progressBar.setRange(0, max(total, 0))
+        if total > 0:
+            self.progressBar.setValue(min(value, total))
+        self.progressBar.setVisible(True)
+
 
 class ToolBarGroup(QtWidgets.QWidget):
     """Created a widget with a small label, containing a toolbar with widgets
@@ -0,0 +1,235 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+from math import ceil
+import os
+import sys
+import zipfile
+
+from Qt import QtCore, QtWidgets
+
+from ts2 import loader, simulation
+from ts2 import utils
+from ts2.game import logger
+
+translate = QtWidgets.qApp.translate
+
+MSECS_PER_DAY = 24 * 3600 * 1000
+
+
+def json_hook(dct):
+    """Hook method for json.load()."""
+    if not dct.get('__type__'):
+        return dct
+    elif dct['__type__'] == "Simulation":
+        return HeadlessSimulation(dct['options'], dct['trackItems'],
+                                  dct['routes'], dct['trainTypes'],
+                                  dct['services'], dct['trains'],
+                                  dct['messageLogger'])
+    else:
+        return simulation.json_hook(dct)
+
+
+def load(jsonStream):
+    """Loads the simulation from jsonStream and returns it as a
+    :class:`~ts2.headless.HeadlessSimulation`.
+
+    The loading logic is the same as :func:`ts2.simulation.load`, except that
+    no window is needed.
+
+    :param jsonStream: file object to read the JSON simulation from
+    :rtype: :class:`~ts2.headless.HeadlessSimulation`
+    """
+    simLoader = loader.SimulationLoader()
+    return _initialize(simLoader.read(jsonStream, json_hook))
+
+
+def loadArchive(zipArchive):
+    """Loads the simulation from a .ts2 archive, from its binary snapshot if
+    it has one, and returns it as a :class:`~ts2.headless.HeadlessSimulation`.
+
+    :param zipArchive: the opened ``zipfile.ZipFile``
+    :rtype: :class:`~ts2.headless.HeadlessSimulation`
+    """
+    simLoader = loader.SimulationLoader()
+    return _initialize(simLoader.readArchive(zipArchive, json_hook))
+
+
+def _initialize(sim):
+    """Checks that sim is a HeadlessSimulation and initializes it."""
+    if not isinstance(sim, HeadlessSimulation):
+        raise utils.FormatException(
+            translate("simulation.load", "Loaded file is not a TS2 simulation")
+        )
+    sim.initialize(HeadlessWindow(sim))
+    return sim
+
+
+def loadFile(fileName):
+    """Loads the simulation stored in fileName, which is either a .ts2 archive
+    or a plain .json file.
+
+    :param str fileName: path of the file to load
+    :rtype: :class:`~ts2.headless.HeadlessSimulation`
+    """
+    if zipfile.is_zipfile(fileName):
+        with zipfile.ZipFile(fileName) as zipArchive:
+            return loadArchive(zipArchive)
+    else:
+        with open(fileName) as file:
+            return load(file)
+
+
+class HeadlessWindow(QtCore.QObject):
+    """Stand-in for the main window of a headless simulation. Requests that
+    would pop up a dialog in the GUI are logged instead."""
+
+    def __init__(self, sim):
+        """Constructor for the HeadlessWindow class."""
+        super().__init__()
+        self.simulation = sim
+        self.view = None
+
+    @QtCore.pyqtSlot(int)
+    def openReassignServiceWindow(self, trainId):
+        """Logs that the user has been asked to reassign a service."""
+        self.simulation.messageLogger.addMessage(
+            self.tr("Service reassignment requested for train %i, ignored in "
+                    "headless mode") % trainId,
+            logger.Message.SOFTWARE_MSG
+        )
+
+    @QtCore.pyqtSlot(int)
+    def openSplitTrainWindow(self, trainId):
+        """Logs that the user has been asked to split a train."""
+        self.simulation.messageLogger.addMessage(
+            self.tr("Train split requested for train %i, ignored in "
+                    "headless mode") % trainId,
+            logger.Message.SOFTWARE_MSG
+        )
+
+
+class HeadlessSimulation(simulation.Simulation):
+    """A :class:`~ts2.simulation.Simulation` which has no scene, no timer and
+    does not need an event loop. Time is moved forward explicitly with
+    :meth:`~ts2.simulation.Simulation.advance` or
+    :meth:`~ts2.headless.HeadlessSimulation.run`, as fast as the CPU allows.
+    """
+
+    @property
+    def headless(self):
+        """
+        :return: True, this simulation has no scene nor timer.
+        :rtype: bool
+        """
+        return True
+
+    def registerGraphicsItem(self, graphicItem):
+        """Does nothing since there is no scene.
+
+        Reimplemented from Simulation."""
+        pass
+
+    def pause(self, paused=True):
+        """Does nothing since there is no timer.
+
+        Reimplemented from Simulation."""
+        pass
+
+    def setTimeFactor(self, timeFactor):
+        """Sets the time factor option only, since there is no timer.
+
+        Reimplemented from Simulation."""
+        self.setOption("timeFactor", timeFactor)
+
+    def defaultStep(self):
+        """
+        :return: the number of simulated seconds of each physics step when
+        the simulation is run by the GUI timer at the current time factor.
+        :rtype: float
+        """
+        timeFactor = float(self.option("timeFactor"))
+        frame = self._timer.interval() * timeFactor / 1000
+        return frame / max(1, ceil(round(frame / self.PHYSICS_STEP, 6)))
+
+    def run(self, until, step=None):
+        """Runs the simulation until the given time is reached.
+
+        :param until: The simulation time at which to stop. If it is before
+        the current time, the simulation runs over midnight.
+        :type until: ``QtCore.QTime``
+        :param float step: The number of simulated seconds of each step.
+        Defaults to :meth:`~ts2.headless.HeadlessSimulation.defaultStep`.
+        :return: the number of steps run
+        :rtype: int
+        """
+        if step is None:
+            step = self.defaultStep()
+        if step <= 0:
+            raise ValueError("step must be strictly positive")
+        remaining = self._time.msecsTo(until) % MSECS_PER_DAY
+        stepMSecs = int(round(step * 1000))
+        steps = 0
+        while remaining > 0:
+            msecs = min(stepMSecs, remaining)
+            self.advance(msecs / 1000)
+            remaining -= msecs
+            steps += 1
+        return steps
+
+    def report(self, stream=sys.stdout):
+        """Writes the score and the message log of the simulation to stream.
+
+        :param stream: file object to write to
+        """
+        stream.write(self.tr("Time: %s\n") %
+                     self.currentTime.toString("hh:mm:ss"))
+        stream.write(self.tr("Score: %i\n") % self.scorer.score)
+        stream.write(self.tr("Messages:\n"))
+        for message in self.messageLogger.messages:
+            stream.write("%s\n" % message)
+
+
+def Main(args):
+    """Runs the simulation given in args without any GUI and prints the
+    score and the message log on the standard output.
+
+    :param object args: Command line args from argparse
+    :return: the exit code of the program
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QtWidgets.QApplication.instance() or \
+        QtWidgets.QApplication(sys.argv)
+    until = QtCore.QTime.fromString(args.until, "hh:mm")
+    if not until.isValid():
+        until = QtCore.QTime.fromString(args.until, "hh:mm:ss")
+    if not until.isValid():
+        sys.stderr.write("ERROR: Invalid time for --until: %s\n" % args.until)
+        return 2
+    try:
+        sim = loadFile(args.file)
+    except (utils.FormatException,
+            utils.MissingDependencyException) as err:
+        sys.stderr.write("ERROR: %s\n" % err)
+        return 1
+    sim.run(until, args.step)
+    sim.report()
+    app.processEvents()
+    return 0
@@ -0,0 +1,392 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+import codecs
+import os
+import re
+import struct
+
+import simplejson as json
+from Qt import QtCore, QtWidgets
+
+from ts2 import snapshot, utils
+
+translate = QtWidgets.qApp.translate
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",:]}"
+NUMBER_START = "-0123456789"
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonStreamReader:
+    """A ``JsonStreamReader`` reads a JSON document from a stream by small
+    chunks, so that the values of the document can be decoded one at a time
+    without having the whole text in memory.
+    """
+
+    def __init__(self, stream, objectHook=None, chunkSize=1 << 20):
+        """
+        :param stream: text or binary (UTF-8) file object to read from
+        :param objectHook: object_hook passed to the JSON decoder
+        :param int chunkSize: number of characters read at once
+        """
+        self._stream = stream
+        self.objectHook = objectHook
+        self._decoder = json.JSONDecoder(object_hook=objectHook)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._chunkSize = chunkSize
+        self._buffer = ""
+        self._pos = 0
+        self._consumed = 0
+        self._eof = False
+
+    @property
+    def position(self):
+        """
+        :return: the number of characters of the stream consumed so far
+        :rtype: int
+        """
+        return self._consumed + self._pos
+
+    def _fill(self, size=None):
+        """Reads at least size more characters from the stream, or until the
+        end of the stream.
+
+        :return: False if the end of the stream is reached
+        :rtype: bool
+        """
+        if self._eof:
+            return False
+        if self._pos:
+            self._consumed += self._pos
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        data = self._stream.read(max(size or 0, self._chunkSize))
+        if not data:
+            self._eof = True
+            if isinstance(data, bytes):
+                self._buffer += self._utf8.decode(data, final=True)
+            return False
+        if isinstance(data, bytes):
+            data = self._utf8.decode(data)
+        self._buffer += data
+        return True
+
+    def _skipWhitespace(self):
+        """Moves the position to the next significant character.
+
+        :return: this character, or an empty string at the end of the stream.
+        :rtype: str
+        """
+        while True:
+            self._pos = WHITESPACE_RE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _error(self, message):
+        """Returns a FormatException for the current position."""
+        return utils.FormatException(
+            translate("JsonStreamReader",
+                      "Invalid JSON file at character %i: %s") %
+            (self.position, message)
+        )
+
+    def expect(self, chars):
+        """Reads the next significant character, which must be in chars.
+
+        :return: the character read
+        :rtype: str
+        """
+        char = self._skipWhitespace()
+        if not char or char not in chars:
+            raise self._error(
+                translate("JsonStreamReader", "expected one of '%s'") % chars
+            )
+        self._pos += 1
+        return char
+
+    def peek(self):
+        """
+        :return: the next significant character without consuming it
+        :rtype: str
+        """
+        return self._skipWhitespace()
+
+    def readValue(self):
+        """Decodes the next JSON value of the stream with the object hook.
+
+        :return: the decoded value
+        """
+        self._skipWhitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as err:
+                # The value may be incomplete: read more and try again, reading
+                # as much again as already buffered to remain linear.
+                if not self._fill(len(self._buffer) - self._pos):
+                    raise self._error(str(err))
+            else:
+                if self._eof or (end < len(self._buffer) and (
+                        self._buffer[self._pos] not in NUMBER_START or
+                        self._buffer[end] in DELIMITERS)):
+                    self._pos = end
+                    return value
+                # A number could go on in the next chunk
+                self._fill(len(self._buffer) - self._pos)
+
+    def readKey(self):
+        """Decodes the next object key of the stream and the colon after it.
+
+        :return: the key
+        :rtype: str
+        """
+        if self._skipWhitespace() != '"':
+            raise self._error(translate("JsonStreamReader", "expected a key"))
+        key = self.readValue()
+        self.expect(":")
+        return key
+
+    def iterObject(self):
+        """Reads an object from the stream, yielding each of its keys. The
+        caller must read the value of each key before resuming the
+        generator."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.expect("}")
+            return
+        while True:
+            yield self.readKey()
+            if self.expect(",}") == "}":
+                return
+
+    def iterArray(self):
+        """Reads an array from the stream, yielding the index of each of its
+        items. The caller must read each item before resuming the
+        generator."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.expect(",]") == "]":
+                return
+
+
+def readOptions(jsonStream):
+    """Reads the options of the JSON simulation of jsonStream, stopping as
+    soon as they are read. Since the options come first in the files written
+    by TS2, this reads only the beginning of the stream.
+
+    :param jsonStream: text or binary file object to read from
+    :return: the options, or an empty dict if there are none.
+    :rtype: dict
+    """
+    reader = JsonStreamReader(jsonStream, chunkSize=1 << 14)
+    for key in reader.iterObject():
+        value = reader.readValue()
+        if key == "options":
+            return value
+    return {}
+
+
+def readMetaData(zipArchive):
+    """Reads the metadata (title, description...) of a .ts2 archive, from its
+    metadata member if it has one, and from the options of its JSON member
+    otherwise.
+
+    :param zipArchive: the opened ``zipfile.ZipFile``
+    :rtype: dict
+    """
+    if snapshot.META_FILE_NAME in zipArchive.namelist():
+        return json.loads(
+            zipArchive.read(snapshot.META_FILE_NAME).decode("utf-8")
+        )
+    with zipArchive.open("simulation.json") as file:
+        return snapshot.metaData(readOptions(file))
+
+
+class SimulationLoader(QtCore.QObject):
+    """A ``SimulationLoader`` loads a simulation in two phases, reporting its
+    progress with the ``progressChanged`` signal:
+
+    1. The JSON stream is read section by section, and each section item by
+       item (track items, routes, train types, services, trains...), so that
+       the objects are created as the file is read. This gives the same
+       objects as ``json.load()`` with the same object hook, without having
+       the whole text and the whole tree of dictionaries in memory at once.
+    2. The simulation is initialized, which creates all the links between
+       the objects. Its progress is reported for each step of the
+       initialization.
+    """
+
+    READ_PROGRESS = 90
+
+    def __init__(self, parent=None):
+        """Constructor for the SimulationLoader class."""
+        super().__init__(parent)
+        self._size = 0
+        self._lastValue = None
+
+    progressChanged = QtCore.pyqtSignal(int, str)
+
+    def reportProgress(self, value, message):
+        """Emits progressChanged with value percents and message, if value
+        or message changed."""
+        if (value, message) != self._lastValue:
+            self._lastValue = (value, message)
+            self.progressChanged.emit(value, message)
+
+    @staticmethod
+    def streamSize(stream):
+        """
+        :return: the size of the file behind stream, or 0 if it is unknown.
+        :rtype: int
+        """
+        try:
+            return os.fstat(stream.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            return 0
+
+    def read(self, jsonStream, objectHook, size=None):
+        """Reads the JSON document from jsonStream, creating the objects with
+        objectHook as they come.
+
+        :param jsonStream: text or binary file object to read from
+        :param objectHook: the JSON object hook creating the objects
+        :param int size: the size of the stream, for progress reporting. It is
+                         read from the file if not given.
+        :return: the decoded document
+        """
+        self._size = size or self.streamSize(jsonStream)
+        reader = JsonStreamReader(jsonStream, objectHook)
+        self.reportProgress(0, self.tr("Reading simulation"))
+        if reader.peek() != "{":
+            return reader.readValue()
+        document = {}
+        for key in reader.iterObject():
+            document[key] = self._readSection(reader, key)
+        return objectHook(document)
+
+    def _readSection(self, reader, name):
+        """Reads a section of the document one item at a time."""
+        message = self.tr("Reading %s") % name
+        char = reader.peek()
+        if char == "{":
+            section = {}
+            for key in reader.iterObject():
+                section[key] = reader.readValue()
+                self._readProgress(reader, message)
+            return reader.objectHook(section) if reader.objectHook else section
+        elif char == "[":
+            section = []
+            for index in reader.iterArray():
+                section.append(reader.readValue())
+                self._readProgress(reader, message)
+            return section
+        else:
+            return reader.readValue()
+
+    def _readProgress(self, reader, message):
+        """Reports the reading progress."""
+        if self._size:
+            value = min(reader.position * self.READ_PROGRESS // self._size,
+                        self.READ_PROGRESS)
+            self.reportProgress(value, message)
+
+    def load(self, jsonStream, objectHook, simulationClass, simulationWindow,
+             size=None):
+        """Reads a simulation of class simulationClass from jsonStream and
+        initializes it.
+
+        :param jsonStream: text or binary file object to read from
+        :param objectHook: the JSON object hook creating the objects
+        :param simulationClass: the expected class of the simulation
+        :param simulationWindow: the window passed to ``initialize()``
+        :param int size: the size of the stream, if known
+        :return: the initialized simulation
+        """
+        sim = self.read(jsonStream, objectHook, size)
+        return self._initialize(sim, simulationClass, simulationWindow)
+
+    def readArchive(self, zipArchive, objectHook):
+        """Reads the document of a .ts2 archive, from its binary snapshot if
+        it has one, and from its JSON member otherwise.
+
+        :param zipArchive: the opened ``zipfile.ZipFile``
+        :param objectHook: the JSON object hook creating the objects
+        :return: the decoded document
+        """
+        if snapshot.FILE_NAME in zipArchive.namelist():
+            self.reportProgress(0, self.tr("Reading simulation snapshot"))
+            try:
+                return snapshot.loads(zipArchive.read(snapshot.FILE_NAME),
+                                      objectHook)
+            except (utils.FormatException, ValueError, struct.error,
+                    KeyError, IndexError, TypeError) as err:
+                # The JSON member is still valid if the snapshot is damaged
+                QtCore.qWarning("Invalid snapshot, reading JSON instead: %s"
+                                % err)
+        size = zipArchive.getinfo("simulation.json").file_size
+        with zipArchive.open("simulation.json") as file:
+            return self.read(file, objectHook, size)
+
+    def loadArchive(self, zipArchive, objectHook, simulationClass,
+                    simulationWindow):
+        """Reads a simulation of class simulationClass from a .ts2 archive
+        and initializes it.
+
+        :param zipArchive: the opened ``zipfile.ZipFile``
+        :param objectHook: the JSON object hook creating the objects
+        :param simulationClass: the expected class of the simulation
+        :param simulationWindow: the window passed to ``initialize()``
+        :return: the initialized simulation
+        """
+        sim = self.readArchive(zipArchive, objectHook)
+        return self._initialize(sim, simulationClass, simulationWindow)
+
+    def _initialize(self, sim, simulationClass, simulationWindow):
+        """Checks that sim is a simulationClass and initializes it."""
+        if not isinstance(sim, simulationClass):
+            raise utils.FormatException(
+                translate("simulation.load",
+                          "Loaded file is not a TS2 simulation")
+            )
+        self.reportProgress(self.READ_PROGRESS,
+                            self.tr("Initializing simulation"))
+        sim.initializationProgressed.connect(self._initializeProgress)
+        sim.initialize(simulationWindow)
+        self.reportProgress(100, self.tr("Simulation loaded"))
+        return sim
+
+    @QtCore.pyqtSlot(int, int, str)
+    def _initializeProgress(self, step, steps, message):
+        """Reports the progress of the initialization, between
+        READ_PROGRESS and 100."""
+        self.reportProgress(
+            self.READ_PROGRESS + (100 - self.READ_PROGRESS) * step // steps,
+            message
+        )
@@ -23,11 +23,10 @@ import os
 
 from Qt import QtCore, QtGui, QtWidgets, Qt
 
-from ts2 import simulation, utils
-from ts2.gui import dialogs, trainlistview, servicelistview, widgets, \
-    opendialog, settingsdialog
+from ts2 import loader, simulation, utils
+from ts2.gui import dialogs, trainlistview, servicelistview, widgets
 from ts2.scenery import placeitem
-from ts2.editor import editorwindow
+from ts2.game import autosave
 from ts2.utils import settings
 
 from ts2 import __PROJECT_WWW__, __PROJECT_HOME__, __PROJECT_BUGS__, \
@@ -59,6 +58,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Simulation
         self.simulation = None
+        self.autoSaver = None
+        self._loading = False
 
         # Actions  ======================================
         self.openAction = QtWidgets.QAction(self.tr("&Open..."), self)
@@ -346,9 +347,22 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QDockWidget.DockWidgetFloatable
         )
         self.trainListPanel.setObjectName("trains_panel")
+        wid = QtWidgets.QWidget()
+        vb = QtWidgets.QVBoxLayout()
+        vb.setSpacing(0)
+        vb.setContentsMargins(0, 0, 0, 0)
+        wid.setLayout(vb)
+        self.trainFilterEdit = QtWidgets.QLineEdit(self)
+        self.trainFilterEdit.setPlaceholderText(self.tr("Filter trains"))
+        self.trainFilterEdit.setClearButtonEnabled(True)
+        vb.addWidget(self.trainFilterEdit)
         self.trainListView = trainlistview.TrainListView(self)
         self.simulationLoaded.connect(self.trainListView.setupTrainList)
-        self.trainListPanel.setWidget(self.trainListView)
+        self.trainFilterEdit.textChanged.connect(
+            self.trainListView.setFilterText
+        )
+        vb.addWidget(self.trainListView)
+        self.trainListPanel.setWidget(wid)
         self.addDockWidget(Qt.BottomDockWidgetArea, self.trainListPanel)
 
         # Services
@@ -433,6 +447,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.loadSimulation(self.fileName)
 
     def onOpenSimulation(self):
+        from ts2.gui import opendialog
         d = opendialog.OpenDialog(self)
         d.openFile.connect(self.loadSimulation)
         d.exec_()
@@ -442,25 +457,45 @@ class MainWindow(QtWidgets.QMainWindow):
         """This is where stuff happens and the simulation is loaded
 
         """
+        if self._loading:
+            # The progress dialog processes the events while loading
+            return
         if fileName:
 
             # TODO check it exists and normalise path
             self.fileName = fileName
 
+            if self.restoreSimulation(fileName):
+                return
+
             QtWidgets.qApp.setOverrideCursor(Qt.WaitCursor)
 
             if self.simulation is not None:
                 self.simulationDisconnect()
                 self.simulation = None
 
+            simLoader = loader.SimulationLoader(self)
+            progressDialog = QtWidgets.QProgressDialog(
+                self.tr("Loading simulation"), "", 0, 100, self
+            )
+            progressDialog.setCancelButton(None)
+            progressDialog.setWindowModality(Qt.WindowModal)
+            progressDialog.setMinimumDuration(500)
+            simLoader.progressChanged.connect(
+                lambda value, message:
+                self.updateLoadingProgress(progressDialog, value, message)
+            )
+            self._loading = True
             try:
                 if zipfile.is_zipfile(fileName):
                     with zipfile.ZipFile(fileName) as zipArchive:
-                        with zipArchive.open("simulation.json") as file:
-                            self.simulation = simulation.load(self, file)
+                        self.simulation = simulation.loadArchive(
+                            self, zipArchive, simLoader
+                        )
                 else:
                     with open(fileName) as file:
-                        self.simulation = simulation.load(self, file)
+                        self.simulation = simulation.load(self, file,
+                                                          simLoader)
             except (utils.FormatException,
                     utils.MissingDependencyException) as err:
                 QtWidgets.QMessageBox.critical(
@@ -491,11 +526,70 @@ class MainWindow(QtWidgets.QMainWindow):
                 settings.addRecent(fileName)
                 self.refreshRecent()
                 self.setControlsDisabled(False)
+                self.startAutoSaver(fileName)
             finally:
+                self._loading = False
+                progressDialog.close()
+                simLoader.deleteLater()
                 QtWidgets.QApplication.restoreOverrideCursor()
         else:
             self.onOpenSimulation()
 
+    def restoreSimulation(self, fileName):
+        """Restores the game saved in fileName onto the current simulation
+        if it has the same scenery, which is much faster than loading it
+        since the scenery is not created again. The time factor chosen by the
+        user is kept.
+
+        :return: True if the game has been restored, False if it must be
+                 loaded.
+        :rtype: bool
+        """
+        if self.simulation is None or not zipfile.is_zipfile(fileName):
+            return False
+        timeFactor = self.simulation.option("timeFactor")
+        QtWidgets.qApp.setOverrideCursor(Qt.WaitCursor)
+        try:
+            with zipfile.ZipFile(fileName) as zipArchive:
+                if not simulation.restoreArchive(self.simulation,
+                                                 zipArchive):
+                    return False
+        except Exception:
+            # The simulation is loaded from scratch, which reports the error
+            return False
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.simulation.setOption("timeFactor", timeFactor)
+        self.setWindowTitle(self.tr(
+            "ts2 - Train Signalling Simulator - %s") % fileName)
+        self.lblTitle.setText(self.simulation.option("title"))
+        settings.addRecent(fileName)
+        self.refreshRecent()
+        if self.autoSaver is not None:
+            self.autoSaver.stop()
+            self.autoSaver.deleteLater()
+        self.startAutoSaver(fileName)
+        return True
+
+    def startAutoSaver(self, fileName):
+        """Starts autosaving the simulation loaded from fileName."""
+        self.autoSaver = autosave.AutoSaver(
+            self.simulation,
+            os.path.splitext(os.path.basename(fileName))[0], None,
+            self
+        )
+        self.autoSaver.saved.connect(self.onAutoSaved)
+        self.autoSaver.failed.connect(self.onAutoSaveFailed)
+        self.autoSaver.start()
+
+    @staticmethod
+    def updateLoadingProgress(progressDialog, value, message):
+        """Shows the loading progress in progressDialog. Once shown, the
+        modal dialog processes the events when its value is set, while the
+        input to the window is blocked."""
+        progressDialog.setLabelText(message)
+        progressDialog.setValue(value)
+
     def simulationConnect(self):
         """Connects the signals and slots to the simulation."""
 
@@ -551,6 +645,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def simulationDisconnect(self):
         """Disconnects the simulation for deletion."""
+        if self.autoSaver is not None:
+            self.autoSaver.stop()
+            self.autoSaver.deleteLater()
+            self.autoSaver = None
         # Unset models
         self.trainInfoView.setModel(None)
         self.serviceInfoView.setModel(None)
@@ -610,6 +708,20 @@ class MainWindow(QtWidgets.QMainWindow):
                 settings.addRecent(fileName)
                 QtWidgets.QApplication.restoreOverrideCursor()
 
+    @QtCore.pyqtSlot(str)
+    def onAutoSaved(self, fileName):
+        """Shows that the game has been autosaved to fileName."""
+        self.statusBar().showMessage(
+            self.tr("Game autosaved to %s") % fileName, 2000
+        )
+
+    @QtCore.pyqtSlot(str)
+    def onAutoSaveFailed(self, error):
+        """Shows that the autosave failed."""
+        self.statusBar().showMessage(
+            self.tr("Autosave failed: %s") % error, 5000
+        )
+
     @QtCore.pyqtSlot(int)
     def zoom(self, percent):
         transform = QtGui.QTransform()
@@ -651,6 +763,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.buttPause.isChecked():
             self.buttPause.click()
         if not self.editorOpened:
+            from ts2.editor import editorwindow
             self.editorWindow = editorwindow.EditorWindow(self, fileName)
             self.editorWindow.simulationConnect()
             self.editorWindow.closed.connect(self.onEditorClosed)
@@ -706,6 +819,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
         """Save window postions on close"""
+        if self._loading:
+            event.ignore()
+            return
+        if self.autoSaver is not None:
+            self.autoSaver.stop()
         settings.saveWindow(self)
         settings.sync()
         super().closeEvent(event)
@@ -752,8 +870,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.zoomWidget.setDisabled(state)
 
     def openSettingsDialog(self):
+        from ts2.gui import settingsdialog
         d = settingsdialog.SettingsDialog(self)
         d.exec_()
+        if self.autoSaver is not None:
+            self.autoSaver.start()
 
     def centerViewOnTrain(self, trainId):
         """Centers the graphics view on the given train."""
@@ -0,0 +1,148 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+
+class RouteConflicts:
+    """``RouteConflicts`` holds the route to route conflicts of a simulation,
+    computed once at load time, together with the live set of routes that
+    currently hold track items.
+
+    Route A conflicts with route B when B sets up one of the items of A
+    (other than the begin and end signals of A), or the ``conflictTI`` of one
+    of these items. Since points directions are part of a route, two routes
+    crossing the same points in different directions always conflict.
+
+    A route holds a track item from its activation, until the item is
+    released by the passing train or by the route desactivation, or is taken
+    over by another route. The items report it by calling
+    :meth:`~ts2.routing.conflicts.RouteConflicts.itemAcquired` and
+    :meth:`~ts2.routing.conflicts.RouteConflicts.itemReleased`.
+
+    Routes are referred to by their routeNum.
+    """
+
+    def __init__(self, simulation):
+        """Computes the conflicts between the (already initialized) routes of
+        simulation.
+
+        :param simulation: The :class:`~ts2.simulation.Simulation`
+        """
+        self.simulation = simulation
+        self._conflicts = {}
+        self._heldItems = {}
+        self._activeRoutes = set()
+        routesByItem = {}
+        for rte in simulation.routes.values():
+            for pos in rte.positions:
+                routesByItem.setdefault(pos.trackItem.tiId, set()).add(
+                    rte.routeNum
+                )
+        for rte in simulation.routes.values():
+            conflicts = set()
+            for ti in self._checkedItems(rte):
+                conflicts |= routesByItem.get(ti.tiId, set())
+            self._conflicts[rte.routeNum] = frozenset(conflicts)
+
+    @staticmethod
+    def _checkedItems(rte):
+        """
+        :return: the items that must not be held by another route for rte to
+                 be set, i.e. the items of rte other than its begin and end
+                 signals and their conflict items.
+        :rtype: list of :class:`~ts2.scenery.abstract.TrackItem`
+        """
+        items = []
+        for pos in rte.positions:
+            ti = pos.trackItem
+            if ti != rte.beginSignal and ti != rte.endSignal:
+                items.append(ti)
+                if ti.conflictTI is not None:
+                    items.append(ti.conflictTI)
+        return items
+
+    @property
+    def activeRoutes(self):
+        """
+        :return: the routeNum of the routes which currently hold at least one
+                 track item.
+        :rtype: set of int
+        """
+        return self._activeRoutes
+
+    def conflictingRoutes(self, rte):
+        """
+        :param rte: a :class:`~ts2.routing.route.Route`
+        :return: the routeNum of the routes conflicting with rte, including
+                 rte itself if it has items other than its signals.
+        :rtype: frozenset of int
+        """
+        return self._conflicts.get(rte.routeNum, frozenset())
+
+    def blockingRoutes(self, rte):
+        """
+        :param rte: a :class:`~ts2.routing.route.Route`
+        :return: the routes conflicting with rte which currently hold track
+                 items, sorted by routeNum.
+        :rtype: list of :class:`~ts2.routing.route.Route`
+        """
+        routes = self.simulation.routes
+        return [routes[routeNum] for routeNum in
+                sorted(self.conflictingRoutes(rte) & self._activeRoutes)]
+
+    def blockedRoutes(self):
+        """
+        :return: the routes which have conflicting routes currently holding
+                 track items, as a dict mapping the routeNum of each blocked
+                 route to the list of its blocking routes.
+        :rtype: dict
+        """
+        blocked = {}
+        for rte in self.simulation.routes.values():
+            blocking = self.blockingRoutes(rte)
+            if blocking:
+                blocked[rte.routeNum] = blocking
+        return blocked
+
+    def isFree(self, rte):
+        """
+        :param rte: a :class:`~ts2.routing.route.Route`
+        :return: True if no route conflicting with rte holds any track item,
+                 in which case rte can be activated.
+        :rtype: bool
+        """
+        return self.conflictingRoutes(rte).isdisjoint(self._activeRoutes)
+
+    def itemAcquired(self, rte):
+        """Called when rte is set as the active route of a track item."""
+        routeNum = rte.routeNum
+        count = self._heldItems.get(routeNum, 0)
+        self._heldItems[routeNum] = count + 1
+        if count == 0:
+            self._activeRoutes.add(routeNum)
+
+    def itemReleased(self, rte):
+        """Called when rte is no longer the active route of a track item."""
+        routeNum = rte.routeNum
+        count = self._heldItems.get(routeNum, 0) - 1
+        if count > 0:
+            self._heldItems[routeNum] = count
+        else:
+            self._heldItems.pop(routeNum, None)
+            self._activeRoutes.discard(routeNum)
@@ -116,7 +116,15 @@ class Position:
       - one starting from one end of the :class:`~ts2.scenery.abstract.TrackItem`
       - the other starting from the other end.
 
-      You can get the other Position by calling :func:`~ts2.routing.position.Position.reversed`."""
+      You can get the other Position by calling :func:`~ts2.routing.position.Position.reversed`.
+
+    Positions are small mutable value objects: ``+`` and ``-`` return new
+    positions, whereas ``+=``, ``-=``,
+    :func:`~ts2.routing.position.Position.advance` and
+    :func:`~ts2.routing.position.Position.retreat` move the position in place
+    without allocating anything."""
+
+    __slots__ = ('_parameters', '_trackItem', '_previousTI', '_positionOnTI')
 
     def __init__(self, trackItem=None, previousTI=None, positionOnTI=0.0,
                  parameters=None):
@@ -178,6 +186,16 @@ class Position:
                 to   :class:`~ts2.routing.position.Position.previousTI`"""
         return float(self._positionOnTI)
 
+    def trackGraph(self):
+        """
+        :return: the compiled track graph of the simulation of this position's
+                 trackItem, if any.
+        :rtype: :class:`~ts2.routing.trackgraph.TrackGraph` or None
+        """
+        if self._trackItem is None or self._trackItem.simulation is None:
+            return None
+        return self._trackItem.simulation.trackGraph
+
     def next(self, pos=0, direction=-1):
         """
         :param pos: metre position
@@ -222,6 +240,12 @@ class Position:
                  ahead of current position, otherwise zero
         :rtype: float
         """
+        graph = self.trackGraph()
+        if graph is not None:
+            s = graph.slotOfPosition(self)
+            if s >= 0:
+                return graph.distanceFromSlot(s, self.positionOnTI,
+                                              p.trackItem, p.positionOnTI)
         if self.trackItem != p.trackItem:
             res = self.trackItem.realLength - self.positionOnTI
             cur = self.next()
@@ -244,6 +268,11 @@ class Position:
                  of position p.
         :rtype: a ``list`` of :class:`~ts2.scenery.abstract.TrackItem`'s
         """
+        graph = self.trackGraph()
+        if graph is not None:
+            s = graph.slotOfPosition(self)
+            if s >= 0:
+                return graph.trackItemsFromSlot(s, p.trackItem)
         til = []
         cur = self
         while cur.trackItem != p.trackItem and not cur.isOut():
@@ -331,20 +360,67 @@ class Position:
         """
         return not (self == p)
 
+    def copy(self):
+        """
+        :return: a new Position equal to this one.
+        :rtype: :class:`~ts2.routing.position.Position`
+        """
+        return Position(self._trackItem, self._previousTI, self._positionOnTI)
+
+    def setTo(self, p):
+        """Moves this position in place to the same place as p.
+
+        :param p: the position to copy
+        :type p: :class:`~ts2.routing.position.Position`
+        """
+        self._trackItem = p._trackItem
+        self._previousTI = p._previousTI
+        self._positionOnTI = p._positionOnTI
+
+    def advance(self, length):
+        """Moves this position in place length meters ahead, following the
+        points as they are set.
+
+        :param float length: meters to move ahead
+        """
+        trackItem = self._trackItem
+        previousTI = self._previousTI
+        positionOnTI = self._positionOnTI
+        while positionOnTI + length >= trackItem.realLength:
+            length = length + positionOnTI - trackItem.realLength
+            trackItem, previousTI = \
+                trackItem.getFollowingItem(previousTI), trackItem
+            positionOnTI = 0
+        self._trackItem = trackItem
+        self._previousTI = previousTI
+        self._positionOnTI = positionOnTI + length
+
+    def retreat(self, length):
+        """Moves this position in place length meters behind.
+
+        :param float length: meters to move back
+        """
+        trackItem = self._trackItem
+        previousTI = self._previousTI
+        positionOnTI = self._positionOnTI
+        while positionOnTI - length <= 0:
+            length = length - positionOnTI
+            trackItem, previousTI = \
+                previousTI, previousTI.getFollowingItem(trackItem)
+            positionOnTI = trackItem.realLength
+        self._trackItem = trackItem
+        self._previousTI = previousTI
+        self._positionOnTI = positionOnTI - length
+
     def __add__(self, length):
         """
         :param float length:  meters to add to this position
         :return: the position that is length meters ahead of this position.
         :rtype: :class:`~ts2.routing.position.Position`
         """
-        if self._positionOnTI + length < self._trackItem.realLength:
-            return Position(self._trackItem,
-                            self._previousTI,
-                            self._positionOnTI + length)
-        else:
-            return self.next() + (length +
-                                  self._positionOnTI -
-                                  self._trackItem.realLength)
+        res = self.copy()
+        res.advance(length)
+        return res
 
     def __sub__(self, length):
         """Returns the position that is length meters behind this Position.
@@ -353,32 +429,28 @@ class Position:
         :return: The new position
         :rtype: :class:`~ts2.routing.position.Position`
         """
-        if self._positionOnTI - length > 0:
-            return Position(self._trackItem,
-                            self._previousTI,
-                            self._positionOnTI - length)
-        else:
-            return (self.previous(self._previousTI.realLength) -
-                    (length - self._positionOnTI))
+        res = self.copy()
+        res.retreat(length)
+        return res
 
-    # noinspection PyMethodFirstArgAssignment
     def __iadd__(self, length):
-        """Implements Position += length operator.
+        """Implements Position += length operator, moving this position in
+        place.
 
-        :return: new position
+        :return: this position
         :rtype: :class:`~ts2.routing.position.Position`
         """
-        self = self + length
+        self.advance(length)
         return self
 
-    # noinspection PyMethodFirstArgAssignment
     def __isub__(self, length):
-        """Implements Position -= length operator.
+        """Implements Position -= length operator, moving this position in
+        place.
 
-        :return: new position
+        :return: this position
         :rtype: :class:`~ts2.routing.position.Position`
         """
-        self = self - length
+        self.retreat(length)
         return self
 
     def __str__(self):
@@ -116,6 +116,7 @@ class Route(QtCore.QObject):
         self._initialState = parameters.get('initialState', 0)
         self._persistent = False
         self._positions = []
+        self._valid = False
 
     def initialize(self, simulation):
         """Initializes the route once all trackitems are loaded."""
@@ -165,6 +166,16 @@ class Route(QtCore.QObject):
         """Returns the positions list of this route."""
         return self._positions
 
+    @property
+    def isValid(self):
+        """
+        :return: True if the last call to
+                 :func:`~ts2.routing.route.Route.createPositionsList` linked
+                 the begin signal with the end signal.
+        :rtype: bool
+        """
+        return self._valid
+
     @property
     def routeNum(self):
         """Returns this route number"""
@@ -180,6 +191,28 @@ class Route(QtCore.QObject):
         """Returns the SignalItem where this route ends."""
         return self._positions[-1].trackItem
 
+    @property
+    def beginSignalId(self):
+        """
+        :return: the tiId of the signal where this route starts, which is
+                 known before the route is initialized.
+        :rtype: int
+        """
+        if self._parameters:
+            return self._parameters['beginSignal']
+        return self.beginSignal.tiId
+
+    @property
+    def endSignalId(self):
+        """
+        :return: the tiId of the signal where this route ends, which is
+                 known before the route is initialized.
+        :rtype: int
+        """
+        if self._parameters:
+            return self._parameters['endSignal']
+        return self.endSignal.tiId
+
     @property
     def initialState(self):
         """
@@ -242,6 +275,7 @@ class Route(QtCore.QObject):
         it = 1
         while not cur.isOut():
             if cur == self._positions[-1]:
+                self._valid = True
                 return True
             self._positions.insert(it, cur)
             it += 1
@@ -256,6 +290,7 @@ class Route(QtCore.QObject):
             cur = cur.next(0, self._directions.get(cur.trackItem.tiId, -1))
         QtCore.qCritical(self.tr("Invalid route %i. Impossible to link "
                                  "beginSignal with endSignal" % self.routeNum))
+        self._valid = False
         return False
 
     def links(self, si1, si2):
@@ -272,29 +307,35 @@ class Route(QtCore.QObject):
     def activate(self, persistent=False):
         """ Called by the simulation when the route is
         activated."""
-        for pos in self._positions:
-            pos.trackItem.setActiveRoute(self, pos.previousTI)
-        self.endSignal.previousActiveRoute = self
-        self.beginSignal.nextActiveRoute = self
-        self.persistent = persistent
-        self.routeSelected.emit()
+        with self.simulation.signalUpdateQueue.batch():
+            for pos in self._positions:
+                pos.trackItem.setActiveRoute(self, pos.previousTI)
+            self.endSignal.previousActiveRoute = self
+            self.beginSignal.nextActiveRoute = self
+            self.persistent = persistent
+            self.routeSelected.emit()
 
     def desactivate(self):
         """Called by the simulation when the route is
         desactivated."""
-        self.beginSignal.resetNextActiveRoute(self)
-        self.endSignal.resetPreviousActiveRoute()
-        for pos in self._positions:
-            if pos.trackItem.activeRoute is None or \
-               pos.trackItem.activeRoute == self:
-                pos.trackItem.resetActiveRoute()
-        self.routeUnselected.emit()
+        with self.simulation.signalUpdateQueue.batch():
+            self.beginSignal.resetNextActiveRoute(self)
+            self.endSignal.resetPreviousActiveRoute()
+            for pos in self._positions:
+                if pos.trackItem.activeRoute is None or \
+                   pos.trackItem.activeRoute == self:
+                    pos.trackItem.resetActiveRoute()
+            self.routeUnselected.emit()
 
     def isActivable(self):
         """
         :return: ``True`` - if this route can be activated, i.e. that no other
                     active route is conflicting with this route.
         """
+        routeConflicts = self.simulation.routeConflicts
+        if routeConflicts is not None and routeConflicts.isFree(self):
+            # No conflicting route holds any item: nothing to check
+            return True
         flag = False
         for pos in self._positions:
             if pos.trackItem != self.beginSignal and \
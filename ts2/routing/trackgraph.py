@@ -0,0 +1,304 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+from array import array
+
+from ts2.scenery import enditem, invisiblelinkitem, lineitem, placeitem, \
+    platformitem, pointsitem, textitem
+from ts2.scenery.signals import signalitem
+
+
+class ItemType:
+    """Type codes of the items in a :class:`~ts2.routing.trackgraph.TrackGraph`
+    """
+    OTHER = 0
+    LINE = 1
+    INVISIBLE_LINK = 2
+    SIGNAL = 3
+    POINTS = 4
+    END = 5
+    PLATFORM = 6
+    PLACE = 7
+    TEXT = 8
+
+
+def itemTypeOf(trackItem):
+    """
+    :return: the :class:`~ts2.routing.trackgraph.ItemType` code of trackItem
+    :rtype: int
+    """
+    if isinstance(trackItem, invisiblelinkitem.InvisibleLinkItem):
+        return ItemType.INVISIBLE_LINK
+    elif isinstance(trackItem, lineitem.LineItem):
+        return ItemType.LINE
+    elif isinstance(trackItem, signalitem.SignalItem):
+        return ItemType.SIGNAL
+    elif isinstance(trackItem, pointsitem.PointsItem):
+        return ItemType.POINTS
+    elif isinstance(trackItem, enditem.EndItem):
+        return ItemType.END
+    elif isinstance(trackItem, platformitem.PlatformItem):
+        return ItemType.PLATFORM
+    elif isinstance(trackItem, placeitem.Place):
+        return ItemType.PLACE
+    elif isinstance(trackItem, textitem.TextItem):
+        return ItemType.TEXT
+    return ItemType.OTHER
+
+
+class TrackGraph:
+    """A ``TrackGraph`` is a compiled, integer indexed, view of the track
+    topology of a simulation.
+
+    Each :class:`~ts2.scenery.abstract.TrackItem` gets an index ``i`` and
+    three *slots* ``3*i + side``, one per end of the item through which a train
+    can enter it:
+
+    - side 0: entering from the ``previousItem`` (i.e. the common end for
+      points),
+    - side 1: entering from the ``nextItem`` (i.e. the normal end for points,
+      or from outside the scenery for an :class:`~ts2.scenery.enditem.EndItem`)
+    - side 2: entering from the ``reverseItem`` of points.
+
+    A slot is therefore the integer equivalent of the ``(trackItem,
+    previousTI)`` pair of a :class:`~ts2.routing.position.Position`. The
+    ``next`` table gives, for each slot, the slot of the following item, or -1
+    when going out of the scenery, and the ``exits`` table gives the side of the
+    item through which a train leaves it. Only the common end slot of points
+    depends on the points state, and it is updated by
+    :meth:`~ts2.routing.trackgraph.TrackGraph.setPointsReversed`, which also
+    increments the ``versions`` counter of the points so that cached walks
+    over the graph can be invalidated.
+    """
+
+    def __init__(self, simulation):
+        """Builds the graph from the (already linked) track items of
+        simulation.
+
+        :param simulation: The :class:`~ts2.simulation.Simulation` to compile
+        """
+        self.simulation = simulation
+        self._items = list(simulation.trackItems.values())
+        self._indexes = {}
+        count = len(self._items)
+        self.lengths = array('d', [0.0]) * count
+        self.maxSpeeds = array('d', [0.0]) * count
+        self.types = array('b', [ItemType.OTHER]) * count
+        self.neighbours = array('l', [-1]) * (3 * count)
+        self.links = array('l', [-1]) * (3 * count)
+        self.exits = array('b', [0]) * (3 * count)
+        self.next = array('l', [-1]) * (3 * count)
+        self.versions = array('l', [0]) * count
+        for i, ti in enumerate(self._items):
+            self._indexes[ti.tiId] = i
+        for i, ti in enumerate(self._items):
+            itemType = itemTypeOf(ti)
+            self.types[i] = itemType
+            self.lengths[i] = ti.realLength
+            self.maxSpeeds[i] = ti.maxSpeed
+            self.neighbours[3 * i] = self._indexOf(ti.previousItem)
+            self.neighbours[3 * i + 1] = self._indexOf(ti.nextItem)
+            if itemType == ItemType.POINTS:
+                self.neighbours[3 * i + 2] = self._indexOf(ti.reverseItem)
+        for s in range(3 * count):
+            neighbour = self.neighbours[s]
+            if neighbour >= 0:
+                self.links[s] = self._sideTowards(neighbour, s // 3)
+        for i, ti in enumerate(self._items):
+            itemType = self.types[i]
+            if itemType == ItemType.POINTS:
+                self.exits[3 * i] = 2 if ti.pointsReversed else 1
+                self.exits[3 * i + 1] = 0
+                self.exits[3 * i + 2] = 0
+            else:
+                self.exits[3 * i] = 1
+                self.exits[3 * i + 1] = 0
+            for side in range(3):
+                s = 3 * i + side
+                self.next[s] = self.links[3 * i + self.exits[s]]
+
+    def _indexOf(self, trackItem):
+        """
+        :return: the index of trackItem in the graph, or -1 for None
+        :rtype: int
+        """
+        if trackItem is None:
+            return -1
+        return self._indexes[trackItem.tiId]
+
+    def _sideTowards(self, i, j):
+        """
+        :return: the slot of item i through which one enters it when coming
+                 from item j, or -1 if they are not linked.
+        :rtype: int
+        """
+        for side in range(3):
+            if self.neighbours[3 * i + side] == j:
+                return 3 * i + side
+        return -1
+
+    def __len__(self):
+        """
+        :return: the number of items in the graph
+        :rtype: int
+        """
+        return len(self._items)
+
+    def index(self, trackItem):
+        """
+        :param trackItem: a :class:`~ts2.scenery.abstract.TrackItem` of the
+                          simulation
+        :return: the index of trackItem in the graph
+        :rtype: int
+        """
+        return self._indexes[trackItem.tiId]
+
+    def item(self, index):
+        """
+        :param int index: an item index
+        :return: the :class:`~ts2.scenery.abstract.TrackItem` with this index
+        """
+        return self._items[index]
+
+    def slot(self, trackItem, previousTI):
+        """
+        :return: the slot corresponding to a position on trackItem coming from
+                 previousTI, or -1 if both items are not linked.
+        :rtype: int
+        """
+        return self._sideTowards(self._indexes[trackItem.tiId],
+                                 self._indexOf(previousTI))
+
+    def slotOfPosition(self, pos):
+        """
+        :param pos: A :class:`~ts2.routing.position.Position`
+        :return: the slot of pos, or -1 for a null position.
+        :rtype: int
+        """
+        if pos.trackItem is None:
+            return -1
+        return self.slot(pos.trackItem, pos.previousTI)
+
+    def previousTI(self, s):
+        """
+        :return: the :class:`~ts2.scenery.abstract.TrackItem` from which one
+                 enters the item of slot s.
+        """
+        neighbour = self.neighbours[s]
+        return self._items[neighbour] if neighbour >= 0 else None
+
+    def nextSlot(self, s, direction=-1):
+        """
+        :param int s: the current slot
+        :param int direction: for the common end of points, 0 forces the
+                              normal end, a positive value forces the reverse
+                              end and a negative value follows the points.
+        :return: the slot of the item following slot s, or -1 if going out
+                 of the scenery.
+        :rtype: int
+        """
+        if direction >= 0 and s % 3 == 0 and \
+                self.types[s // 3] == ItemType.POINTS:
+            return self.links[s + (2 if direction > 0 else 1)]
+        return self.next[s]
+
+    def reversedSlot(self, s):
+        """
+        :return: the slot of the same item, running in the opposite direction.
+        :rtype: int
+        """
+        return s - s % 3 + self.exits[s]
+
+    def previousSlot(self, s):
+        """
+        :return: the slot of the item from which one enters slot s, running in
+                 the same direction, or -1 if there is none.
+        :rtype: int
+        """
+        link = self.links[s]
+        if link < 0:
+            return -1
+        return self.reversedSlot(link)
+
+    def isOut(self, s):
+        """
+        :return: True if slot s is on an :class:`~ts2.scenery.enditem.EndItem`
+                 going outwards, as
+                 :meth:`~ts2.routing.position.Position.isOut`.
+        :rtype: bool
+        """
+        return s % 3 == 0 and self.types[s // 3] == ItemType.END
+
+    def trackItemsFromSlot(self, s, trackItem):
+        """Implements :meth:`~ts2.routing.position.Position.trackItemsToPosition`
+        from slot s.
+
+        :return: the list of the items from slot s up to trackItem included,
+                 stopping at the end of the scenery.
+        :rtype: list of :class:`~ts2.scenery.abstract.TrackItem`
+        """
+        target = self._indexes[trackItem.tiId]
+        items = self._items
+        types = self.types
+        nextSlots = self.next
+        til = []
+        while s >= 0 and s // 3 != target and \
+                not (s % 3 == 0 and types[s // 3] == ItemType.END):
+            til.append(items[s // 3])
+            s = nextSlots[s]
+        til.append(trackItem)
+        return til
+
+    def distanceFromSlot(self, s, positionOnTI, trackItem, targetPositionOnTI):
+        """Implements :meth:`~ts2.routing.position.Position.distanceToPosition`
+        from slot s.
+
+        :return: the distance from positionOnTI on slot s to
+                 targetPositionOnTI on trackItem, zero if it is behind, or -1
+                 if trackItem cannot be reached.
+        :rtype: float
+        """
+        target = self._indexes[trackItem.tiId]
+        if s // 3 == target:
+            return max(targetPositionOnTI - positionOnTI, 0)
+        lengths = self.lengths
+        nextSlots = self.next
+        res = lengths[s // 3] - positionOnTI
+        s = nextSlots[s]
+        while s // 3 != target:
+            if s < 0:
+                return -1
+            res += lengths[s // 3]
+            s = nextSlots[s]
+        return max(res + targetPositionOnTI, 0)
+
+    def setPointsReversed(self, pointsItem, rev):
+        """Updates the common end slot of the given points.
+
+        :param pointsItem: a :class:`~ts2.scenery.pointsitem.PointsItem`
+        :param bool rev: the new state of the points
+        """
+        i = self._indexes[pointsItem.tiId]
+        s = 3 * i
+        exitSide = 2 if rev else 1
+        if self.exits[s] != exitSide:
+            self.exits[s] = exitSide
+            self.next[s] = self.links[s + exitSide]
+            self.versions[i] += 1
@@ -63,6 +63,16 @@ def qPointFDetupler(attr):
     return setter
 
 
+# Property lists of the TrackItem classes, by (class, multi)
+_propertiesCache = {}
+
+
+def clearPropertiesCache():
+    """Clears the property lists shared by the track items, so that they are
+    created again, e.g. when the signal types available have changed."""
+    _propertiesCache.clear()
+
+
 class TrackItem(QtCore.QObject):
     """A ``TrackItem`` is a piece of scenery and is a **base class**. Each item
     has defined coordinates in the scenery layout and is connected to other
@@ -103,8 +113,6 @@ class TrackItem(QtCore.QObject):
         self._conflictTrackItem = None
         self._gi = {}
         self.toBeDeselected = False
-        self.properties = self.getProperties()
-        self.multiProperties = self.getMultiProperties()
 
     def initialize(self, simulation):
         """Initialize the item after all items are loaded."""
@@ -120,6 +128,10 @@ class TrackItem(QtCore.QObject):
         )
         self._parameters = None
         for gi in self._gi.values():
+            if simulation.context == utils.Context.GAME:
+                # Drawn from a pixmap of the item at the scale of the view,
+                # until the item is updated or the scale changes
+                gi.setCacheMode(QtWidgets.QGraphicsItem.DeviceCoordinateCache)
             simulation.registerGraphicsItem(gi)
         self.updateGraphics()
 
@@ -146,6 +158,43 @@ class TrackItem(QtCore.QObject):
                                   translate("TrackItem",
                                             "Maximum speed (m/s)"))]
 
+    @classmethod
+    def sharedProperties(cls, multi=False):
+        """
+        :param bool multi: whether to return the properties editable on a
+                           selection of items of different types
+        :return: the list given by getProperties() (or getMultiProperties()
+                 if multi) for this class. It is created once and shared by
+                 all the items of the class.
+        :rtype: list
+        """
+        key = (cls, multi)
+        props = _propertiesCache.get(key)
+        if props is None:
+            if multi:
+                props = cls.getMultiProperties()
+            else:
+                props = cls.getProperties()
+            _propertiesCache[key] = props
+        return props
+
+    @property
+    def properties(self):
+        """
+        :return: the properties of this item shown in the editor.
+        :rtype: list of :class:`~ts2.scenery.helper.TIProperty`
+        """
+        return self.sharedProperties()
+
+    @property
+    def multiProperties(self):
+        """
+        :return: the properties shown in the editor when items of different
+                 types are selected together.
+        :rtype: list of :class:`~ts2.scenery.helper.TIProperty`
+        """
+        return self.sharedProperties(multi=True)
+
     def for_json(self):
         """
         :return: Dumps this item to JSON.
@@ -384,6 +433,11 @@ class TrackItem(QtCore.QObject):
         :param r: The newly active Route on this TrackItem.
         :param previous: The previous :class:`~ts2.scenery.abstract.TrackItem`
                on this route (to know the direction)."""
+        routeConflicts = self.simulation.routeConflicts
+        if routeConflicts is not None:
+            if self.activeRoute is not None:
+                routeConflicts.itemReleased(self.activeRoute)
+            routeConflicts.itemAcquired(r)
         self.activeRoute = r
         self.activeRoutePreviousItem = previous
         self.updateGraphics()
@@ -391,10 +445,23 @@ class TrackItem(QtCore.QObject):
     def resetActiveRoute(self):
         """Resets the activeRoute and activeRoutePreviousItem informations. It
         is called upon route desactivation."""
+        routeConflicts = self.simulation.routeConflicts
+        if routeConflicts is not None and self.activeRoute is not None:
+            routeConflicts.itemReleased(self.activeRoute)
         self.activeRoute = None
         self.activeRoutePreviousItem = None
         self.updateGraphics()
 
+    def resetState(self):
+        """Resets the state of this item in a game (active route and trains)
+        to the one it has when the simulation is loaded."""
+        if self.activeRoute is not None:
+            self.resetActiveRoute()
+        if self._trains:
+            self._trains = []
+            self.trainLeavesItem.emit()
+            self.updateTrainHeadAndTail()
+
     def registerTrain(self, train):
         """Registers the given train on this trackItem.
 
@@ -412,7 +479,7 @@ class TrackItem(QtCore.QObject):
 
         :param train: Train instance to unregister
         """
-        trainTail = train.trainHead - train.trainType.length
+        trainTail = train.trainTail
         if trainTail.trackItem != self and train in self._trains:
             self._trains.remove(train)
             if not self._trains:
@@ -438,7 +505,7 @@ class TrackItem(QtCore.QObject):
                     th = trainHead.positionOnTI
                 else:
                     tt = self.realLength - trainHead.positionOnTI
-            trainTail = train.trainHead - train.trainType.length
+            trainTail = train.trainTail
             if trainTail.trackItem == self:
                 if trainTail.previousTI == self.previousItem:
                     tt = trainTail.positionOnTI
@@ -22,6 +22,41 @@ from Qt import QtCore, QtWidgets, Qt
 
 translate = QtCore.QCoreApplication.translate
 
+# Levels of detail, i.e. scales of the view (1 at 100% zoom), below which the
+# scenery is drawn with less details.
+LOD_TEXT = 0.5
+"""Below this level, texts (berths, place names, text items) are not drawn"""
+LOD_SIGNAL_HEADS = 0.35
+"""Below this level, the heads of a signal are drawn as a colored square"""
+LOD_STROKES = 0.35
+"""Below this level, tracks are drawn with pens of 1 pixel"""
+
+
+def levelOfDetail(painter):
+    """
+    :param painter: the ``QPainter`` drawing a graphics item
+    :return: the level of detail at which painter draws, i.e. the scale of
+             the view
+    :rtype: float
+    """
+    return QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+        painter.worldTransform()
+    )
+
+
+def simplifyPen(pen, painter):
+    """Makes pen a cosmetic pen of 1 pixel if painter draws below
+    :data:`LOD_STROKES`, since wider pens are much slower to draw and
+    thinner than a pixel at this scale anyway.
+
+    :param pen: the ``QPen`` to draw tracks with
+    :param painter: the ``QPainter`` drawing a graphics item
+    :return: pen
+    """
+    if levelOfDetail(painter) < LOD_STROKES:
+        pen.setWidth(0)
+    return pen
+
 
 class TrackGraphicsItem(QtWidgets.QGraphicsItem):
     """Graphical item of a trackItem
@@ -37,6 +37,10 @@ class InvisibleLinkItem(lineitem.LineItem):
 
     # ## Methods ########################################################
 
+    def updateHighlight(self):
+        """Does nothing as this is an invisible link."""
+        pass
+
     def updateTrain(self):
         """Does nothing as this is an invisible link."""
         pass
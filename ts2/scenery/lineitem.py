@@ -39,7 +39,7 @@ class LineItem(abstract.ResizableItem):
         self._placeCode = parameters["placeCode"]
         self._trackCode = ""
         self._realLength = parameters.get('realLength', 1.0)
-        self.defaultZValue = 1
+        self.defaultZValue = 0
         self._line = QtCore.QLineF()
         self._boundingRect = QtCore.QRectF()
         self.updateGeometry()
@@ -48,6 +48,8 @@ class LineItem(abstract.ResizableItem):
         gli.setZValue(self.defaultZValue)
         self._gi[0] = gli
         self._tli = []
+        self._hli = None
+        self._drawnOccupation = None
 
     def initialize(self, simulation):
         """Initialize the item after all items are loaded."""
@@ -188,16 +190,42 @@ class LineItem(abstract.ResizableItem):
 
     @QtCore.pyqtSlot()
     def updateGraphics(self):
-        """Updates the TrackGraphicsItem owned by this LineItem"""
+        """Updates the TrackGraphicsItem owned by this LineItem. During the
+        game, the line itself does not change: only the trains and the active
+        route overlaid on it are updated."""
         if self.simulation.context == utils.Context.GAME:
+            self.updateHighlight()
             self.updateTrain()
-        else:
-            super().updateGraphics()
+            return
+        if not self.selected:
+            if self.highlighted:
+                # To have the activated line overlap crossing lines if any
+                self.graphicsItem.setZValue(6)
+            else:
+                self.graphicsItem.setZValue(self.defaultZValue)
+        super().updateGraphics()
+
+    def updateHighlight(self):
+        """Shows the active route on this line, if any, with a line item
+        overlaid on the line."""
+        if self.simulation.headless:
+            return
+        queue = self.simulation.trainGraphicsQueue
+        if self.highlighted:
+            if self._hli is None:
+                self._hli = queue.acquireLineItem(highlight=True)
+            self._hli.setLine(self.sceneLine)
+        elif self._hli is not None:
+            queue.releaseLineItem(self._hli, highlight=True)
+            self._hli = None
 
     def updateTrain(self):
-        """Updates the graphics for trains movements only"""
-        self.drawTrain()
-        super().updateGraphics()
+        """Updates the graphics for trains movements only. The drawing is
+        done by the :class:`~ts2.scenery.traingraphics.TrainGraphicsQueue`
+        of the simulation, once per step."""
+        if self.simulation.headless:
+            return
+        self.simulation.trainGraphicsQueue.update(self)
 
     # ## Graphics Methods ###############################################
 
@@ -250,12 +278,11 @@ class LineItem(abstract.ResizableItem):
         """This function is called by the owned TrackGraphicsItem to paint its
         painter. Draws the line."""
         super().graphicsPaint(p, options, itemId, widget)
-        if self.highlighted:
-            # To have the activated line overlap crossing lines if any
-            self.graphicsItem.setZValue(6)
-        else:
-            self.graphicsItem.setZValue(0)
         pen = self.getPen()
+        if self.simulation.context == utils.Context.GAME:
+            # The active route is overlaid by updateHighlight()
+            pen.setColor(Qt.darkGray)
+        pen = helper.simplifyPen(pen, p)
         p.setPen(pen)
         p.drawLine(self.line)
         if self.simulation.context == utils.Context.EDITOR_SCENERY:
@@ -263,55 +290,55 @@ class LineItem(abstract.ResizableItem):
             self.drawConnectionRect(p, self.line.p2())
 
     def drawTrain(self):
-        """Draws the train(s) on the line, if any"""
-        tlines = []
+        """Draws the train(s) on the line, if any. Nothing is done if the
+        trains on the line have not moved since the last drawing. The line
+        itself is not updated, since it does not depend on the trains."""
+        if self.simulation.headless:
+            return
+        occupation = None
         if self.simulation.context == utils.Context.GAME and \
            self.trainPresent():
-            if int(self.simulation.option("trackCircuitBased")) == 0:
-                for i in range(len(self._trainHeads)):
-                    tlines.append(QtCore.QLineF(
-                        self.sceneLine.pointAt(self._trainHeads[i] /
-                                               self._realLength),
-                        self.sceneLine.pointAt(self._trainTails[i] /
-                                               self._realLength)
-                    ))
-                    if tlines[i].length() < 5.0 and self._trainTails[i] != 0:
+            trackCircuitBased = int(
+                self.simulation.option("trackCircuitBased")
+            )
+            if trackCircuitBased == 0:
+                occupation = (tuple(self._trainHeads),
+                              tuple(self._trainTails))
+            else:
+                occupation = trackCircuitBased
+        if occupation == self._drawnOccupation:
+            return
+        self._drawnOccupation = occupation
+        tlines = []
+        if occupation is not None:
+            sceneLine = self.sceneLine
+            if trackCircuitBased == 0:
+                length = sceneLine.length()
+                for head, tail in zip(self._trainHeads, self._trainTails):
+                    tline = QtCore.QLineF(
+                        sceneLine.pointAt(head / self._realLength),
+                        sceneLine.pointAt(tail / self._realLength)
+                    )
+                    if tline.length() < 5.0 and tail != 0:
                         # Make sure that the train representation is always
                         # at least 5 pixel long.
-                        tlines[i].setLength(
-                            min(5.0,
-                                (1 - self._trainTails[i] / self._realLength) *
-                                self.sceneLine.length()))
+                        tline.setLength(
+                            min(5.0, (1 - tail / self._realLength) * length)
+                        )
+                    tlines.append(tline)
             else:
-                tlines = [self.sceneLine]
+                tlines = [sceneLine]
         self.showTrainLineItem(tlines)
 
     def showTrainLineItem(self, lines):
         """Shows the given lines (representing trains) on the scenery."""
-        if lines:
-            # Set the pen
-            p = QtGui.QPen()
-            p.setWidth(3)
-            p.setJoinStyle(Qt.RoundJoin)
-            p.setCapStyle(Qt.RoundCap)
-            p.setColor(Qt.red)
-            for i in range(len(lines)):
-                try:
-                    self._tli[i].setLine(lines[i])
-                except IndexError:
-                    newTli = QtWidgets.QGraphicsLineItem()
-                    newTli.setCursor(Qt.ArrowCursor)
-                    newTli.setPen(p)
-                    newTli.setZValue(10)
-                    newTli.setLine(lines[i])
-                    self.simulation.registerGraphicsItem(newTli)
-                    self._tli.append(newTli)
-                    newTli.show()
-                self._tli[i].update()
-        for i in range(len(lines), len(self._tli)):
-            self._tli[i].hide()
-            self._tli[i].update()
-            del self._tli[i]
+        queue = self.simulation.trainGraphicsQueue
+        while len(self._tli) > len(lines):
+            queue.releaseLineItem(self._tli.pop())
+        while len(self._tli) < len(lines):
+            self._tli.append(queue.acquireLineItem())
+        for tli, line in zip(self._tli, lines):
+            tli.setLine(line)
 
     def graphicsMousePressEvent(self, event, itemId):
         """This function is called by the owned TrackGraphicsItem to handle
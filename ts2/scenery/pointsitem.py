@@ -278,6 +278,10 @@ class PointsItem(abstract.TrackItem):
     def pointsReversed(self, rev):
         """Setter function for the pointsReversed property"""
         self._pointsReversed = True if rev else False
+        if self.simulation is not None and \
+                self.simulation.trackGraph is not None:
+            self.simulation.trackGraph.setPointsReversed(self,
+                                                         self._pointsReversed)
 
     @property
     def commonItem(self):
@@ -352,6 +356,13 @@ class PointsItem(abstract.TrackItem):
             self.pointsReversed = True
         super().setActiveRoute(r, previous)
 
+    def resetState(self):
+        """Resets the state of this item (see TrackItem.resetState()). Here,
+        the points are also set back to normal."""
+        super().resetState()
+        self.pointsReversed = False
+        self.updateGraphics()
+
     # ## Graphics methods ###############################################
 
     def graphicsPaint(self, p, options, itemId, widget=None):
@@ -377,7 +388,7 @@ class PointsItem(abstract.TrackItem):
         else:
             if self.trainPresent():
                 pen.setColor(Qt.red)
-            p.setPen(pen)
+            p.setPen(helper.simplifyPen(pen, p))
             p.drawLine(self.commonEnd, self.middle)
             if self.pointsReversed:
                 p.drawLine(self.reverseEnd, self.middle)
@@ -0,0 +1,117 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+import collections
+import contextlib
+
+from Qt import QtCore
+
+
+class SignalUpdateQueue:
+    """A ``SignalUpdateQueue`` de-duplicates the updates of the signal
+    aspects of a simulation.
+
+    Instead of computing its aspect at once,
+    :meth:`~ts2.scenery.signals.signalitem.SignalItem.updateSignalState`
+    marks the signal as dirty. When the outermost update (or
+    :meth:`~ts2.scenery.signals.propagation.SignalUpdateQueue.batch` block)
+    returns, the queue settles: dirty signals are evaluated until none is
+    left. The updates requested by the evaluations themselves (previous
+    signals of a route, signals listening to ``aspectChanged``) are queued in
+    turn instead of being computed recursively.
+
+    Since the aspect of a signal depends on the aspect of its next signal,
+    a dirty next signal is always evaluated before the signals behind it, so
+    that a chain of signals is evaluated from its end. Each signal is
+    evaluated at most ``MAX_EVALUATIONS`` times per settlement, which bounds
+    the work done on loops of signals.
+    """
+
+    MAX_EVALUATIONS = 4
+
+    def __init__(self):
+        """Constructor for the SignalUpdateQueue class."""
+        self._dirty = collections.OrderedDict()
+        self._evaluations = {}
+        self._depth = 0
+
+    def __len__(self):
+        """
+        :return: the number of dirty signals
+        :rtype: int
+        """
+        return len(self._dirty)
+
+    def update(self, signalItem):
+        """Marks signalItem as dirty and settles the queue, unless an update
+        or a batch is already in progress, in which case the signal will be
+        evaluated when it ends.
+
+        :param signalItem: A
+        :class:`~ts2.scenery.signals.signalitem.SignalItem`
+        """
+        self._dirty[signalItem.tiId] = signalItem
+        if self._depth == 0:
+            self.settle()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager deferring the evaluation of the signals updated
+        within the block to its end."""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+        if self._depth == 0:
+            self.settle()
+
+    def settle(self):
+        """Evaluates the dirty signals until none is left."""
+        self._depth += 1
+        try:
+            while self._dirty:
+                tiId = next(iter(self._dirty))
+                self._settleSignal(self._dirty[tiId])
+        finally:
+            self._depth -= 1
+            self._evaluations.clear()
+
+    def _settleSignal(self, signalItem):
+        """Evaluates signalItem, after the chain of dirty signals ahead of it.
+        """
+        chain = [signalItem]
+        path = {signalItem.tiId}
+        nextSignal = signalItem.getNextSignal()
+        while nextSignal is not None and nextSignal.tiId in self._dirty and \
+                nextSignal.tiId not in path:
+            chain.append(nextSignal)
+            path.add(nextSignal.tiId)
+            nextSignal = nextSignal.getNextSignal()
+        for signal in reversed(chain):
+            tiId = signal.tiId
+            self._dirty.pop(tiId, None)
+            count = self._evaluations.get(tiId, 0)
+            if count >= self.MAX_EVALUATIONS:
+                QtCore.qWarning("Signal %s does not settle, evaluation skipped"
+                                % tiId)
+                continue
+            self._evaluations[tiId] = count + 1
+            signal.evaluateSignalState()
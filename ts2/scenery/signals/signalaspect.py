@@ -94,9 +94,12 @@ class SignalAspect:
             return self.actions[0] != (Target.ASAP, 0) \
                 and self.actions[0] != (Target.BEFORE_THIS_SIGNAL, 0)
 
-    def drawAspect(self, p, linePen, shapePen, persistent=False):
+    def drawAspect(self, p, linePen, shapePen, persistent=False,
+                   detailed=True):
         """Draws the aspect on the given painter p. Draws the line with
-        linePen and the shapes with shapePen."""
+        linePen and the shapes with shapePen. If not detailed (at low zoom),
+        the heads are drawn as a single square of the color of the first
+        light."""
         if self.lineStyle == SignalLineStyle.BUFFER:
             p.setPen(shapePen)
             brush = QtGui.QBrush(Qt.SolidPattern)
@@ -112,6 +115,16 @@ class SignalAspect:
             p.setPen(linePen)
             p.drawLine(0, 0, 10, 0)
 
+            if not detailed:
+                colors = [color for shape, color
+                          in zip(self.shapes, self.shapesColors)
+                          if shape != SignalShape.NONE]
+                if colors:
+                    p.setPen(Qt.NoPen)
+                    p.setBrush(QtGui.QBrush(QtGui.QColor(colors[0])))
+                    p.drawRect(QtCore.QRectF(8, -11, 8, 8))
+                return
+
             # Draw the signal itself
             p.setPen(shapePen)
             brush = QtGui.QBrush(Qt.SolidPattern)
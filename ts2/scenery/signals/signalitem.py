@@ -19,6 +19,7 @@
 #
 
 import copy
+import functools
 import os
 import collections
 import simplejson as json
@@ -31,6 +32,11 @@ from . import signalaspect
 
 translate = QtWidgets.qApp.translate
 
+# The general data directory is found from the package, so that it does not
+# depend on the working directory.
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(utils.__file__))), "data"
+)
 
 BUILTIN_SIGNAL_LIBRARY = """{
     "__type__": "SignalLibrary",
@@ -151,11 +157,13 @@ class SignalItem(abstract.TrackItem):
         super().__init__(parameters)
         reverse = bool(parameters.get("reverse", 0))
         self._signalType = None
-        for customProperty in signalLibrary.tiProperties.values():
+        for customProperty in SignalLibrary.tiProperties.values():
             # Initialize backend vars for custom properties
             propName = "_" + customProperty.name[:-3]
-            setattr(self, propName,
-                    eval(str(parameters.get(customProperty.name[:-3], {}))))
+            value = parameters.get(customProperty.name[:-3], {})
+            if isinstance(value, str):
+                value = parseParams(value)
+            setattr(self, propName, copy.deepcopy(value))
         try:
             xb = float(parameters.get("xn", ""))
         except ValueError:
@@ -168,6 +176,7 @@ class SignalItem(abstract.TrackItem):
         self._berthRect = None
         self.setBerthRect()
         self._activeAspect = None
+        self._aspectEvaluator = None
         self._reverse = reverse
         self._previousActiveRoute = None
         self._nextActiveRoute = None
@@ -217,9 +226,9 @@ class SignalItem(abstract.TrackItem):
     @staticmethod
     def getProperties():
         signalTypeNames = sorted(
-            list(signalLibrary.signalTypes.keys())
+            list(getSignalLibrary(check=False).signalTypes.keys())
         )
-        signalCustomProperties = list(signalLibrary.tiProperties.values())
+        signalCustomProperties = list(SignalLibrary.tiProperties.values())
         return abstract.TrackItem.getProperties() + [
             helper.TIProperty("reverse",
                               translate("SignalItem", "Reverse")),
@@ -236,7 +245,7 @@ class SignalItem(abstract.TrackItem):
     def for_json(self):
         """Dumps the signalItem to JSON."""
         jsonData = super().for_json()
-        signalCustomProperties = list(signalLibrary.tiProperties.values())
+        signalCustomProperties = list(SignalLibrary.tiProperties.values())
         for customProp in signalCustomProperties:
             jsonData[customProp.name[:-3]] = getattr(self, customProp.name[:-3])
         jsonData.update({
@@ -571,15 +580,37 @@ class SignalItem(abstract.TrackItem):
         super().resetActiveRoute()
         self.updateSignalState()
 
+    def resetState(self):
+        """Resets the state of this item (see TrackItem.resetState()). Here,
+        the routes starting and ending at this signal and its train id are
+        also reset."""
+        super().resetState()
+        self._nextActiveRoute = None
+        self._previousActiveRoute = None
+        self.resetTrainId()
+        self.updateSignalState()
+
     def updateSignalParams(self):
         """Updates signal custom parameters according to the SignalType."""
         self.signalType.updateParams(self)
 
     @QtCore.pyqtSlot()
     def updateSignalState(self):
-        """Update the signal current aspect."""
+        """Update the signal current aspect. The update goes through the
+        :class:`~ts2.scenery.signals.propagation.SignalUpdateQueue` of the
+        simulation, so that the signals depending on this one are updated
+        once each."""
+        self.simulation.signalUpdateQueue.update(self)
+
+    def evaluateSignalState(self):
+        """Computes the signal current aspect and requests the update of the
+        signal of the route ending here. Called by the
+        :class:`~ts2.scenery.signals.propagation.SignalUpdateQueue`."""
         oldAspect = self.activeAspect
-        self._activeAspect = self.signalType.getAspect(self)
+        if self._aspectEvaluator is not None:
+            self._activeAspect = self._aspectEvaluator.getAspect(self)
+        else:
+            self._activeAspect = self.signalType.getAspect(self)
 
         if self.activeAspect != oldAspect:
             self.aspectChanged.emit()
@@ -593,6 +624,9 @@ class SignalItem(abstract.TrackItem):
         """Create the triggers necessary for this Item."""
         for trigger in self.simulation.signalLibrary.triggers.values():
             trigger(self)
+        if self.simulation.context == utils.Context.GAME:
+            # Custom parameters cannot change any more
+            self._aspectEvaluator = AspectEvaluator(self)
         self.updateSignalState()
 
     # ## Graphics Methods ################################################
@@ -638,7 +672,7 @@ class SignalItem(abstract.TrackItem):
         if itemId == SignalItem.SIGNAL_GRAPHIC_ITEM:
             return self.activeAspect.boundingRect()
         elif itemId == SignalItem.BERTH_GRAPHIC_ITEM:
-            rect = copy.copy(self.berthRect)
+            rect = QtCore.QRectF(self.berthRect)
             if self.simulation.context == utils.Context.EDITOR_SCENERY:
                 rect.adjust(-5, -5, 5, 5)
             return rect
@@ -650,7 +684,8 @@ class SignalItem(abstract.TrackItem):
         isGame = (self.simulation.context == utils.Context.GAME)
         isEditorScenery = \
             (self.simulation.context == utils.Context.EDITOR_SCENERY)
-        linePen = self.getPen()
+        levelOfDetail = helper.levelOfDetail(p)
+        linePen = helper.simplifyPen(self.getPen(), p)
         shapePen = self.getPen()
         shapePen.setColor(Qt.white)
         shapePen.setWidth(0)
@@ -666,7 +701,10 @@ class SignalItem(abstract.TrackItem):
 
             persistent = (self.nextActiveRoute is not None and
                           self.nextActiveRoute.persistent)
-            self.activeAspect.drawAspect(p, linePen, shapePen, persistent)
+            self.activeAspect.drawAspect(
+                p, linePen, shapePen, persistent,
+                levelOfDetail >= helper.LOD_SIGNAL_HEADS
+            )
 
             # Draw the connection rects
             if isEditorScenery:
@@ -675,6 +713,8 @@ class SignalItem(abstract.TrackItem):
 
         elif itemId == SignalItem.BERTH_GRAPHIC_ITEM:
             # Berth
+            if levelOfDetail < helper.LOD_TEXT:
+                return
             if (isGame and self.trainId is not None) or isEditorScenery:
                 shapePen.setColor(Qt.black)
                 brush = QtGui.QBrush(Qt.black)
@@ -766,6 +806,48 @@ class SignalState:
         return True
 
 
+class AspectEvaluator:
+    """An ``AspectEvaluator`` is the precompiled form of
+    :meth:`~ts2.scenery.signals.signalitem.SignalType.getAspect` for a given
+    signal item, for use when the custom parameters of the signal item cannot
+    change any more.
+
+    The custom parameters of the signal item are resolved once, so that
+    evaluating the aspect only calls the solvers of the conditions of each
+    state, in order, with their final parameters list.
+    """
+
+    def __init__(self, signalItem):
+        """
+        :param signalItem: A :class:`~ts2.scenery.signals.signalitem.SignalItem`
+        """
+        signalType = signalItem.signalType
+        customParams = signalType.getCustomParams(signalItem)
+        self.states = []
+        for state in signalType.states:
+            conditions = []
+            for conditionName, parameters in state.conditions.items():
+                parameters = list(parameters)
+                parameters.extend(customParams.get(conditionName, {})
+                                  .get(state.aspect.name, []))
+                conditions.append((SignalLibrary.solvers[conditionName],
+                                   parameters))
+            self.states.append((state.aspect, conditions))
+        self.defaultAspect = signalType.getDefaultAspect()
+
+    def getAspect(self, signalItem):
+        """Returns the aspect that must be active in the context of signalItem,
+        as :meth:`~ts2.scenery.signals.signalitem.SignalType.getAspect`.
+        """
+        for aspect, conditions in self.states:
+            for solver, parameters in conditions:
+                if not solver(signalItem, parameters):
+                    break
+            else:
+                return aspect
+        return self.defaultAspect
+
+
 class SignalType:
     """A ``SignalType`` describes a type of signals which can have different
     aspects and the logic for displaying aspects."""
@@ -889,21 +971,26 @@ class SignalLibrary:
         self.signalTypes.update(other.signalTypes)
 
     @staticmethod
-    def createSignalLibrary():
+    def tslFiles():
+        """Returns the sorted paths of the tsl files in the general and user
+        data directories."""
+        tslFiles = set()
+        for dataDir in (DATA_DIR, utils.settings.userDataDir):
+            # A data directory may not exist, e.g. if TS2 is installed
+            if os.path.isdir(dataDir):
+                tslFiles.update(os.path.join(dataDir, f)
+                                for f in os.listdir(dataDir)
+                                if f.endswith('.tsl'))
+        return sorted(tslFiles)
+
+    @staticmethod
+    def createSignalLibrary(tslFiles=None):
         """Returns a SignalLibrary with the builtin signal types and those
-        defined in tsl files in the data directory."""
+        defined in tslFiles, the tsl files in the data directories if None."""
         builtinLibrary = json.loads(BUILTIN_SIGNAL_LIBRARY,
                                     object_hook=json_hook, encoding="utf-8")
-        # General data directory
-        tslGenFiles = [os.path.join("data", f) for f in os.listdir("data")
-                       if f.endswith('.tsl')]
-        # User data directory
-        tslUserFiles = [os.path.join(utils.settings.userDataDir, f)
-                        for f in os.listdir(utils.settings.userDataDir)
-                        if f.endswith('.tsl')]
-
-        tslFiles = list(set(tslGenFiles + tslUserFiles))
-        tslFiles.sort()
+        if tslFiles is None:
+            tslFiles = SignalLibrary.tslFiles()
         for tslFile in tslFiles:
             with open(tslFile) as fileStream:
                 sl = json.load(fileStream, object_hook=json_hook,
@@ -914,7 +1001,47 @@ class SignalLibrary:
         return builtinLibrary
 
 
-signalLibrary = SignalLibrary.createSignalLibrary()
+@functools.lru_cache(maxsize=256)
+def parseParams(text):
+    """Returns the dict of custom parameters of a signal written as text in
+    a simulation file. Results are cached since most signals have the same
+    parameters (often none): they are shared and must be copied."""
+    return eval(text)
+
+
+_signalLibraryCache = {"key": None, "library": None}
+
+
+def getSignalLibrary(check=True):
+    """Returns the SignalLibrary of the builtin signal types and of the tsl
+    files. It is created on the first call, and created again when check is
+    True and tsl files have been added, removed or modified since."""
+    library = _signalLibraryCache["library"]
+    if library is not None and not check:
+        return library
+    tslFiles = SignalLibrary.tslFiles()
+    key = []
+    for tslFile in tslFiles:
+        try:
+            key.append((tslFile, os.path.getmtime(tslFile)))
+        except OSError:
+            key.append((tslFile, None))
+    key = tuple(key)
+    if library is None or _signalLibraryCache["key"] != key:
+        library = SignalLibrary.createSignalLibrary(tslFiles)
+        _signalLibraryCache["library"] = library
+        _signalLibraryCache["key"] = key
+        # The properties of SignalItem list the signal types
+        abstract.clearPropertiesCache()
+    return library
+
+
+def __getattr__(name):
+    """Creates the signal library on first access to the ``signalLibrary``
+    attribute of this module, which is kept for compatibility."""
+    if name == "signalLibrary":
+        return getSignalLibrary()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def condition(cls):
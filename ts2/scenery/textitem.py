@@ -96,6 +96,8 @@ class TextItem(abstract.TrackItem):
         """This function is called by the owned TrackGraphicsItem to paint its
         painter."""
         super().graphicsPaint(p, options, itemId, widget)
+        if helper.levelOfDetail(p) < helper.LOD_TEXT:
+            return
         pen = self.getPen()
         pen.setWidth(0)
         pen.setColor(Qt.white)
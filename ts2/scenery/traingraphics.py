@@ -0,0 +1,162 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+import contextlib
+
+from Qt import QtGui, QtWidgets, Qt
+
+from ts2.scenery import helper
+
+
+class HighlightLineItem(QtWidgets.QGraphicsLineItem):
+    """A ``QGraphicsLineItem`` showing an active route over a line item."""
+
+    def paint(self, painter, option, widget=None):
+        """Draws the line with the pen simplified at low zoom, as the line
+        item under it."""
+        painter.setPen(helper.simplifyPen(self.pen(), painter))
+        painter.drawLine(self.line())
+
+
+class TrainGraphicsQueue:
+    """A ``TrainGraphicsQueue`` coalesces the drawing of the trains on the
+    line items of a simulation.
+
+    Instead of drawing at once,
+    :meth:`~ts2.scenery.lineitem.LineItem.updateTrain` marks the line item
+    as dirty. When the outermost update (or
+    :meth:`~ts2.scenery.traingraphics.TrainGraphicsQueue.batch` block, such as
+    a step of the simulation) returns, each dirty line item is drawn once,
+    however many times the trains have updated it.
+
+    The ``QGraphicsLineItem`` showing the trains, and those showing the
+    active routes over the line items, are overlaid on the cached track items
+    so that these are not repainted when the trains move or the routes
+    change. They are taken from pools shared by all the line items of the
+    simulation.
+    """
+
+    TRAIN_Z_VALUE = 10
+    HIGHLIGHT_Z_VALUE = 6
+
+    def __init__(self, simulation):
+        """Constructor for the TrainGraphicsQueue class."""
+        self._simulation = simulation
+        self._dirty = {}
+        self._depth = 0
+        self._pools = {False: [], True: []}
+        self._pens = {False: self.makePen(Qt.red),
+                      True: self.makePen(Qt.white)}
+
+    @staticmethod
+    def makePen(color):
+        """
+        :return: the pen of the overlaid line items of the given color, as
+                 :meth:`~ts2.scenery.abstract.TrackItem.getPen`
+        :rtype: ``QPen``
+        """
+        pen = QtGui.QPen()
+        pen.setWidth(3)
+        pen.setJoinStyle(Qt.RoundJoin)
+        pen.setCapStyle(Qt.RoundCap)
+        pen.setColor(color)
+        return pen
+
+    def __len__(self):
+        """
+        :return: the number of dirty line items
+        :rtype: int
+        """
+        return len(self._dirty)
+
+    def update(self, lineItem):
+        """Marks lineItem as dirty and draws it, unless an update or a batch
+        is already in progress, in which case it will be drawn when it ends.
+
+        :param lineItem: A :class:`~ts2.scenery.lineitem.LineItem`
+        """
+        self._dirty[lineItem.tiId] = lineItem
+        if self._depth == 0:
+            self.settle()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager deferring the drawing of the line items updated
+        within the block to its end."""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+        if self._depth == 0:
+            self.settle()
+
+    def settle(self):
+        """Draws the dirty line items."""
+        self._depth += 1
+        try:
+            while self._dirty:
+                dirty = self._dirty
+                self._dirty = {}
+                for lineItem in dirty.values():
+                    lineItem.drawTrain()
+        finally:
+            self._depth -= 1
+
+    def acquireLineItem(self, highlight=False):
+        """
+        :param bool highlight: whether the line item shows an active route
+                               instead of a train
+        :return: a ``QGraphicsLineItem`` shown on the scene to draw a train,
+                 or an active route if highlight is True, from the pool if
+                 possible.
+        :rtype: ``QGraphicsLineItem``
+        """
+        pool = self._pools[highlight]
+        if pool:
+            tli = pool.pop()
+        else:
+            if highlight:
+                tli = HighlightLineItem()
+                # Active routes change much less often than trains move
+                tli.setCacheMode(
+                    QtWidgets.QGraphicsItem.DeviceCoordinateCache
+                )
+            else:
+                tli = QtWidgets.QGraphicsLineItem()
+            tli.setCursor(Qt.ArrowCursor)
+            tli.setPen(self._pens[highlight])
+            if highlight:
+                # Under the trains, over the crossing lines
+                tli.setZValue(self.HIGHLIGHT_Z_VALUE)
+            else:
+                tli.setZValue(self.TRAIN_Z_VALUE)
+            self._simulation.registerGraphicsItem(tli)
+        tli.show()
+        return tli
+
+    def releaseLineItem(self, tli, highlight=False):
+        """Hides tli and gives it back to the pool.
+
+        :param tli: a ``QGraphicsLineItem`` given by :meth:`acquireLineItem`
+        :param bool highlight: the value given to :meth:`acquireLineItem`
+        """
+        tli.hide()
+        self._pools[highlight].append(tli)
@@ -18,20 +18,20 @@
 #   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
 #
 
-from math import sqrt
+from math import ceil, floor, sqrt
+import bisect
 import collections
-import zipfile
-import simplejson as json
+import heapq
 
 from Qt import QtCore, QtWidgets
 
 from ts2 import __FILE_FORMAT__
-from ts2 import utils, trains
-from ts2.routing import route, position
+from ts2 import loader, snapshot, utils, trains
+from ts2.routing import conflicts, route, position, trackgraph
 from ts2.game import logger, scorer
 from ts2.scenery import placeitem, lineitem, platformitem, invisiblelinkitem, \
-    enditem, pointsitem, textitem
-from ts2.scenery.signals import signalitem
+    enditem, pointsitem, textitem, traingraphics
+from ts2.scenery.signals import propagation, signalitem
 
 translate = QtWidgets.qApp.translate
 
@@ -98,13 +98,14 @@ def json_hook(dct):
         )
 
 
-def load(simulationWindow, jsonStream):
+def load(simulationWindow, jsonStream, simLoader=None, size=None):
     """Loads the simulation from jsonStream and returns it.
 
     The logic of loading is the following:
 
-    1. We create the graph of objects from ``json.load()``. When initialized,
-       each object stores its JSON data.
+    1. We create the graph of objects from the JSON stream, section by
+       section, with a :class:`~ts2.loader.SimulationLoader`. When
+       initialized, each object stores its JSON data.
     2. When all the objects are created, we call the
        :meth:`~ts2.simulation.Simulation.initialize` method of the
        :class:`~ts2.simulation.Simulation` which calls in turn the
@@ -115,19 +116,172 @@ def load(simulationWindow, jsonStream):
 
     :param simulationWindow:
     :param jsonStream:
+    :param simLoader: the :class:`~ts2.loader.SimulationLoader` to use, to
+    follow its progress.
+    :param int size: the size of jsonStream if it is not a plain file.
     """
-    simulation = json.load(jsonStream, object_hook=json_hook, encoding='utf-8')
-    if not isinstance(simulation, Simulation):
-        raise utils.FormatException(
-            translate("simulation.load", "Loaded file is not a TS2 simulation")
+    if simLoader is None:
+        simLoader = loader.SimulationLoader()
+    return simLoader.load(jsonStream, json_hook, Simulation, simulationWindow,
+                          size)
+
+
+def loadArchive(simulationWindow, zipArchive, simLoader=None):
+    """Loads the simulation from a .ts2 archive and returns it. The binary
+    snapshot of the archive is read if there is one, otherwise the loading is
+    the same as :func:`~ts2.simulation.load`.
+
+    :param simulationWindow:
+    :param zipArchive: the opened ``zipfile.ZipFile``
+    :param simLoader: the :class:`~ts2.loader.SimulationLoader` to use, to
+    follow its progress.
+    """
+    if simLoader is None:
+        simLoader = loader.SimulationLoader()
+    return simLoader.loadArchive(zipArchive, json_hook, Simulation,
+                                 simulationWindow)
+
+
+# Types of the objects making the state of a game
+STATE_TYPES = ("Train", "Position", "MessageLogger", "Message")
+
+
+def stateHook(dct):
+    """Hook method for json.load() reading only the state of a game: the
+    trains and the message logger are created, the other objects (including
+    the simulation itself) are left as dicts."""
+    if dct.get('__type__') in STATE_TYPES:
+        return json_hook(dct)
+    return dct
+
+
+def restoreArchive(sim, zipArchive):
+    """Restores onto sim the game saved in a .ts2 archive, if the archive
+    holds the same scenery, without creating the scenery again.
+
+    :param sim: the initialized :class:`~ts2.simulation.Simulation`
+    :param zipArchive: the opened ``zipfile.ZipFile``
+    :return: True if the game has been restored, False if the archive holds
+             another scenery (or has no scenery fingerprint) and must be
+             loaded instead.
+    :rtype: bool
+    """
+    fingerprint = loader.readMetaData(zipArchive).get("sceneryFingerprint")
+    if fingerprint is None or fingerprint != sim.sceneryFingerprint:
+        return False
+    document = loader.SimulationLoader().readArchive(zipArchive, stateHook)
+    sim.restoreState(document)
+    return True
+
+
+class TrainScheduler:
+    """The ``TrainScheduler`` decides which trains are stepped at each tick of
+    the simulation.
+
+    Trains on the scenery are kept in a list ordered by registration, so that
+    they are advanced in the same order as before. Trains which have not
+    appeared yet are kept in a heap keyed by the time at which they are due,
+    i.e. their appear time plus their initial delay, so that only the trains
+    which can change state are touched at each tick.
+    """
+
+    def __init__(self, simulation):
+        """
+        :param simulation: The simulation owning this scheduler
+        """
+        self.simulation = simulation
+        self._ranks = {}
+        self._activeRanks = []
+        self._activeTrains = []
+        self._pendingTrains = []
+        self._pendingSet = set()
+
+    @property
+    def activeTrains(self):
+        """
+        :return: the list of the trains currently stepped at each tick, in
+        registration order.
+        :rtype: list of :class:`~ts2.trains.train.Train`
+        """
+        return self._activeTrains
+
+    @property
+    def pendingTrainsCount(self):
+        """
+        :return: the number of trains waiting to appear.
+        :rtype: int
+        """
+        return len(self._pendingTrains)
+
+    def addTrain(self, train):
+        """Registers train in the scheduler. The scheduler then follows the
+        train status changes by itself.
+
+        :param train: The :class:`~ts2.trains.train.Train` to register
+        """
+        if train in self._ranks:
+            return
+        self._ranks[train] = len(self._ranks)
+        train.trainStatusChanged.connect(
+            lambda trainId, t=train: self.updateTrain(t)
         )
-    simulation.initialize(simulationWindow)
-    return simulation
+        self.updateTrain(train)
+
+    def updateTrain(self, train):
+        """Files train in the active list or in the pending heap according to
+        its status.
+
+        :param train: The :class:`~ts2.trains.train.Train` to update
+        """
+        rank = self._ranks[train]
+        index = bisect.bisect_left(self._activeRanks, rank)
+        listed = index < len(self._activeRanks) and \
+            self._activeRanks[index] == rank
+        if train.isActive():
+            if not listed:
+                self._activeRanks.insert(index, rank)
+                self._activeTrains.insert(index, train)
+        elif listed:
+            del self._activeRanks[index]
+            del self._activeTrains[index]
+        if train.status == trains.TrainStatus.INACTIVE and \
+                train not in self._pendingSet:
+            dueTime = train.realAppearTime.msecsSinceStartOfDay()
+            heapq.heappush(self._pendingTrains, (dueTime, rank, train))
+            self._pendingSet.add(train)
+
+    def activateTrains(self, time):
+        """Activates the pending trains which are due at the given time.
+        Trains that cannot appear any more are dropped from the heap.
+
+        :param time: The current simulation time
+        :type time: ``QtCore.QTime``
+        """
+        msecs = time.msecsSinceStartOfDay()
+        while self._pendingTrains and self._pendingTrains[0][0] < msecs:
+            dummy, rank, train = heapq.heappop(self._pendingTrains)
+            self._pendingSet.discard(train)
+            train.activate(time)
+
+    def advanceTrains(self, secs):
+        """Advances all the active trains by secs seconds.
+
+        :param float secs: The number of simulated seconds of this step
+        """
+        for train in list(self._activeTrains):
+            train.advance(secs)
 
 
 class Simulation(QtCore.QObject):
     """The ``Simulation`` class holds all the game logic."""
 
+    # Real milliseconds between two frames of the game. The trains are drawn
+    # and the views are updated once per frame.
+    FRAME_INTERVAL = 500
+    # Maximum simulated seconds of a physics step. At high time factors, a
+    # frame runs several physics steps.
+    PHYSICS_STEP = 0.5
+
     def __init__(self, options, trackItems, routes, trainTypes, services,
                  trns, messageLogger):
         """
@@ -141,17 +295,22 @@ class Simulation(QtCore.QObject):
         """
         super().__init__()
         self.simulationWindow = None
-        self._scene = QtWidgets.QGraphicsScene()
+        self._scene = None
+        if not self.headless:
+            self._scene = QtWidgets.QGraphicsScene()
         self._timer = QtCore.QTimer(self)
         self._messageLogger = messageLogger
         self._scorer = scorer.Scorer(self)
         self._selectedSignal = None
+        self._sceneryFingerprint = None
         self._options = collections.OrderedDict()
         self._options.update(BUILTIN_OPTIONS)
         self._options.update(options)
         self._routes = collections.OrderedDict()
         for key, value in routes.items():
             self._routes[int(key)] = value
+        self._routeIndex = {}
+        self._routesBySignal = {}
         self._trackItems = collections.OrderedDict()
         for key, value in trackItems.items():
             self._trackItems[int(key)] = value
@@ -162,7 +321,12 @@ class Simulation(QtCore.QObject):
         self._services.update(services)
         self._places = collections.OrderedDict()
         self._trains = trns
-        self.signalLibrary = signalitem.signalLibrary
+        self._trackGraph = None
+        self._routeConflicts = None
+        self._signalUpdateQueue = propagation.SignalUpdateQueue()
+        self._trainGraphicsQueue = traingraphics.TrainGraphicsQueue(self)
+        self._scheduler = TrainScheduler(self)
+        self.signalLibrary = signalitem.getSignalLibrary()
         self._time = QtCore.QTime()
         self._startTime = QtCore.QTime()
         self._serviceListModel = trains.ServiceListModel(self)
@@ -171,16 +335,68 @@ class Simulation(QtCore.QObject):
         self._selectedTrainModel = trains.TrainInfoModel(self)
 
     def initialize(self, simulationWindow):
-        """Initializes the simulation.
+        """Initializes the simulation, running each step of
+        :meth:`~ts2.simulation.Simulation.initializationSteps` and emitting
+        ``initializationProgressed`` before each of them.
 
         :param simulationWindow:
         """
         self.messageLogger.addMessage(self.tr("Simulation initializing"),
                                       logger.Message.SOFTWARE_MSG)
         self.simulationWindow = simulationWindow
+        steps = self.initializationSteps()
+        # Signals are evaluated once everything is set up, instead of each
+        # signal update cascading through all the signals behind it.
+        with self.signalUpdateQueue.batch():
+            for index, (message, step) in enumerate(steps):
+                self.initializationProgressed.emit(index, len(steps),
+                                                   message)
+                step()
+        self.sortTrains()
+        self.messageLogger.initialize(self)
+
+        self._startTime = QtCore.QTime.fromString(self.option("currentTime"),
+                                                  "hh:mm:ss")
+        self._time = self._startTime
+        self._timer.timeout.connect(self.timerOut)
+        self._timer.setInterval(self.FRAME_INTERVAL)
+        if not self.headless:
+            self._scene.update()
+            self._timer.start()
+        self._scorer.score = self.option("currentScore")
+        self.messageLogger.addMessage(self.tr("Simulation loaded"),
+                                      logger.Message.SOFTWARE_MSG)
+
+    def initializationSteps(self):
+        """
+        :return: the steps of :meth:`~ts2.simulation.Simulation.initialize`
+                 in order, as (message, method) tuples. Each method is called
+                 without arguments and raises an exception if the simulation
+                 is not valid.
+        :rtype: list
+        """
+        return [
+            (self.tr("Initializing track items"), self.initializeTrackItems),
+            (self.tr("Checking track item links"), self.checkLinks),
+            (self.tr("Compiling track graph"), self.compileTrackGraph),
+            (self.tr("Initializing routes"), self.initializeRoutes),
+            (self.tr("Setting routes"), self.setRoutesToInitialState),
+            (self.tr("Setting up triggers"), self.setupTriggers),
+            (self.tr("Initializing train types"), self.initializeTrainTypes),
+            (self.tr("Initializing services"), self.initializeServices),
+            (self.tr("Initializing trains"), self.initializeTrains)
+        ]
+
+    def initializeTrackItems(self):
+        """Initializes the places, then the track items."""
         self.updatePlaces()
         for ti in self._trackItems.values():
             ti.initialize(self)
+
+    def checkLinks(self):
+        """Raises a ``FormatException`` if not all the track items are
+        linked. See :meth:`~ts2.simulation.Simulation.checkTrackItemsLinks`.
+        """
         if not self.checkTrackItemsLinks():
             self.messageLogger.addMessage(
                 self.tr("Invalid simulation: Not all items are linked."),
@@ -190,38 +406,117 @@ class Simulation(QtCore.QObject):
                 self.tr("Invalid simulation: Not all items are linked.")
             )
 
+    def compileTrackGraph(self):
+        """Compiles the linked track items into the track graph."""
+        if self.context == utils.Context.GAME:
+            # The scenery cannot change any more, so we compile it
+            self._trackGraph = trackgraph.TrackGraph(self)
+
+    def initializeRoutes(self):
+        """Initializes the routes, their index and their conflicts."""
         for rte in self.routes.values():
             rte.initialize(self)
+        self.updateRouteIndex()
+        if self.context == utils.Context.GAME:
+            self._routeConflicts = conflicts.RouteConflicts(self)
+
+    def setRoutesToInitialState(self):
+        """Activates the routes according to their initial state."""
         for rte in self.routes.values():
             # We need routes initialized before setting them up
             rte.setToInitialState()
+
+    def setupTriggers(self):
+        """Sets up the triggers of the track items."""
         for ti in self.trackItems.values():
-            # We need trackItems linked and routes set before setting triggers
+            # We need trackItems linked and routes set before setting
+            # triggers
             ti.setupTriggers()
+
+    def initializeTrainTypes(self):
+        """Initializes the train types."""
         for trainType in self.trainTypes.values():
             trainType.initialize(self)
+
+    def initializeServices(self):
+        """Initializes the services."""
         for service in self.services.values():
             service.initialize(self)
+
+    def initializeTrains(self):
+        """Initializes the trains."""
         for train in self.trains:
             train.initialize(self)
+
+    def sortTrains(self):
+        """Sorts the trains by scheduled departure time of their service."""
         self._trains.sort(key=lambda x:
                           x.currentService.lines and
                           x.currentService.lines[0].scheduledDepartureTimeStr or
                           x.currentService.serviceCode)
-        self.messageLogger.initialize(self)
 
-        self._scene.update()
+    def restoreState(self, document):
+        """Replaces the state of the game by the one of document: options
+        (time, score...), routes, trains and messages. The track items, train
+        types and services are kept, since document must have the same
+        scenery (see :attr:`~ts2.simulation.Simulation.sceneryFingerprint`).
+
+        The state is then the same as if document had been loaded.
+
+        :param dict document: the document of a game read with
+                              :func:`~ts2.simulation.stateHook`
+        """
+        if self._selectedSignal is not None:
+            self._selectedSignal.unselect()
+            self._selectedSignal = None
+        self._trainListModel.beginResetModel()
+        self._selectedTrainModel.clear()
+        with self.signalUpdateQueue.batch(), self.trainGraphicsQueue.batch():
+            for ti in self._trackItems.values():
+                ti.resetState()
+            self._options.update(document['options'])
+            self._messageLogger.setMessages(
+                document['messageLogger'].messages
+            )
+            # As when loading, trains are initialized before the time is set
+            self._time = QtCore.QTime()
+            self._startTime = QtCore.QTime()
+            for routeNum, routeData in document['routes'].items():
+                rte = self._routes[int(routeNum)]
+                rte.initialState = routeData.get('initialState', 0)
+                rte.setToInitialState()
+            self._scheduler = TrainScheduler(self)
+            self._trains = document['trains']
+            for train in self._trains:
+                train.initialize(self)
+        self.sortTrains()
+        self._trainListModel.endResetModel()
         self._startTime = QtCore.QTime.fromString(self.option("currentTime"),
                                                   "hh:mm:ss")
         self._time = self._startTime
-        self._timer.timeout.connect(self.timerOut)
-        interval = 500
-        self._timer.setInterval(interval)
-        self._timer.start()
         self._scorer.score = self.option("currentScore")
-        self.messageLogger.addMessage(self.tr("Simulation loaded"),
+        self.timeChanged.emit(self._time)
+        self.messageLogger.addMessage(self.tr("Simulation restored"),
                                       logger.Message.SOFTWARE_MSG)
 
+    @property
+    def sceneryFingerprint(self):
+        """
+        :return: the fingerprint of the scenery of this simulation, see
+                 :func:`~ts2.snapshot.sceneryFingerprint`. It is computed
+                 once in a game, since the scenery does not change.
+        :rtype: str
+        """
+        if self._sceneryFingerprint is not None:
+            return self._sceneryFingerprint
+        document = {"options": self._options}
+        for key in snapshot.SCENERY_SECTIONS:
+            document[key] = snapshot.toPlain(getattr(self, key))
+        fingerprint = snapshot.sceneryFingerprint(document)
+        if self.context == utils.Context.GAME:
+            self._sceneryFingerprint = fingerprint
+        return fingerprint
+
     def for_json(self):
         """Dumps the simulation to JSON."""
         savedOptions = self._options.copy()
@@ -242,17 +537,17 @@ class Simulation(QtCore.QObject):
         }
 
     def saveGame(self, fileName):
-        """Saves the game.
+        """Saves the game, with a binary snapshot for fast reloading.
 
         :param str fileName:  fileName to write"""
         self.pause()
         self.messageLogger.addMessage(self.tr("Saving simulation"),
                                       logger.Message.SOFTWARE_MSG)
-        with zipfile.ZipFile(fileName, "w") as zipArchive:
-            zipArchive.writestr("simulation.json",
-                                json.dumps(self, separators=(',', ':'),
-                                           for_json=True, encoding='utf-8'),
-                                compress_type=zipfile.ZIP_BZIP2)
+        compression, compressLevel = utils.settings.compression(
+            utils.settings.COMPRESSION.game
+        )
+        snapshot.writeArchive(fileName, self, compression=compression,
+                              compressLevel=compressLevel)
         self.messageLogger.addMessage(self.tr("Simulation saved"),
                                       logger.Message.SOFTWARE_MSG)
 
@@ -289,6 +584,15 @@ class Simulation(QtCore.QObject):
         """
         return utils.Context.GAME
 
+    @property
+    def headless(self):
+        """
+        :return: True if this simulation runs without any scene nor timer,
+        False in the base class.
+        :rtype: bool
+        """
+        return False
+
     def option(self, key):
         """
         :param str key:
@@ -356,6 +660,49 @@ class Simulation(QtCore.QObject):
         """
         return self._routes
 
+    @property
+    def trackGraph(self):
+        """
+        :return: the compiled track graph of the simulation, or None if the
+        scenery can still be edited.
+        :rtype: :class:`~ts2.routing.trackgraph.TrackGraph`
+        """
+        return self._trackGraph
+
+    @property
+    def routeConflicts(self):
+        """
+        :return: the conflicts between the routes of the simulation, or None
+        if the routes can still be edited.
+        :rtype: :class:`~ts2.routing.conflicts.RouteConflicts`
+        """
+        return self._routeConflicts
+
+    @property
+    def signalUpdateQueue(self):
+        """
+        :return: the queue through which the signal aspects are updated
+        :rtype: :class:`~ts2.scenery.signals.propagation.SignalUpdateQueue`
+        """
+        return self._signalUpdateQueue
+
+    @property
+    def trainGraphicsQueue(self):
+        """
+        :return: the queue through which the trains are drawn on the line
+                 items
+        :rtype: :class:`~ts2.scenery.traingraphics.TrainGraphicsQueue`
+        """
+        return self._trainGraphicsQueue
+
+    @property
+    def scheduler(self):
+        """
+        :return: the scheduler stepping the trains of the simulation
+        :rtype: :class:`~ts2.simulation.TrainScheduler`
+        """
+        return self._scheduler
+
     @property
     def trainTypes(self):
         """
@@ -460,6 +807,11 @@ class Simulation(QtCore.QObject):
     selectionChanged = QtCore.pyqtSignal()
     """pyqtSignal()"""
 
+    initializationProgressed = QtCore.pyqtSignal(int, int, str)
+    """pyqtSignal(int, int, str): the index of the step of
+    :meth:`~ts2.simulation.Simulation.initialize` starting, the number of
+    steps and the message of the step"""
+
     @QtCore.pyqtSlot(int)
     def updateContext(self, tabNum):
         """Updates the context of the simulation. Does nothing in the base
@@ -569,14 +921,39 @@ class Simulation(QtCore.QObject):
 
     @QtCore.pyqtSlot()
     def timerOut(self):
-        """ Changes the simulation time and emits the timeChanged and the
-        timeElapsed signals
+        """Runs a frame of the game, i.e. the simulated seconds of the timer
+        interval at the current time factor, in physics steps of at most
+        ``PHYSICS_STEP`` seconds.
         This function is normally connected to the timer timeout signal."""
         timeFactor = float(self.option("timeFactor"))
-        self._time = self._time.addMSecs((self._timer.interval()) * timeFactor)
-        self.timeChanged.emit(self._time)
-        secs = self._timer.interval() * timeFactor / 1000
-        self.timeElapsed.emit(secs)
+        self.advance(self._timer.interval() * timeFactor / 1000,
+                     self.PHYSICS_STEP)
+
+    def advance(self, secs, maxStep=None):
+        """Moves the simulation time forward by secs seconds, so that all the
+        game logic is run, and emits the timeChanged signal.
+
+        :param float secs: The number of simulated seconds to run
+        :param float maxStep: If given, secs are run in steps of at most
+                              maxStep seconds, otherwise in one step. The
+                              timeElapsed signal is emitted after each step,
+                              while the trains are drawn and timeChanged is
+                              emitted once at the end.
+        """
+        steps = 1
+        if maxStep:
+            steps = max(1, ceil(round(secs / maxStep, 6)))
+        msecs = secs * 1000
+        with self.trainGraphicsQueue.batch():
+            for i in range(steps):
+                self._time = self._time.addMSecs(
+                    int(round(msecs * (i + 1) / steps)) -
+                    int(round(msecs * i / steps))
+                )
+                self._scheduler.activateTrains(self._time)
+                self._scheduler.advanceTrains(secs / steps)
+                self.timeElapsed.emit(secs / steps)
+            self.timeChanged.emit(self._time)
 
     def updateSelection(self):
         """Updates the trackItem selection. Does nothing in the base
@@ -601,46 +978,137 @@ class Simulation(QtCore.QObject):
         None
         :rtype: :class:`~ts2.routing.route.Route` or None
         """
-        for r in self._routes.values():
-            if r.links(si1, si2):
-                return r
-        return None
+        if si1 is None or si2 is None:
+            return None
+        return self._routeIndex.get((si1.tiId, si2.tiId))
+
+    def routesFrom(self, signalItem):
+        """
+        :param signalItem: A
+        :class:`~ts2.scenery.signals.signalitem.SignalItem`
+        :return: The routes starting at signalItem
+        :rtype: list of :class:`~ts2.routing.route.Route`
+        """
+        return self._routesBySignal.get(signalItem.tiId, [])
+
+    def updateRouteIndex(self):
+        """Builds again the index of the routes by signals from the routes
+        dictionary. The routes must be initialized."""
+        self._routeIndex = {}
+        self._routesBySignal = {}
+        for rte in self._routes.values():
+            self.indexRoute(rte)
+
+    def indexRoute(self, rte):
+        """Adds rte to the index of the routes by signals. If another route
+        already links the same signals, it is still returned by
+        :meth:`~ts2.simulation.Simulation.findRoute`.
+
+        :param rte: An initialized :class:`~ts2.routing.route.Route`
+        """
+        beginId = rte.beginSignal.tiId
+        self._routeIndex.setdefault((beginId, rte.endSignal.tiId), rte)
+        self._routesBySignal.setdefault(beginId, []).append(rte)
+
+    def unIndexRoute(self, rte):
+        """Removes rte from the index of the routes by signals.
+
+        :param rte: An initialized :class:`~ts2.routing.route.Route`
+        """
+        beginId = rte.beginSignal.tiId
+        key = (beginId, rte.endSignal.tiId)
+        routes = self._routesBySignal.get(beginId, [])
+        routes[:] = [r for r in routes if r is not rte]
+        if not routes:
+            self._routesBySignal.pop(beginId, None)
+        if self._routeIndex.get(key) is rte:
+            del self._routeIndex[key]
+            for r in routes:
+                if r.endSignal.tiId == key[1]:
+                    self._routeIndex[key] = r
+                    break
 
     def createTrackItemsLinks(self):
         """Find the items that are linked together through their coordinates
         and populate the _nextItem and _previousItem variables of each items.
+
+        The ends of the items are bucketed in a grid of 1 pixel cells, so that
+        only the items with ends in neighbouring cells are compared. The pairs
+        are then linked in the same order as a comparison of all the pairs of
+        items would do.
         """
         self.messageLogger.addMessage(self.tr("Creating TrackItem links"),
                                       logger.Message.SOFTWARE_MSG)
-        for ki, vi in self._trackItems.items():
-            for kj, vj in self._trackItems.items():
-                if ki < kj:
-                    if self.distanceBetween(vi.origin, vj.origin) <= 1.0:
-                        vi.previousItem = vj
-                        vj.previousItem = vi
-                    elif self.distanceBetween(vi.origin, vj.end) <= 1.0:
-                        vi.previousItem = vj
-                        vj.nextItem = vi
-                    elif self.distanceBetween(vi.end, vj.origin) <= 1.0:
-                        vi.nextItem = vj
-                        vj.previousItem = vi
-                    elif self.distanceBetween(vi.end, vj.end) <= 1.0:
-                        vi.nextItem = vj
-                        vj.nextItem = vi
-                    elif isinstance(vi, pointsitem.PointsItem):
-                        if self.distanceBetween(vi.reverse, vj.origin) <= 1.0:
-                            vi.reverseItem = vj
-                            vj.previousItem = vi
-                        elif self.distanceBetween(vi.reverse, vj.end) <= 1.0:
-                            vi.reverseItem = vj
-                            vj.nextItem = vi
-                    elif isinstance(vj, pointsitem.PointsItem):
-                        if self.distanceBetween(vi.origin, vj.reverse) <= 1.0:
-                            vi.previousItem = vj
-                            vj.reverseItem = vi
-                        elif self.distanceBetween(vi.end, vj.reverse) <= 1.0:
-                            vi.nextItem = vj
-                            vj.reverseItem = vi
+        items = list(self._trackItems.items())
+        grid = {}
+        for index, (key, ti) in enumerate(items):
+            for cell in {self.gridCell(point)
+                         for point in self.trackItemEnds(ti)}:
+                grid.setdefault(cell, []).append(index)
+        pairs = set()
+        for index, (key, ti) in enumerate(items):
+            for x, y in {self.gridCell(point)
+                         for point in self.trackItemEnds(ti)}:
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for other in grid.get((x + dx, y + dy), []):
+                            if key < items[other][0]:
+                                pairs.add((index, other))
+        for i, j in sorted(pairs):
+            self.linkTrackItems(items[i][1], items[j][1])
+
+    @staticmethod
+    def trackItemEnds(trackItem):
+        """
+        :return: the points at which trackItem can be linked to other items,
+        i.e. its origin and end, and its reverse end for points.
+        :rtype: list of ``QPointF``
+        """
+        if isinstance(trackItem, pointsitem.PointsItem):
+            return [trackItem.origin, trackItem.end, trackItem.reverse]
+        return [trackItem.origin, trackItem.end]
+
+    @staticmethod
+    def gridCell(point):
+        """
+        :return: the cell of the 1 pixel grid in which point is.
+        :rtype: tuple
+        """
+        return floor(point.x()), floor(point.y())
+
+    def linkTrackItems(self, vi, vj):
+        """Links vi and vj together if they have ends in the same place.
+
+        :param vi: A :class:`~ts2.scenery.abstract.TrackItem`
+        :param vj: A :class:`~ts2.scenery.abstract.TrackItem` with a greater
+        tiId than vi
+        """
+        if self.distanceBetween(vi.origin, vj.origin) <= 1.0:
+            vi.previousItem = vj
+            vj.previousItem = vi
+        elif self.distanceBetween(vi.origin, vj.end) <= 1.0:
+            vi.previousItem = vj
+            vj.nextItem = vi
+        elif self.distanceBetween(vi.end, vj.origin) <= 1.0:
+            vi.nextItem = vj
+            vj.previousItem = vi
+        elif self.distanceBetween(vi.end, vj.end) <= 1.0:
+            vi.nextItem = vj
+            vj.nextItem = vi
+        elif isinstance(vi, pointsitem.PointsItem):
+            if self.distanceBetween(vi.reverse, vj.origin) <= 1.0:
+                vi.reverseItem = vj
+                vj.previousItem = vi
+            elif self.distanceBetween(vi.reverse, vj.end) <= 1.0:
+                vi.reverseItem = vj
+                vj.nextItem = vi
+        elif isinstance(vj, pointsitem.PointsItem):
+            if self.distanceBetween(vi.origin, vj.reverse) <= 1.0:
+                vi.previousItem = vj
+                vj.reverseItem = vi
+            elif self.distanceBetween(vi.end, vj.reverse) <= 1.0:
+                vi.nextItem = vj
+                vj.reverseItem = vi
 
     def checkTrackItemsLinks(self):
         """
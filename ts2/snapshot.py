@@ -0,0 +1,416 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Binary snapshots of simulations.
+
+A snapshot holds the same data as the ``simulation.json`` member of a
+``.ts2`` file, i.e. the JSON document of the simulation, but stored in
+columns:
+
+- The objects of each section of the document (track items, routes, train
+  types, services, trains) form a table with one row per object.
+- Each key of the objects is a column. Integer and float columns are stored
+  as arrays of 64 bits values, the other columns as a JSON list.
+- Objects nested in a row (the head position of a train, the lines of a
+  service) form a child table whose rows refer to their parent row.
+- The key set of each row is stored, so that objects of different types in
+  the same table get back exactly their keys.
+
+The snapshot is made of the ``MAGIC`` bytes, the length of the JSON
+manifest as a 32 bits integer, the manifest, and the data of the array
+columns. Decoding a snapshot gives the same document as ``json.load()`` of
+the JSON member: the object hook is applied to each object, after the
+objects nested in it.
+"""
+
+from array import array
+import hashlib
+import struct
+import sys
+import zipfile
+
+import simplejson as json
+
+from ts2 import utils
+
+MAGIC = b"TS2SNAP1"
+FILE_NAME = "simulation.snapshot"
+META_FILE_NAME = "meta.json"
+# Options of the simulation copied to the metadata member of the archives
+META_OPTIONS = ("title", "description", "version")
+# Parts of the document which do not change during a game
+SCENERY_OPTIONS = ("title", "version")
+SCENERY_SECTIONS = ("trackItems", "trainTypes", "services")
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def toPlain(obj):
+    """
+    :return: the plain JSON value of obj, as it would be written by
+             ``json.dumps(obj, for_json=True)`` and read back.
+    """
+    if hasattr(obj, "for_json"):
+        return toPlain(obj.for_json())
+    if isinstance(obj, dict):
+        return {_plainKey(k): toPlain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [toPlain(v) for v in obj]
+    return obj
+
+
+def _plainKey(key):
+    """
+    :return: key converted to a string as JSON does
+    :rtype: str
+    """
+    if isinstance(key, str):
+        return key
+    return json.dumps(key)
+
+
+def _isObject(value):
+    """
+    :return: True if value is a JSON object of a TS2 type
+    :rtype: bool
+    """
+    return isinstance(value, dict) and "__type__" in value
+
+
+def _isObjectList(value):
+    """
+    :return: True if value is a list of JSON objects of TS2 types
+    :rtype: bool
+    """
+    return isinstance(value, list) and all(_isObject(v) for v in value)
+
+
+class _Writer:
+    """Builds the manifest and the data of a snapshot."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def addArray(self, typeCode, values):
+        """Appends the array of values to the data and returns its spec."""
+        data = array(typeCode, values)
+        if sys.byteorder != "little":
+            data.byteswap()
+        offset = len(self.data)
+        self.data += data.tobytes()
+        return [typeCode, offset, len(values)]
+
+    def encodeTable(self, rows):
+        """
+        :param list rows: dicts with a __type__ key
+        :return: the manifest entry of the table
+        """
+        keySets = []
+        keySetIndexes = {}
+        rowKeySets = []
+        groups = []
+        for index, row in enumerate(rows):
+            keys = tuple(row)
+            keySet = keySetIndexes.get(keys)
+            if keySet is None:
+                keySet = keySetIndexes[keys] = len(keySets)
+                keySets.append(keys)
+                groups.append(([], []))
+            rowKeySets.append(keySet)
+            groups[keySet][0].append(index)
+            groups[keySet][1].append(tuple(row.values()))
+        # Rows having the same keys are transposed at once
+        columns = {}
+        for keys, (indexes, values) in zip(keySets, groups):
+            for key, columnValues in zip(keys, zip(*values)):
+                column = columns.setdefault(key, ([], []))
+                column[0].extend(indexes)
+                column[1].extend(columnValues)
+        table = {
+            "rows": len(rows),
+            "keySets": keySets,
+            "keySetColumn": self.addArray("q", rowKeySets),
+            "columns": []
+        }
+        # Columns (and sections) are stored as lists, so that no dict of the
+        # manifest has a __type__ key for the object hook to pick up.
+        for key, (indexes, values) in columns.items():
+            table["columns"].append(
+                [key, self.encodeColumn(len(rows), indexes, values)]
+            )
+        return table
+
+    def encodeColumn(self, count, indexes, values):
+        """
+        :param int count: the number of rows of the table
+        :param list indexes: the indexes of the rows having this column
+        :param list values: the values of these rows
+        :return: the manifest entry of the column
+        """
+        if all(_isObject(v) for v in values):
+            return {"kind": "objects",
+                    "rowColumn": self.addArray("q", indexes),
+                    "table": self.encodeTable(values)}
+        if any(values) and all(_isObjectList(v) for v in values):
+            children = [child for v in values for child in v]
+            parents = [index for index, v in zip(indexes, values)
+                       for child in v]
+            return {"kind": "objectLists",
+                    "rowColumn": self.addArray("q", parents),
+                    "table": self.encodeTable(children)}
+        if all(type(v) is int and _INT64_MIN <= v <= _INT64_MAX
+               for v in values):
+            full = [0] * count
+            typeCode = "q"
+        elif all(type(v) is float for v in values):
+            full = [0.0] * count
+            typeCode = "d"
+        else:
+            full = [None] * count
+            typeCode = None
+        for index, value in zip(indexes, values):
+            full[index] = value
+        if typeCode is None:
+            return {"kind": "json", "values": full}
+        return {"kind": "array", "data": self.addArray(typeCode, full)}
+
+
+def dumps(document):
+    """
+    :param dict document: the plain JSON document of a simulation, as given
+                          by :func:`~ts2.snapshot.toPlain`
+    :return: the binary snapshot of the document
+    :rtype: bytes
+    """
+    writer = _Writer()
+    manifest = {"sections": []}
+    for name, value in document.items():
+        if isinstance(value, dict) and value and not _isObject(value) and \
+                all(_isObject(v) for v in value.values()):
+            section = {"kind": "mapping", "keys": list(value.keys()),
+                       "table": writer.encodeTable(list(value.values()))}
+        elif value and _isObjectList(value):
+            section = {"kind": "list",
+                       "table": writer.encodeTable(value)}
+        elif _isObject(value):
+            section = {"kind": "object",
+                       "table": writer.encodeTable([value])}
+        else:
+            section = {"kind": "json", "value": value}
+        manifest["sections"].append([name, section])
+    manifestData = json.dumps(manifest, separators=(',', ':')).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(manifestData)) + manifestData + \
+        bytes(writer.data)
+
+
+class _Reader:
+    """Decodes the tables of a snapshot."""
+
+    def __init__(self, data, objectHook):
+        self.data = data
+        self.objectHook = objectHook
+
+    def readArray(self, spec):
+        """Returns the array described by spec."""
+        typeCode, offset, length = spec
+        values = array(typeCode)
+        values.frombytes(self.data[offset:offset + length * values.itemsize])
+        if len(values) != length:
+            raise ValueError("Truncated array")
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    def decodeTable(self, table):
+        """
+        :return: the list of the rows of the table, with the object hook
+                 applied on each of them.
+        """
+        count = table["rows"]
+        columns = {}
+        for key, column in table["columns"]:
+            columns[key] = self.decodeColumn(count, column)
+        keySets = table["keySets"]
+        hook = self.objectHook
+        rows = []
+        for index, keySet in enumerate(self.readArray(table["keySetColumn"])):
+            row = {key: columns[key][index] for key in keySets[keySet]}
+            rows.append(hook(row) if hook else row)
+        return rows
+
+    def decodeColumn(self, count, column):
+        """
+        :return: the values of the column, one per row
+        :rtype: list
+        """
+        kind = column["kind"]
+        if kind == "array":
+            return self.readArray(column["data"]).tolist()
+        elif kind == "json":
+            return column["values"]
+        values = self.decodeTable(column["table"])
+        parents = self.readArray(column["rowColumn"])
+        if kind == "objects":
+            full = [None] * count
+            for parent, value in zip(parents, values):
+                full[parent] = value
+        else:
+            full = [[] for i in range(count)]
+            for parent, value in zip(parents, values):
+                full[parent].append(value)
+        return full
+
+
+def loads(data, objectHook=None):
+    """Decodes a snapshot.
+
+    :param bytes data: the snapshot
+    :param objectHook: the JSON object hook to apply to the objects, as
+                       ``json.load()`` does
+    :return: the decoded document
+    """
+    if not data.startswith(MAGIC):
+        raise utils.FormatException("Not a TS2 snapshot")
+    try:
+        return _decode(data, objectHook)
+    except (ValueError, struct.error, KeyError, IndexError, TypeError) as err:
+        # A damaged snapshot fails anywhere while being decoded
+        raise utils.FormatException("Invalid TS2 snapshot: %s: %s" %
+                                    (type(err).__name__, err))
+
+
+def _decode(data, objectHook):
+    """Decodes the manifest and the tables of the snapshot data."""
+    start = len(MAGIC) + 4
+    length, = struct.unpack("<I", data[len(MAGIC):start])
+    manifest = json.loads(data[start:start + length].decode("utf-8"),
+                          object_hook=_manifestHook(objectHook))
+    reader = _Reader(memoryview(data)[start + length:], objectHook)
+    document = {}
+    for name, section in manifest["sections"]:
+        kind = section["kind"]
+        if kind == "json":
+            document[name] = section["value"]
+            continue
+        rows = reader.decodeTable(section["table"])
+        if kind == "mapping":
+            document[name] = dict(zip(section["keys"], rows))
+        elif kind == "list":
+            document[name] = rows
+        else:
+            document[name] = rows[0]
+    return objectHook(document) if objectHook else document
+
+
+def _manifestHook(objectHook):
+    """
+    :return: a hook applying objectHook to the TS2 objects found in the JSON
+             values of the manifest (e.g. in the options), and only to them.
+    """
+    def hook(dct):
+        if objectHook and "__type__" in dct:
+            return objectHook(dct)
+        return dct
+    return hook
+
+
+def writeArchive(fileName, obj, withSnapshot=True,
+                 compression=zipfile.ZIP_BZIP2, compressLevel=None):
+    """Writes obj to the .ts2 archive fileName, as the ``simulation.json``
+    member and, if withSnapshot is True, as a binary snapshot alongside.
+
+    :param str fileName: path of the archive to write
+    :param obj: the object to save, having a ``for_json()`` method
+    :param bool withSnapshot: whether to write the snapshot
+    :param int compression: the ``zipfile`` compression of the members
+    :param int compressLevel: the compression level, None for the default
+    """
+    writeDocument(fileName, toPlain(obj), withSnapshot, compression,
+                  compressLevel)
+
+
+def writeDocument(fileName, document, withSnapshot=True,
+                  compression=zipfile.ZIP_BZIP2, compressLevel=None):
+    """Writes the plain JSON document of a simulation to the .ts2 archive
+    fileName. See :func:`~ts2.snapshot.writeArchive`.
+
+    This function only reads document, so that it can be called from another
+    thread than the one of the simulation.
+    """
+    with zipfile.ZipFile(fileName, "w") as zipArchive:
+        writeMetaData(zipArchive, document.get("options", {}),
+                      sceneryFingerprint(document))
+        zipArchive.writestr("simulation.json",
+                            json.dumps(document, separators=(',', ':'),
+                                       encoding='utf-8'),
+                            compress_type=compression,
+                            compresslevel=compressLevel)
+        if withSnapshot:
+            zipArchive.writestr(FILE_NAME, dumps(document),
+                                compress_type=compression,
+                                compresslevel=compressLevel)
+
+
+def metaData(options):
+    """
+    :param dict options: the options of a simulation
+    :return: the metadata of the simulation, i.e. the ``META_OPTIONS`` items
+             of options.
+    :rtype: dict
+    """
+    return {key: options[key] for key in META_OPTIONS if key in options}
+
+
+def sceneryFingerprint(document):
+    """
+    :param dict document: the plain JSON document of a simulation
+    :return: a hash of the title, the version, the track items, the train
+             types and the services of document, or None if document has no
+             track items. Two games of the same simulation have the same
+             fingerprint, whatever their time, routes and trains.
+    :rtype: str
+    """
+    if "trackItems" not in document:
+        return None
+    options = document.get("options", {})
+    scenery = {key: options.get(key) for key in SCENERY_OPTIONS}
+    for key in SCENERY_SECTIONS:
+        scenery[key] = document.get(key)
+    return hashlib.sha1(
+        json.dumps(scenery, sort_keys=True, separators=(',', ':'),
+                   encoding='utf-8').encode("utf-8")
+    ).hexdigest()
+
+
+def writeMetaData(zipArchive, options, fingerprint=None):
+    """Writes the metadata member of a .ts2 archive, uncompressed, so that the
+    title of the simulation can be read without decompressing it.
+
+    :param zipArchive: the ``zipfile.ZipFile`` open for writing
+    :param dict options: the options of the simulation
+    :param str fingerprint: the scenery fingerprint of the simulation, see
+                            :func:`~ts2.snapshot.sceneryFingerprint`
+    """
+    meta = metaData(options)
+    if fingerprint is not None:
+        meta["sceneryFingerprint"] = fingerprint
+    zipArchive.writestr(META_FILE_NAME, json.dumps(meta),
+                        compress_type=zipfile.ZIP_STORED)
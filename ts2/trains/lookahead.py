@@ -0,0 +1,224 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+from ts2.routing import position
+from ts2.routing.trackgraph import ItemType
+
+
+class Lookahead:
+    """A ``Lookahead`` is the result of a single scan of the track ahead of
+    a train head, from which the next signal, next stop, next speed limit and
+    next train targets of :meth:`~ts2.trains.train.Train.setSpeed` are
+    derived.
+
+    The scan only records the static data of the items ahead: their offset
+    from the entry point of the train head item, the signals facing the train
+    and the points crossed. Signal aspects and train occupancy are read when
+    the targets are queried, so that the scan stays valid as long as the
+    train head remains on the same item in the same direction and none of the
+    points crossed moves. See
+    :meth:`~ts2.trains.lookahead.Lookahead.isValidFor`.
+    """
+
+    def __init__(self, graph, slot, minLength):
+        """Scans the track from slot until two signals are found and at
+        least minLength metres are covered, or until the end of the scenery.
+
+        :param graph: The :class:`~ts2.routing.trackgraph.TrackGraph` of the
+                      simulation
+        :param int slot: The slot of the train head
+        :param float minLength: The minimum length to scan from the entry
+                                point of the train head item
+        """
+        self.graph = graph
+        self.slot = slot
+        self.trackItems = []
+        self.slots = []
+        self.starts = []
+        self.signals = []
+        self.points = []
+        self.reachedEnd = False
+        types = graph.types
+        lengths = graph.lengths
+        nextSlots = graph.next
+        offset = 0.0
+        s = slot
+        while True:
+            i = s // 3
+            self.trackItems.append(graph.item(i))
+            self.slots.append(s)
+            self.starts.append(offset)
+            itemType = types[i]
+            if itemType == ItemType.END:
+                self.reachedEnd = True
+                break
+            if itemType == ItemType.POINTS:
+                self.points.append((i, graph.versions[i]))
+            elif itemType == ItemType.SIGNAL and s % 3 == 0 and \
+                    len(self.slots) > 1 and len(self.signals) < 2:
+                self.signals.append(
+                    (position.Position(graph.item(i), graph.previousTI(s), 0),
+                     offset)
+                )
+            offset += lengths[i]
+            if len(self.signals) >= 2 and offset >= minLength:
+                break
+            s = nextSlots[s]
+            if s < 0:
+                self.reachedEnd = True
+                break
+
+    @property
+    def coveredLength(self):
+        """
+        :return: the length from the entry point of the train head item up to
+                 which the queries are exact.
+        :rtype: float
+        """
+        if self.reachedEnd:
+            return float("inf")
+        return self._end(len(self.slots) - 1)
+
+    def isValidFor(self, slot, length):
+        """
+        :param int slot: the slot of the train head
+        :param float length: the length needed from the entry point of the
+                             train head item
+        :return: True if this scan can be used for a train head on slot
+        :rtype: bool
+        """
+        if slot != self.slot or length > self.coveredLength:
+            return False
+        versions = self.graph.versions
+        for i, version in self.points:
+            if versions[i] != version:
+                return False
+        return True
+
+    def _isSignalOnPosition(self, k):
+        """
+        :return: True if the k-th item is a signal facing the train.
+        :rtype: bool
+        """
+        s = self.slots[k]
+        return s % 3 == 0 and self.graph.types[s // 3] == ItemType.SIGNAL
+
+    def _isEnd(self, k):
+        """
+        :return: True if the k-th item is an EndItem.
+        :rtype: bool
+        """
+        return self.graph.types[self.slots[k] // 3] == ItemType.END
+
+    def _end(self, k):
+        """
+        :return: the offset of the end of the k-th item.
+        :rtype: float
+        """
+        return self.starts[k] + self.graph.lengths[self.slots[k] // 3]
+
+    def nextSignalInfo(self, positionOnTI, index=0):
+        """
+        :param float positionOnTI: the position of the train head on its item
+        :param int index: 0 for the next signal, 1 for the one after.
+        :return: the position of the index-th signal ahead and its distance
+                 from the train head, as
+                 :meth:`~ts2.trains.train.Train.getNextSignalInfo`.
+        :rtype: (:class:`~ts2.routing.position.Position`, float)
+        """
+        if self._isEnd(0) or index >= len(self.signals):
+            return position.Position(), -1
+        pos, offset = self.signals[index]
+        return pos, max(offset - positionOnTI, 0)
+
+    def distanceToPlace(self, positionOnTI, place, maxDistance):
+        """
+        :return: the distance from the train head to the end of the first item
+                 of place ahead, as
+                 :meth:`~ts2.trains.train.Train.getDistanceToNextStop`.
+        :rtype: float
+        """
+        for k in range(len(self.trackItems)):
+            if self._isEnd(k):
+                break
+            distance = self._end(k) - positionOnTI
+            if distance >= maxDistance:
+                break
+            ti = self.trackItems[k]
+            if self._isSignalOnPosition(k) and \
+                    ti.activeAspect.meansProceed():
+                return -1
+            if ti.place == place:
+                return distance
+        return -1
+
+    def nextSpeedLimitInfo(self, positionOnTI, speedLimit, maxDistance):
+        """
+        :param float speedLimit: speeds lower than this value are limits
+        :return: the next speed limit lower than speedLimit and the distance
+                 at which it starts, or (None, -1), as
+                 :meth:`~ts2.trains.train.Train.getNextSpeedLimitInfo`.
+        :rtype: (float, float)
+        """
+        maxSpeeds = self.graph.maxSpeeds
+        for k in range(len(self.trackItems) - 1):
+            if self._isEnd(k):
+                break
+            distance = self._end(k) - positionOnTI
+            if distance >= maxDistance:
+                break
+            maxSpeed = maxSpeeds[self.slots[k + 1] // 3]
+            if maxSpeed < speedLimit:
+                return maxSpeed, distance
+        return None, -1
+
+    def distanceToNextTrain(self, trainHead, maxDistance, trackCircuit):
+        """
+        :param trainHead: the train head position
+        :return: the distance from the train head to the next train, as
+                 :meth:`~ts2.trains.train.Train.getDistanceToNextTrain`.
+        :rtype: float
+        """
+        for k in range(len(self.trackItems)):
+            if self._isEnd(k):
+                break
+            if k == 0:
+                distance = 0
+                pos = trainHead
+            else:
+                distance = self.starts[k] - trainHead.positionOnTI
+                pos = None
+            if distance >= maxDistance:
+                break
+            ti = self.trackItems[k]
+            if self._isSignalOnPosition(k) and \
+                    not ti.activeAspect.meansProceed():
+                return -1
+            if ti.trainPresent():
+                if pos is None:
+                    s = self.slots[k]
+                    pos = position.Position(ti, self.graph.previousTI(s), 0)
+                distanceToTrain = ti.distanceToTrainEnd(pos)
+                if distanceToTrain != -1:
+                    if trackCircuit:
+                        return distance
+                    else:
+                        return distance + distanceToTrain
+        return -1
@@ -24,6 +24,7 @@ from ts2 import utils
 from ts2.routing import position
 from ts2.scenery import lineitem, enditem
 from ts2.scenery.signals import signalaspect, signalitem
+from ts2.trains import lookahead
 
 translate = QtWidgets.qApp.translate
 
@@ -80,11 +81,25 @@ class TrainStatus(QtCore.QObject):
 
 class TrainListModel(QtCore.QAbstractTableModel):
     """Model for displaying trains as a list during the game.
+
+    The values displayed for each train are computed once and kept in a
+    cache, which is updated for a train only when its status changes (see
+    :meth:`~ts2.trains.train.TrainListModel.update`), so that painting or
+    sorting the list does not go back to the trains.
     """
     def __init__(self, simulation):
         """Constructor for the TrainListModel class"""
         super().__init__()
         self.simulation = simulation
+        self._rows = {}
+        self._brushes = {
+            TrainStatus.RUNNING: QtGui.QBrush(Qt.darkGreen),
+            TrainStatus.STOPPED: QtGui.QBrush(Qt.darkBlue),
+            TrainStatus.WAITING: QtGui.QBrush(Qt.red),
+        }
+        self._defaultBrush = QtGui.QBrush(Qt.darkGray)
+        self.modelReset.connect(self.clearCache)
+        self.rowsInserted.connect(self.clearCache)
 
     def rowCount(self, parent=QtCore.QModelIndex(), *args):
         """Returns the number of rows of the model, corresponding to the
@@ -98,44 +113,53 @@ class TrainListModel(QtCore.QAbstractTableModel):
 
         return 8
 
-    def data(self, index, role=Qt.DisplayRole):
-        """Returns the data at the given index"""
-        train = self.simulation.trains[index.row()]
+    def rowValues(self, row):
+        """
+        :return: the values displayed for the train at row: the texts of the
+                 columns and the status of the train, from the cache if
+                 possible.
+        :rtype: tuple
+        """
+        values = self._rows.get(row)
+        if values is None:
+            values = self.trainValues(self.simulation.trains[row])
+            self._rows[row] = values
+        return values
+
+    def trainValues(self, train):
+        """
+        :return: the values displayed for train: the texts of the columns and
+                 the status of the train.
+        :rtype: tuple
+        """
+        service = train.currentService
         if train.nextPlaceIndex is not None:
-            line = train.currentService.lines[train.nextPlaceIndex]
+            line = service.lines[train.nextPlaceIndex]
         else:
             line = None
-        if role == Qt.DisplayRole:
-            if index.column() == 0:
-                return train.serviceCode
-            elif index.column() == 1:
-                return TrainStatus.text(train.status)
-            elif index.column() == 2 and train.currentService:
-                return train.currentService.entryPlaceName
-            elif index.column() == 3 and train.currentService:
-                return train.currentService.exitPlaceName
-            elif index.column() == 4 and line is not None:
-                return line.place.placeName
-            elif index.column() == 5 and line is not None:
-                return line.trackCode
-            elif index.column() == 6 and line is not None:
-                if line.mustStop:
-                    return line.scheduledArrivalTime.toString("hh:mm:ss")
-                else:
-                    return self.tr("Non-stop")
-            elif index.column() == 7 and line is not None:
-                return line.scheduledDepartureTime.toString("hh:mm:ss")
+        texts = [train.serviceCode, TrainStatus.text(train.status), "", "",
+                 "", "", "", ""]
+        if service:
+            texts[2] = service.entryPlaceName
+            texts[3] = service.exitPlaceName
+        if line is not None:
+            texts[4] = line.place.placeName
+            texts[5] = line.trackCode
+            if line.mustStop:
+                texts[6] = line.scheduledArrivalTime.toString("hh:mm:ss")
             else:
-                return ""
+                texts[6] = self.tr("Non-stop")
+            texts[7] = line.scheduledDepartureTime.toString("hh:mm:ss")
+        return tuple(texts), train.status
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Returns the data at the given index"""
+        if role == Qt.DisplayRole:
+            texts, status = self.rowValues(index.row())
+            return texts[index.column()]
         elif role == Qt.ForegroundRole:
-            if train.status == TrainStatus.RUNNING:
-                return QtGui.QBrush(Qt.darkGreen)
-            elif train.status == TrainStatus.STOPPED:
-                return QtGui.QBrush(Qt.darkBlue)
-            elif train.status == TrainStatus.WAITING:
-                return QtGui.QBrush(Qt.red)
-            else:
-                return QtGui.QBrush(Qt.darkGray)
+            texts, status = self.rowValues(index.row())
+            return self._brushes.get(status, self._defaultBrush)
         return None
 
     def headerData(self, column, orientation, role=Qt.DisplayRole):
@@ -167,10 +191,23 @@ class TrainListModel(QtCore.QAbstractTableModel):
 
     @QtCore.pyqtSlot(int)
     def update(self, trainId):
-        """Emits the dataChanged signal for the train defined by trainId."""
+        """Updates the cached values of the train defined by trainId and emits
+        the dataChanged signal for its row if they have changed."""
         row = trainId
+        if row is None or row >= len(self.simulation.trains):
+            return
+        values = self.trainValues(self.simulation.trains[row])
+        if self._rows.get(row) == values:
+            return
+        self._rows[row] = values
         self.dataChanged.emit(self.index(row, 0), self.index(row, 7))
 
+    @QtCore.pyqtSlot()
+    def clearCache(self):
+        """Clears the cached values of all the trains, e.g. when the rows of
+        the model change."""
+        self._rows.clear()
+
 
 class TrainsModel(QtCore.QAbstractTableModel):
     """Model for displaying trains as a list in the editor
@@ -391,6 +428,12 @@ class TrainInfoModel(QtCore.QAbstractTableModel):
         """Returns the train instance associated with this model"""
         return self._train
 
+    def clear(self):
+        """Dissociates the model from its train."""
+        self.beginResetModel()
+        self._train = None
+        self.endResetModel()
+
     @QtCore.pyqtSlot(int)
     def setTrainByTrainId(self, trainId):
         """Sets the train instance associated with this model from its
@@ -429,6 +472,7 @@ class Train(QtCore.QObject):
         self._initialSpeed = parameters.get("initialSpeed", 0.0)
         self._accel = 0
         self._trainHead = parameters["trainHead"]
+        self._trainTail = None
         self._status = parameters.get("status", TrainStatus.INACTIVE)
         self._lastSignal = None
         self._signalActions = [(0, 999)]
@@ -444,6 +488,7 @@ class Train(QtCore.QObject):
         self._initialDelay = 0
         self._appearTime = QtCore.QTime.fromString(parameters["appearTime"])
         self._shunting = False
+        self._lookahead = None
         # FIXME Throw back all these actions to MainWindow
         self.assignAction = QtWidgets.QAction(self.tr("Reassign service..."),
                                               self)
@@ -472,8 +517,7 @@ class Train(QtCore.QObject):
             self.setInitialDelay()
             self.updateMinimumStopTime()
             self.activate(simulation.currentTime)
-            self.simulation.timeElapsed.connect(self.advance)
-            self.simulation.timeChanged.connect(self.activate)
+            self.simulation.scheduler.addTrain(self)
             self.trainStatusChanged.connect(simulation.trainStatusChanged)
             self.trainStoppedAtStation.connect(
                 simulation.scorer.trainArrivedAtStation
@@ -582,6 +626,7 @@ class Train(QtCore.QObject):
             else:
                 self.status = TrainStatus.RUNNING
             self.nextPlaceIndex = 0
+            self.trainStatusChanged.emit(self.trainId)
             self.drawTrain(0)
             self.findNextSignal().trainId = self.trainId
 
@@ -632,12 +677,17 @@ class Train(QtCore.QObject):
     @nextPlaceIndex.setter
     def nextPlaceIndex(self, index):
         """Setter function for the nextPlaceIndex property."""
+        oldIndex = self._nextPlaceIndex
         if index is None or \
            index < 0 or \
            index >= len(self.currentService.lines):
             self._nextPlaceIndex = None
         else:
             self._nextPlaceIndex = index
+        if self._nextPlaceIndex != oldIndex and \
+           self.simulation.context == utils.Context.GAME:
+            # The next place is shown with the status of the train
+            self.trainStatusChanged.emit(self.trainId)
 
     @property
     def trainType(self):
@@ -664,6 +714,7 @@ class Train(QtCore.QObject):
                 self._trainType = self.simulation.trainTypes[value]
             except KeyError:
                 pass
+            self._trainTail = None
 
     @property
     def speed(self):
@@ -716,6 +767,28 @@ class Train(QtCore.QObject):
         """Setter function for the trainHead property"""
         if self.simulation.context == utils.Context.EDITOR_TRAINS:
             self._trainHead = value
+            self._trainTail = None
+
+    @property
+    def trainTail(self):
+        """
+        :return: the Position of the tail of this train, i.e. trainType.length
+                 metres behind the train head. It is computed once per step and
+                 shared by the callers, so it must not be modified.
+        :rtype: :class:`~ts2.routing.position.Position`
+        """
+        if self._trainTail is None:
+            self._trainTail = self._trainHead - self._trainType.length
+        return self._trainTail
+
+    def _updateTrainTail(self):
+        """Moves the cached train tail in place after the train head has
+        moved."""
+        if self._trainTail is None:
+            self._trainTail = self._trainHead - self._trainType.length
+        else:
+            self._trainTail.setTo(self._trainHead)
+            self._trainTail.retreat(self._trainType.length)
 
     def _getTrainHeadStr(self):
         """
@@ -763,6 +836,15 @@ class Train(QtCore.QObject):
         if self.simulation.context == utils.Context.EDITOR_TRAINS:
             self._appearTime = QtCore.QTime.fromString(value)
 
+    @property
+    def realAppearTime(self):
+        """
+        :return: the time at which this train is due to appear on the scene,
+                 that is its appear time plus its initial delay.
+        :rtype: ``QtCore.QTime``
+        """
+        return self._appearTime.addSecs(self.initialDelay)
+
     @property
     def shunting(self):
         """
@@ -830,7 +912,8 @@ class Train(QtCore.QObject):
             self.updateSignalActions()
             self.setSpeed(secs)
             advanceLength = self._speed * secs
-            self._trainHead += advanceLength
+            self._trainHead.advance(advanceLength)
+            self._updateTrainTail()
             self.updateStatus(secs)
             self.drawTrain(advanceLength)
             self.executeActions(advanceLength)
@@ -842,7 +925,7 @@ class Train(QtCore.QObject):
         :meth:`~ts2.trains.train.Train.appearTime`.
         """
         if self.status == TrainStatus.INACTIVE:
-            realAppearTime = self._appearTime.addSecs(self.initialDelay)
+            realAppearTime = self.realAppearTime
             if self.simulation.startTime.addSecs(-3600) \
                     <= realAppearTime < time:
                 self._speed = self._initialSpeed
@@ -890,8 +973,8 @@ class Train(QtCore.QObject):
             activeRoute = self.trainHead.trackItem.activeRoute
             if activeRoute is not None:
                 activeRoute.desactivate()
-            trainTail = self._trainHead - self._trainType.length
-            self._trainHead = trainTail.reversed()
+            self._trainHead = self.trainTail.reversed()
+            self._trainTail = None
             self._speed = 0
             newSignalAhead = self.findNextSignal()
             if newSignalAhead is not None:
@@ -968,6 +1051,7 @@ class Train(QtCore.QObject):
             return
         # Change our own train type to the head type
         self._trainType = headTrainType
+        self._trainTail = None
         # Create a new train for the tail
         parameters = {
             "__type__": "Train",
@@ -1068,13 +1152,12 @@ class Train(QtCore.QObject):
                             if not line.mustStop:
                                 # Train does not stop at this place
                                 self.jumpToNextPlace()
-                                self.trainStatusChanged.emit(self.trainId)
             if self.isActive():
                 ti.trainHeadActions(self.trainId)
         if self._trainHead.isOut():
             trainExiting = True
         # Train tail
-        tt = self._trainHead - self._trainType.length
+        tt = self.trainTail
         ott = tt - advanceLength
         for ti in ott.trackItemsToPosition(tt):
             if self.isActive():
@@ -1154,7 +1237,7 @@ class Train(QtCore.QObject):
 
         :param advanceLength : The length that the train has advanced since
         the last call to this function."""
-        trainTail = self.trainHead - self.trainType.length
+        trainTail = self.trainTail
         oldTrainTail = trainTail - advanceLength
         # Register train on new items (even if to be unregistered just behind)
         for ti in trainTail.trackItemsToPosition(self.trainHead):
@@ -1167,6 +1250,38 @@ class Train(QtCore.QObject):
         for ti in oldTrainTail.trackItemsToPosition(self.trainHead):
             ti.updateTrainHeadAndTail()
 
+    def getLookahead(self, maxDistance=0):
+        """Returns the scan of the track ahead of the train head, which is
+        shared by the lookahead methods of the train. It is computed again
+        only when the train head enters another item or changes direction,
+        when one of the points ahead moves, or when it does not look far
+        enough ahead for maxDistance.
+
+        :param float maxDistance: the distance ahead of the train head that
+                                  must be covered by the scan
+        :return: the lookahead of the train, or None if the simulation has no
+                 compiled track graph
+        :rtype: :class:`~ts2.trains.lookahead.Lookahead`
+        """
+        graph = self.simulation.trackGraph
+        if graph is None:
+            return None
+        slot = graph.slotOfPosition(self._trainHead)
+        if slot < 0:
+            return None
+        length = self._trainHead.positionOnTI + maxDistance
+        if self._lookahead is None or \
+                not self._lookahead.isValidFor(slot, length):
+            brakingDistance = max(
+                self._trainType.maxSpeed**2 / self._trainType.stdBraking,
+                maxDistance,
+                50.0
+            )
+            self._lookahead = lookahead.Lookahead(
+                graph, slot, graph.lengths[slot // 3] + brakingDistance
+            )
+        return self._lookahead
+
     def getNextSignalInfo(self, pos=None):
         """
         :param pos:
@@ -1178,6 +1293,14 @@ class Train(QtCore.QObject):
         """
         if pos is None:
             pos = position.Position()
+        la = self.getLookahead()
+        if la is not None:
+            positionOnTI = self._trainHead.positionOnTI
+            if pos == position.Position():
+                return la.nextSignalInfo(positionOnTI)
+            nsp, nsd = la.nextSignalInfo(positionOnTI)
+            if not nsp.isNull() and pos == nsp:
+                return la.nextSignalInfo(positionOnTI, 1)
         retPos = position.Position()
         retDist = -1
         if pos == position.Position():
@@ -1239,6 +1362,10 @@ class Train(QtCore.QObject):
                 break
         else:
             return -1
+        la = self.getLookahead(maxDistance)
+        if la is not None:
+            return la.distanceToPlace(self._trainHead.positionOnTI,
+                                      line.place, maxDistance)
         pos = self._trainHead
         distance = pos.trackItem.realLength - self._trainHead.positionOnTI
         while (not isinstance(pos.trackItem, enditem.EndItem) and
@@ -1261,6 +1388,10 @@ class Train(QtCore.QObject):
         trackCircuit is True, then the distance is given to the trackItem on
         which a train is present. Otherwise, the real distance to the train is
         returned."""
+        la = self.getLookahead(maxDistance)
+        if la is not None:
+            return la.distanceToNextTrain(self._trainHead, maxDistance,
+                                          trackCircuit)
         pos = self.trainHead
         distance = 0
         while (pos.isValid() and
@@ -1293,6 +1424,16 @@ class Train(QtCore.QObject):
                  maximum distance of ``maxDistance``.
         :rtype: (int, ?)
         """
+        la = self.getLookahead(maxDistance)
+        if la is not None:
+            speedLimit, distance = la.nextSpeedLimitInfo(
+                self._trainHead.positionOnTI,
+                self.getMaximumSpeed() - self.trainType.stdBraking,
+                maxDistance
+            )
+            if speedLimit is not None:
+                return speedLimit, distance
+            return self.getMaximumSpeed(), -1
         pos = self._trainHead
         distance = pos.trackItem.realLength - self._trainHead.positionOnTI
         while (not isinstance(pos.trackItem, enditem.EndItem) and
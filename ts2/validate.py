@@ -0,0 +1,371 @@
+#
+#   Copyright (C) 2008-2015 by Nicolas Piganeau
+#   npi@m4x.org
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 2 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the
+#   Free Software Foundation, Inc.,
+#   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+
+"""Validation of simulation files without GUI.
+
+Each file is loaded and initialized with the steps of
+:meth:`~ts2.simulation.Simulation.initialize`. Before some steps, the
+problems on which the step would stop are checked, so that all of them are
+reported instead of only the first one:
+
+- ``unlinked``: track items which are not linked at one end,
+- ``route``: routes with unknown signals or which cannot link their begin
+  signal with their end signal,
+- ``unknownItem``: items of ``trainNotPresentParams`` or
+  ``trainPresentParams`` which do not exist,
+- ``unknownPlace``: service lines referencing a place which does not exist,
+- ``error``: other errors while loading or initializing, with the
+  initialization step which failed.
+
+Many files are validated in parallel by :func:`~ts2.validate.validateFiles`
+or by the ``ts2-validate`` command::
+
+    ts2-validate [--jobs N] [--report report.json] PATH [PATH ...]
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+
+import simplejson as json
+from Qt import QtWidgets
+
+from ts2 import headless, loader, utils
+from ts2.scenery import enditem, placeitem, platformitem, textitem
+from ts2.scenery.signals import signalitem
+
+ITEM_PARAMS = ("trainNotPresentParams", "trainPresentParams")
+
+
+def readFile(fileName):
+    """Reads the simulation stored in fileName, which is either a .ts2
+    archive or a plain .json file, without initializing it.
+
+    :rtype: :class:`~ts2.headless.HeadlessSimulation`
+    """
+    simLoader = loader.SimulationLoader()
+    if zipfile.is_zipfile(fileName):
+        with zipfile.ZipFile(fileName) as zipArchive:
+            sim = simLoader.readArchive(zipArchive, headless.json_hook)
+    else:
+        with open(fileName) as file:
+            sim = simLoader.read(file, headless.json_hook)
+    if not isinstance(sim, headless.HeadlessSimulation):
+        raise utils.FormatException("Loaded file is not a TS2 simulation")
+    return sim
+
+
+def issue(kind, message, **details):
+    """
+    :return: a problem found in a simulation
+    :rtype: dict
+    """
+    result = {"kind": kind, "message": message}
+    result.update(details)
+    return result
+
+
+def unlinkedItems(sim):
+    """
+    :return: the issues of the track items which are not linked, as
+             :meth:`~ts2.simulation.Simulation.checkTrackItemsLinks` checks
+    :rtype: list
+    """
+    issues = []
+    for ti in sim.trackItems.values():
+        if isinstance(ti, (placeitem.Place, platformitem.PlatformItem,
+                           textitem.TextItem)):
+            continue
+        if ti.nextItem is None and not isinstance(ti, enditem.EndItem):
+            issues.append(issue(
+                "unlinked", "TrackItem %i is unlinked at (%f, %f)" %
+                (ti.tiId, ti.end.x(), ti.end.y()), tiId=ti.tiId
+            ))
+        if ti.previousItem is None:
+            issues.append(issue(
+                "unlinked", "TrackItem %i is unlinked at (%f, %f)" %
+                (ti.tiId, ti.origin.x(), ti.origin.y()), tiId=ti.tiId
+            ))
+    return issues
+
+
+def unknownSignals(sim):
+    """
+    :return: the issues of the routes which reference unknown signals
+    :rtype: list
+    """
+    issues = []
+    for routeNum, rte in sim.routes.items():
+        unknown = [tiId for tiId in (rte.beginSignalId, rte.endSignalId)
+                   if tiId not in sim.trackItems]
+        if unknown:
+            issues.append(issue(
+                "route", "Route %s references unknown signals %s" %
+                (routeNum, ", ".join(str(tiId) for tiId in unknown)),
+                routeNum=routeNum, unknown=unknown
+            ))
+    return issues
+
+
+def invalidRoutes(sim):
+    """
+    :return: the issues of the initialized routes which cannot link their
+             begin signal with their end signal
+    :rtype: list
+    """
+    issues = []
+    for routeNum, rte in sim.routes.items():
+        if not rte.isValid:
+            issues.append(issue(
+                "route", "Route %s cannot link signal %s with signal %s" %
+                (routeNum, rte.beginSignalId, rte.endSignalId),
+                routeNum=routeNum
+            ))
+    return issues
+
+
+def unknownItems(sim):
+    """
+    :return: the issues of the item parameters of signals which reference
+             unknown track items
+    :rtype: list
+    """
+    issues = []
+    for ti in sim.trackItems.values():
+        if not isinstance(ti, signalitem.SignalItem):
+            continue
+        for paramsName in ITEM_PARAMS:
+            params = getattr(ti, paramsName, None) or {}
+            for aspectName, tiIds in params.items():
+                for tiId in tiIds:
+                    if tiId not in sim.trackItems:
+                        issues.append(issue(
+                            "unknownItem",
+                            "SignalItem %s references unknown track item %s "
+                            "in %s" % (ti.tiId, tiId, paramsName),
+                            tiId=ti.tiId, param=paramsName, unknown=tiId
+                        ))
+    return issues
+
+
+def unknownPlaces(sim):
+    """
+    :return: the issues of the service lines which reference unknown places
+    :rtype: list
+    """
+    issues = []
+    for serviceCode, service in sim.services.items():
+        for line in service.lines:
+            if line.placeCode not in sim.places:
+                issues.append(issue(
+                    "unknownPlace",
+                    "Service %s references unknown place %s" %
+                    (serviceCode, line.placeCode),
+                    serviceCode=serviceCode, placeCode=line.placeCode
+                ))
+    return issues
+
+
+# Checks run before the initialization step of the same name, which would
+# stop on the problems they report
+STEP_CHECKS = {
+    "checkLinks": unlinkedItems,
+    "initializeRoutes": unknownSignals,
+    "setRoutesToInitialState": invalidRoutes,
+    "setupTriggers": unknownItems,
+    "initializeServices": unknownPlaces
+}
+# Checks which only read the loaded objects, and can be run even if a
+# previous step has stopped
+PARAMETER_CHECKS = (unknownSignals, unknownItems, unknownPlaces)
+
+
+def validateSimulation(sim):
+    """Initializes sim with the steps of
+    :meth:`~ts2.simulation.Simulation.initialize` and checks it.
+
+    :param sim: a :class:`~ts2.headless.HeadlessSimulation` which is read
+                but not initialized.
+    :return: the issues found
+    :rtype: list
+    """
+    sim.simulationWindow = headless.HeadlessWindow(sim)
+    issues = []
+    try:
+        with sim.signalUpdateQueue.batch():
+            _runSteps(sim, sim.initializationSteps(), issues)
+    except Exception as err:
+        # Raised when the signals are evaluated at the end of the batch
+        if not issues:
+            issues.append(issue("error", "%s: %s" %
+                                (type(err).__name__, err)))
+    return issues
+
+
+def _runSteps(sim, steps, issues):
+    """Runs the initialization steps of sim until one of them stops or has
+    problems, adding the issues found to issues."""
+    for index, (message, step) in enumerate(steps):
+        check = STEP_CHECKS.get(step.__name__)
+        if check is not None:
+            issues += check(sim)
+        if not issues:
+            try:
+                step()
+            except Exception as err:
+                issues.append(issue("error", "%s: %s: %s" %
+                                    (message, type(err).__name__, err),
+                                    step=step.__name__))
+        if issues:
+            if index > 0:
+                # The next steps cannot be run, but the objects loaded can
+                # still be checked once the track items are initialized.
+                for message, nextStep in steps[index + 1:]:
+                    check = STEP_CHECKS.get(nextStep.__name__)
+                    if check in PARAMETER_CHECKS:
+                        issues += check(sim)
+            return
+
+
+def validateFile(fileName):
+    """Loads and validates the simulation stored in fileName.
+
+    :return: the report of the file, with its name, the issues found,
+             whether it is valid and the time taken in seconds.
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    try:
+        issues = validateSimulation(readFile(fileName))
+    except Exception as err:
+        issues = [issue("error", "%s: %s" % (type(err).__name__, err))]
+    return {
+        "file": fileName,
+        "valid": not issues,
+        "issues": issues,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def simulationFiles(paths):
+    """
+    :return: the simulation files given in paths, searching directories
+             recursively for .ts2 and .json files.
+    :rtype: list
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirnames, fileNames in os.walk(path):
+                for pattern in ("*.ts2", "*.json"):
+                    files.extend(os.path.join(root, fileName) for fileName
+                                 in fnmatch.filter(fileNames, pattern))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+_application = None
+
+
+def _initializeWorker():
+    """Creates the application of a worker process."""
+    global _application
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    _application = QtWidgets.QApplication.instance() or \
+        QtWidgets.QApplication([])
+
+
+def validateFiles(fileNames, jobs=None):
+    """Validates fileNames in a pool of jobs processes (as many as CPUs if
+    None), or in this process if there is only one job or one file.
+
+    :return: the reports of the files, in the order of fileNames, as they are
+             given by :func:`~ts2.validate.validateFile`
+    :rtype: generator
+    """
+    fileNames = list(fileNames)
+    jobs = min(jobs or os.cpu_count() or 1, len(fileNames))
+    if jobs <= 1:
+        for fileName in fileNames:
+            yield validateFile(fileName)
+        return
+    # Qt does not survive a fork: the workers are started from scratch
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, mp_context=context,
+            initializer=_initializeWorker) as executor:
+        yield from executor.map(validateFile, fileNames)
+
+
+def Main(args=None):
+    """Validates the simulation files given on the command line, prints a
+    line for each of them and writes the JSON report if requested.
+
+    :param list args: the command line arguments, those of the program if
+                      None.
+    :return: the exit code of the program: 0 if all the files are valid
+    """
+    parser = argparse.ArgumentParser(
+        "ts2-validate",
+        description="Validates TS2 simulation files without GUI"
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of processes (default: number of CPUs)")
+    parser.add_argument("-r", "--report", default=None,
+                        help="File to write the JSON report to")
+    parser.add_argument("-q", "--quiet", action="store_true", default=False,
+                        help="Only print the invalid files")
+    parser.add_argument("paths", nargs="+",
+                        help="Simulation files or directories")
+    args = parser.parse_args(args)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QtWidgets.QApplication.instance() or \
+        QtWidgets.QApplication(sys.argv)
+    fileNames = simulationFiles(args.paths)
+    start = time.perf_counter()
+    reports = []
+    for report in validateFiles(fileNames, args.jobs):
+        reports.append(report)
+        if report["valid"] and args.quiet:
+            continue
+        print("%s %s (%.3f s)" % ("OK     " if report["valid"] else "INVALID",
+                                  report["file"], report["seconds"]))
+        for fileIssue in report["issues"]:
+            print("    [%s] %s" % (fileIssue["kind"], fileIssue["message"]))
+    invalid = sum(1 for report in reports if not report["valid"])
+    duration = time.perf_counter() - start
+    print("%i files, %i invalid, %.3f s" % (len(reports), invalid, duration))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump({"files": reports, "invalid": invalid,
+                       "seconds": round(duration, 3)}, file, indent=2)
+    del app
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
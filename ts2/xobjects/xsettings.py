@@ -18,7 +18,9 @@
 #   59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
 #
 
+import collections
 import os
+import zipfile
 
 from Qt import QtCore, QtWidgets
 
@@ -30,6 +32,35 @@ class XSettings(QtCore.QSettings):
 
     INITIAL_SETUP = "initial_setup"
     LOAD_LAST = "load_last"
+    # Minutes of real time between two autosaves, 0 to disable autosave
+    AUTOSAVE_INTERVAL = "autosave/interval"
+    # Number of autosaves kept for each simulation
+    AUTOSAVE_KEEP = "autosave/keep"
+
+    # Compression of the .ts2 archives written by TS2
+    COMPRESSION_CODECS = collections.OrderedDict([
+        ("stored", zipfile.ZIP_STORED),
+        ("deflate", zipfile.ZIP_DEFLATED),
+        ("bzip2", zipfile.ZIP_BZIP2),
+        ("lzma", zipfile.ZIP_LZMA)
+    ])
+    # Valid compression levels of each codec, as (min, max)
+    COMPRESSION_LEVELS = {
+        "deflate": (0, 9),
+        "bzip2": (1, 9)
+    }
+
+    class COMPRESSION:
+        """Usages of compression, each having its own codec and level."""
+        game = "game"
+        files = "files"
+
+    # Default (codec, level) for each usage: saved games are written during
+    # play and must be fast, simulation files are shared and must be small.
+    COMPRESSION_DEFAULTS = {
+        COMPRESSION.game: ("deflate", 1),
+        COMPRESSION.files: ("bzip2", 9)
+    }
 
     class HACKERS:
         npi = "npi"
@@ -84,6 +115,60 @@ class XSettings(QtCore.QSettings):
         if v:
             window.restoreState(v)
 
+    def compressionCodec(self, usage):
+        """
+        :param str usage: one of the :class:`XSettings.COMPRESSION` usages
+        :return: the codec name for usage
+        :rtype: str
+        """
+        default = self.COMPRESSION_DEFAULTS[usage][0]
+        codec = self.value("compression/%s/codec" % usage, default)
+        if codec not in self.COMPRESSION_CODECS:
+            return default
+        return codec
+
+    def compressionLevel(self, usage):
+        """
+        :param str usage: one of the :class:`XSettings.COMPRESSION` usages
+        :return: the compression level for usage, or None if the codec has
+                 no level.
+        :rtype: int
+        """
+        codec = self.compressionCodec(usage)
+        if codec not in self.COMPRESSION_LEVELS:
+            return None
+        low, high = self.COMPRESSION_LEVELS[codec]
+        defaultCodec, defaultLevel = self.COMPRESSION_DEFAULTS[usage]
+        if codec != defaultCodec:
+            defaultLevel = high
+        level = self.i("compression/%s/level" % usage, defaultLevel)
+        return min(max(level, low), high)
+
+    def setCompression(self, usage, codec, level=None):
+        """Sets the codec and level of compression for usage.
+
+        :param str usage: one of the :class:`XSettings.COMPRESSION` usages
+        :param str codec: a key of ``COMPRESSION_CODECS``
+        :param int level: the compression level, if the codec has levels
+        """
+        if codec not in self.COMPRESSION_CODECS:
+            raise ValueError("Unknown compression codec: %s" % codec)
+        self.setValue("compression/%s/codec" % usage, codec)
+        if level is None:
+            self.remove("compression/%s/level" % usage)
+        else:
+            self.setValue("compression/%s/level" % usage, level)
+
+    def compression(self, usage):
+        """
+        :param str usage: one of the :class:`XSettings.COMPRESSION` usages
+        :return: the ``compress_type`` and ``compresslevel`` to pass to
+                 ``zipfile`` for usage.
+        :rtype: tuple
+        """
+        return (self.COMPRESSION_CODECS[self.compressionCodec(usage)],
+                self.compressionLevel(usage))
+
     def setDebug(self, debug):
         """Set debug flag"""
         self._debug = debug
@@ -117,6 +202,21 @@ class XSettings(QtCore.QSettings):
     def userDataDir(self):
         return os.path.join(self._getUserDataDirectory(), "data")
 
+    @property
+    def autosaveDir(self):
+        return os.path.join(self._getUserDataDirectory(), "autosave")
+
+    @property
+    def simulationsIndexFile(self):
+        """File caching the metadata of the simulations"""
+        return os.path.join(self._getUserDataDirectory(),
+                            "simulations-index.json")
+
+    @property
+    def downloadDir(self):
+        """Directory of the partial downloads of simulation packs"""
+        return os.path.join(self._getUserDataDirectory(), "download")
+
     def i(self, ki, default=None):
         """Return  value as int"""
         v = self.value(ki, default)